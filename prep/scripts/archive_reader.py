@@ -0,0 +1,154 @@
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+import zipfile
+
+import py7zr
+from py7zr.io import Py7zIO, WriterFactory
+
+# Feed files the reader understands; directories are read recursively
+FEED_SUFFIXES = (".7z", ".zip", ".json", ".json.gz")
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    pass
+
+
+class _MemberBuffer(Py7zIO):
+    def __init__(self, name):
+        self.name = name
+        self._buf = io.BytesIO()
+
+    def write(self, s):
+        return self._buf.write(s)
+
+    def read(self, size=None):
+        return self._buf.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._buf.seek(offset, whence)
+
+    def flush(self):
+        pass
+
+    def size(self):
+        return self._buf.getbuffer().nbytes
+
+    def getvalue(self):
+        return self._buf.getvalue()
+
+
+class _QueueFactory(WriterFactory):
+    """
+    Hands every decompressed member over to the consumer as soon as py7zr
+    starts on the next one, so only `maxsize` members are held in memory at once.
+    """
+
+    def __init__(self, out, stop, suffix):
+        self.out = out
+        self.stop = stop
+        self.suffix = suffix
+        self.current = None
+
+    def _put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.out.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Aborted()
+
+    def emit_current(self):
+        if self.current is not None and self.current.name.endswith(self.suffix):
+            self._put((self.current.name, self.current.getvalue()))
+        self.current = None
+
+    def create(self, filename):
+        self.emit_current()
+        self.current = _MemberBuffer(filename)
+        return self.current
+
+
+def _iter_7z(path, suffix, max_buffered):
+    out = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+
+    def produce():
+        factory = _QueueFactory(out, stop, suffix)
+        try:
+            with py7zr.SevenZipFile(path, "r") as z:
+                targets = [n for n in z.getnames() if n.endswith(suffix)]
+                if targets:
+                    z.extract(targets=targets, factory=factory)
+            factory.emit_current()
+            factory._put(_DONE)
+        except _Aborted:
+            pass
+        except Exception as e:
+            try:
+                factory._put(e)
+            except _Aborted:
+                pass
+
+    worker = threading.Thread(target=produce, name=f"7z-reader-{os.path.basename(path)}", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def _iter_zip(path, suffix):
+    with zipfile.ZipFile(path) as z:
+        for info in z.infolist():
+            if not info.is_dir() and info.filename.endswith(suffix):
+                with z.open(info) as fh:
+                    yield info.filename, fh.read()
+
+
+def iter_members(source, suffix=".json", max_buffered=8):
+    """
+    Yields (name, raw bytes) for every `suffix` member of a feed: a .7z or .zip archive,
+    a plain or gzip-compressed file, or a directory of any of these.
+    Nothing is extracted to disk; at most `max_buffered` 7z members are held in memory.
+    """
+    if os.path.isdir(source):
+        for entry in list_feeds(source):
+            yield from iter_members(os.path.join(source, entry), suffix, max_buffered)
+    elif source.endswith(".7z"):
+        yield from _iter_7z(source, suffix, max_buffered)
+    elif source.endswith(".zip"):
+        yield from _iter_zip(source, suffix)
+    elif source.endswith(suffix + ".gz"):
+        with gzip.open(source, "rb") as fh:
+            yield os.path.basename(source)[:-3], fh.read()
+    elif source.endswith(suffix):
+        with open(source, "rb") as fh:
+            yield os.path.basename(source), fh.read()
+
+
+def iter_json_documents(source, max_buffered=8):
+    """Yields (name, parsed JSON) for every JSON member of a feed, see iter_members."""
+    for name, raw in iter_members(source, ".json", max_buffered):
+        yield name, json.loads(raw)
+
+
+def list_feeds(directory):
+    """Sorted feed files and sub-directories of `directory`."""
+    return sorted(
+        entry for entry in os.listdir(directory)
+        if entry.endswith(FEED_SUFFIXES) or os.path.isdir(os.path.join(directory, entry))
+    )
@@ -0,0 +1,344 @@
+"""
+Bulk loader for the generated RDF.
+
+Uploads N-Triples / Turtle shards (optionally gzip-compressed) into one named graph per source
+through the SPARQL 1.1 Graph Store Protocol, many requests at a time, then applies the
+SPARQL Update deltas (.ru) of incremental runs in file-name order.
+
+    python bulk_loader.py --dataset http://localhost:3030/davi3            # every source of paths.SOURCES
+    python bulk_loader.py cve=results/cve_rdf_batches "extra=data/*.nt"
+
+Each source is `[name=]path`, where path is a file, a directory or a glob. Its graph is
+`--graph-base` + name. The default name is the paths.SOURCES name for the known output
+locations (cve, cpe, cwe, movielens, the names void_stats describes), else the directory name. The deltas found in a source
+must target that same graph (cve_parser.process_cve_updates does by default); deltas are
+skipped when any upload failed.
+
+The data ends up in named graphs only. The REST API queries the default graph, so Fuseki
+has to expose their union as the default graph (`tdb2:unionDefaultGraph true` in the
+dataset's assembler configuration).
+"""
+import argparse
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import paths
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("bulk-loader")
+
+DEFAULT_DATASET = os.getenv("FUSEKI_DATASET", "http://localhost:3030/davi3")
+DEFAULT_GRAPH_BASE = paths.GRAPH_BASE
+
+CONTENT_TYPES = {
+    ".nt": "application/n-triples",
+    ".ttl": "text/turtle",
+}
+DELTA_SUFFIX = ".ru"
+_GRAPH_REF = re.compile(rb"GRAPH\s+<([^>]*)>")
+# Answers worth retrying; any other HTTP error fails the upload immediately
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _report(event, **fields):
+    log.info(json.dumps({"event": event, **fields}))
+
+
+def _base_suffix(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return os.path.splitext(name)[1]
+
+
+def _open_text(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_nt_chunks(path, chunk_bytes):
+    """Splits an N-Triples file at line boundaries into (payload, triples) chunks of about chunk_bytes."""
+    lines, size, triples = [], 0, 0
+    with _open_text(path) as fh:
+        for line in fh:
+            lines.append(line)
+            size += len(line)
+            stripped = line.strip()
+            if stripped and not stripped.startswith(b"#"):
+                triples += 1
+            if size >= chunk_bytes:
+                yield b"".join(lines), triples
+                lines, size, triples = [], 0, 0
+    if lines:
+        yield b"".join(lines), triples
+
+
+def _gzip_file_stream(path, block_size=1 << 20):
+    """Streams a whole file gzip-compressed (as-is if it already is), without reading it into memory."""
+    if path.endswith(".gz"):
+        with open(path, "rb") as fh:
+            while block := fh.read(block_size):
+                yield block
+        return
+
+    # wbits=31: gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with open(path, "rb") as fh:
+        while block := fh.read(block_size):
+            out = compressor.compress(block)
+            if out:
+                yield out
+    yield compressor.flush()
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = self.bytes = self.triples = self.retries = self.failures = 0
+        self.started = time.perf_counter()
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def summary(self):
+        seconds = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "triples": self.triples,
+            "seconds": round(seconds, 2),
+            "mb_per_s": round(self.bytes / 1e6 / seconds, 2),
+            "triples_per_s": round(self.triples / seconds),
+        }
+
+
+class BulkLoader:
+    def __init__(self, dataset=DEFAULT_DATASET, graph_base=DEFAULT_GRAPH_BASE, workers=8,
+                 chunk_mb=16, retries=5, backoff=1.0, timeout=600, user=None, password=None):
+        self.dataset = dataset.rstrip("/")
+        self.graph_base = graph_base
+        self.workers = workers
+        self.chunk_bytes = int(chunk_mb * 1024 * 1024)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = _Stats()
+        self._auth = None
+        if user:
+            token = base64.b64encode(f"{user}:{password or ''}".encode("utf-8")).decode("ascii")
+            self._auth = f"Basic {token}"
+
+    def graph_uri(self, source):
+        return self.graph_base + source
+
+    def _gsp_url(self, graph):
+        return f"{self.dataset}/data?graph={urllib.parse.quote(graph, safe='')}"
+
+    def _send(self, method, url, body=None, headers=None, size=0, triples=0, allow_missing=False):
+        """
+        Sends one request, retrying transient failures with exponential backoff and jitter.
+        `body` is bytes or a zero-argument callable returning a fresh iterable per attempt.
+        """
+        headers = dict(headers or {})
+        if self._auth:
+            headers["Authorization"] = self._auth
+
+        for attempt in range(self.retries + 1):
+            data = body() if callable(body) else body
+            request = urllib.request.Request(url, data=data, headers=headers, method=method)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                self.stats.add(requests=1, bytes=size, triples=triples)
+                return
+            except urllib.error.HTTPError as e:
+                if allow_missing and e.code == 404:
+                    return
+                if e.code not in RETRYABLE_STATUS or attempt == self.retries:
+                    self.stats.add(failures=1)
+                    raise RuntimeError(f"{method} {url} failed with HTTP {e.code}: {e.read()[:500]!r}") from e
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.retries:
+                    self.stats.add(failures=1)
+                    raise RuntimeError(f"{method} {url} failed: {e}") from e
+
+            self.stats.add(retries=1)
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def clear_graph(self, graph):
+        self._send("DELETE", self._gsp_url(graph), allow_missing=True)
+        _report("graph_cleared", graph=graph)
+
+    def _upload_chunk(self, graph, payload, triples, content_type):
+        compressed = gzip.compress(payload, compresslevel=6)
+        self._send(
+            "POST", self._gsp_url(graph), compressed,
+            headers={"Content-Type": content_type, "Content-Encoding": "gzip"},
+            size=len(payload), triples=triples
+        )
+
+    def _upload_whole(self, graph, path, content_type):
+        self._send(
+            "POST", self._gsp_url(graph), lambda: _gzip_file_stream(path),
+            headers={"Content-Type": content_type, "Content-Encoding": "gzip"},
+            size=os.path.getsize(path)
+        )
+
+    def load(self, sources, replace=False):
+        """
+        Uploads every shard of `sources` ({name: [files]}) into its graph.
+        N-Triples shards are split into chunks that are POSTed concurrently; Turtle files
+        cannot be split safely and are streamed whole. Returns the number of failed uploads.
+        """
+        if replace:
+            for name in sources:
+                self.clear_graph(self.graph_uri(name))
+
+        failed = 0
+        # Bounds the chunks held in memory while waiting for a free connection
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def release(_):
+            slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for name, files in sources.items():
+                graph = self.graph_uri(name)
+                for path in files:
+                    content_type = CONTENT_TYPES[_base_suffix(path)]
+                    if content_type == CONTENT_TYPES[".nt"]:
+                        tasks = (
+                            (self._upload_chunk, (graph, payload, triples, content_type))
+                            for payload, triples in iter_nt_chunks(path, self.chunk_bytes)
+                        )
+                    else:
+                        tasks = [(self._upload_whole, (graph, path, content_type))]
+
+                    for fn, args in tasks:
+                        slots.acquire()
+                        future = pool.submit(fn, *args)
+                        future.add_done_callback(release)
+                        futures[future] = path
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    _report("upload_failed", file=futures[future], error=str(e))
+
+        _report("loaded", graphs=[self.graph_uri(name) for name in sources], **self.stats.summary())
+        return failed
+
+    def apply_deltas(self, deltas):
+        """
+        Applies the SPARQL Update delta files of every source ({name: [files]}), in file-name
+        order. Each file must only touch the source's graph: an unscoped delta would duplicate
+        the resources into the default graph instead of replacing them.
+        """
+        for name, files in deltas.items():
+            graph = self.graph_uri(name).encode("utf-8")
+            for path in sorted(files, key=os.path.basename):
+                with open(path, "rb") as fh:
+                    update = fh.read()
+
+                graphs = set(_GRAPH_REF.findall(update))
+                if graphs != {graph}:
+                    raise RuntimeError(
+                        f"{path} targets {sorted(g.decode() for g in graphs) or 'the default graph'}, "
+                        f"not {graph.decode()}"
+                    )
+
+                self._send(
+                    "POST", f"{self.dataset}/update", update,
+                    headers={"Content-Type": "application/sparql-update"},
+                    size=len(update)
+                )
+                _report("delta_applied", file=path, graph=graph.decode())
+
+
+def notify_api(api_url, api_key):
+    """Tells the REST API the data changed, so it drops caches and rebuilds its indexes."""
+    request = urllib.request.Request(
+        f"{api_url.rstrip('/')}/api/v1/admin/reload", data=b"", method="POST",
+        headers={"X-API-Key": api_key}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+    _report("api_reloaded", api=api_url)
+
+
+def collect_sources(specs):
+    """Parses `[name=]path` specs into ({name: [shards]}, {name: [delta files]})."""
+    sources, deltas = {}, {}
+    for spec in specs:
+        name, _, path = spec.rpartition("=")
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in os.listdir(path)]
+            name = name or paths.source_name(path) or os.path.basename(os.path.normpath(path))
+        else:
+            files = glob.glob(path)
+            name = name or paths.source_name(path) or os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+        for f in sorted(files):
+            if f.endswith(DELTA_SUFFIX):
+                deltas.setdefault(name, []).append(f)
+            elif _base_suffix(f) in CONTENT_TYPES:
+                sources.setdefault(name, []).append(f)
+    return sources, deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generated RDF into the triple store.")
+    parser.add_argument("sources", nargs="*", help="[name=]path of a shard, directory or glob "
+                                                   "(default: every source in paths.SOURCES)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Fuseki dataset URL")
+    parser.add_argument("--graph-base", default=DEFAULT_GRAPH_BASE)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent HTTP uploads")
+    parser.add_argument("--chunk-mb", type=float, default=16, help="N-Triples chunk size (uncompressed)")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--replace", action="store_true", help="Drop each target graph first")
+    parser.add_argument("--user", default=os.getenv("FUSEKI_USER"))
+    parser.add_argument("--password", default=os.getenv("FUSEKI_PASSWORD"))
+    parser.add_argument("--api-url", help="REST API to notify once loaded, e.g. http://localhost:8000")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "").split(",")[0])
+    args = parser.parse_args()
+
+    specs = args.sources or [f"{name}={location}" for name, locations in paths.SOURCES.items()
+                             for location in locations]
+    sources, deltas = collect_sources(specs)
+    loader = BulkLoader(
+        args.dataset, args.graph_base, workers=args.workers, chunk_mb=args.chunk_mb,
+        retries=args.retries, user=args.user, password=args.password
+    )
+
+    failed = loader.load(sources, replace=args.replace) if sources else 0
+    if deltas and failed:
+        # Deltas assume the full load is in place
+        _report("deltas_skipped", files=sum(len(d) for d in deltas.values()), failed_uploads=failed)
+    elif deltas:
+        loader.apply_deltas(deltas)
+
+    if args.api_url:
+        notify_api(args.api_url, args.api_key)
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
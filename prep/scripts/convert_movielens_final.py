@@ -1,27 +1,48 @@
-import datetime
+import gzip
+import json
+import multiprocessing as mp
 import os
 import re
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import pandas as pd
 
+import paths
+from movielens_staging import TextColumn, load_table, stage_movielens
+from void_stats import StatsOutput
+
 # ================= CONFIGURATION =================
 TOP_N_MOVIES = 1000
 MAX_RATINGS_PER_MOVIE = 1000
 GENOME_THRESHOLD = 0.5
-INPUT_DIR = "D:/Master/Anul2Sem1/WADE/Project/davi/data/ML_20M"
-OUTPUT_DIR = "D:/Master/Anul2Sem1/WADE/Project/davi/data/results/movielens"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+INPUT_DIR = paths.MOVIELENS_INPUT_DIR
+OUTPUT_DIR = paths.MOVIELENS_OUTPUT_DIR
+# "turtle" (prefixed names, .ttl) or "nt" (full IRIs, .nt); both are written one triple per line
+OUTPUT_FORMAT = "turtle"
+CHUNK_SIZE = 1000000
+# Typed columnar copy of the CSVs, parsed once and memory-mapped by every step
+STAGING_DIR = os.path.join(OUTPUT_DIR, "_staging")
+# > 0: ratings and genome scores are split by movie-id hash into this many N-Triples shards,
+# written by a process pool and listed in <kind>_manifest.json
+SHARDS = 0
+SHARD_WORKERS = os.cpu_count() or 1
+COMPRESS_SHARDS = True
+# Step 1 result, so the later steps can run in separate processes / runs
+MAPPING_FILE = "movie_mapping.json"
 
 # NAMESPACES & PREFIXES
-PREFIXES = """@prefix schema: <http://schema.org/> .
-@prefix davi-mov: <https://purl.org/davi/vocab/movielens#> .
-@prefix imdb: <https://www.imdb.com/title/tt> .
-@prefix genre: <https://www.imdb.com/search/title/?genres=> .
-@prefix dcterms: <http://purl.org/dc/terms/> .
-@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
-@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
-"""
+NAMESPACES = {
+    "schema": "http://schema.org/",
+    "davi-mov": "https://purl.org/davi/vocab/movielens#",
+    "imdb": "https://www.imdb.com/title/tt",
+    "genre": "https://www.imdb.com/search/title/?genres=",
+    "dcterms": "http://purl.org/dc/terms/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+}
+PREFIXES = "".join(f"@prefix {p}: <{uri}> .\n" for p, uri in NAMESPACES.items())
 
 # GLOBAL STORAGE
 MOVIE_ID_TO_IMDB = {}  # Internal ID -> IMDB Suffix (e.g., "1" -> "0114709")
@@ -37,23 +58,117 @@ GENRE_MAP = {
 }
 
 
+# ================= VECTORIZED TERM BUILDERS =================
+def iri(prefix, local):
+    """prefix:local for Turtle, <namespace+local> for N-Triples; `local` may be a str or a Series."""
+    if OUTPUT_FORMAT == "nt":
+        return "<" + NAMESPACES[prefix] + local + ">"
+    return prefix + ":" + local
+
+
 def clean_text(text):
-    """Escapes special characters for Turtle strings."""
-    if pd.isna(text): return ""
-    return str(text).replace('\\', '\\\\').replace('"', '\\"')
+    """Escapes special characters for Turtle / N-Triples strings (column-wise)."""
+    return (text.fillna("").astype(str)
+            .str.replace("\\", "\\\\", regex=False)
+            .str.replace('"', '\\"', regex=False)
+            .str.replace("\n", "\\n", regex=False)
+            .str.replace("\r", "\\r", regex=False))
+
+
+def literal(values, datatype=None):
+    quoted = '"' + values + '"'
+    return quoted + "^^" + iri("xsd", datatype) if datatype else quoted
+
+
+def format_dates(timestamps):
+    """Unix timestamps -> ISO 8601 XSD DateTime strings, for a whole column at once."""
+    seconds = pd.to_numeric(timestamps, errors="coerce")
+    valid = seconds.notna()
+    out = pd.Series("", index=timestamps.index, dtype=object)
+    stamps = seconds[valid].to_numpy(dtype="int64").astype("datetime64[s]")
+    out[valid] = np.char.add(np.datetime_as_string(stamps, unit="s").astype(str), "Z")
+    return out
+
+
+def write_triples(f, s, p, o):
+    """Writes one triple per row; s / o are Series (or constants), p a predicate term."""
+    if isinstance(o, pd.Series) and o.empty or isinstance(s, pd.Series) and s.empty:
+        return
+    lines = s + " " + p + " " + o + " .\n"
+    f.stats.add_columns(s, p, o)
+    f.write("".join(lines.tolist()) if isinstance(lines, pd.Series) else lines)
+
+
+def output_name(name, compress=False):
+    return name + (".nt" if OUTPUT_FORMAT == "nt" else ".ttl") + (".gz" if compress else "")
+
+
+def open_output(name, compress=False):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, output_name(name, compress))
+    if compress:
+        f = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    else:
+        f = open(path, "w", encoding="utf-8")
+    # Counts what is written, for the VoID statistics (path + ".stats.json")
+    f = StatsOutput(f, path, None if OUTPUT_FORMAT == "nt" else NAMESPACES)
+    if OUTPUT_FORMAT != "nt":
+        f.write(PREFIXES + "\n")
+    return f
+
 
+def rdf_type():
+    return iri("rdf", "type")
 
-def format_date(timestamp):
-    """Converts Unix timestamp to ISO 8601 XSD DateTime."""
-    try:
-        dt = datetime.datetime.fromtimestamp(int(timestamp), tz=datetime.timezone.utc)
-        return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-    except:
-        return ""
 
+def movie_nodes(movie_ids):
+    return iri("imdb", movie_ids.map(MOVIE_ID_TO_IMDB))
 
-def write_header(f):
-    f.write(PREFIXES + "\n")
+
+def write_users(f, user_ids):
+    user_node = iri("davi-mov", "user_" + user_ids)
+    write_triples(f, user_node, rdf_type(), iri("schema", "Person"))
+    write_triples(f, user_node, iri("rdfs", "label"), literal("User " + user_ids))
+
+
+def _new_users(user_ids, seen):
+    """Users of `user_ids` not in the boolean `seen` array (grown as needed), marking them as seen."""
+    ids = pd.unique(np.asarray(user_ids, dtype="int64"))
+    if len(ids) and ids.max() >= len(seen):
+        seen = np.concatenate([seen, np.zeros(ids.max() + 1 - len(seen), dtype=bool)])
+    new = ids[~seen[ids]]
+    seen[new] = True
+    return pd.Series(new.astype(str)), seen
+
+
+# ================= STAGED INPUTS =================
+def _mapped_lookup(size):
+    """Boolean array telling, per internal movie id, whether the movie is mapped to IMDB."""
+    ids = np.fromiter((int(m) for m in MOVIE_ID_TO_IMDB), dtype="int64", count=len(MOVIE_ID_TO_IMDB))
+    lookup = np.zeros(max(size, int(ids.max()) + 1 if len(ids) else 0), dtype=bool)
+    lookup[ids] = True
+    return lookup
+
+
+def _mapped_mask(movie_ids):
+    movie_ids = np.asarray(movie_ids)
+    if not len(movie_ids):
+        return np.zeros(0, dtype=bool)
+    return _mapped_lookup(int(movie_ids.max()) + 1)[movie_ids]
+
+
+def _strings(table, rows):
+    """String DataFrame of the staged `rows` of a table; only these rows get converted."""
+    return pd.DataFrame({
+        column: values.take(rows) if isinstance(values, TextColumn) else pd.Series(values[rows]).astype(str)
+        for column, values in table.items()
+    })
+
+
+# ================= STEP 0: STAGING =================
+def stage_inputs():
+    print("Step 0: Staging CSV inputs (only the ones that changed)...")
+    stage_movielens(INPUT_DIR, STAGING_DIR)
 
 
 # ================= STEP 1: MAPPING IDs =================
@@ -61,225 +176,307 @@ def setup_movie_mapping():
     print("Step 1: Finding top movies and mapping IDs...")
 
     # 1. Count ratings to find top movies
-    counts = pd.Series(dtype=int)
-    chunk_size = 1000000
-    reader = pd.read_csv(f"{INPUT_DIR}/ratings.csv", usecols=['movieId'], chunksize=chunk_size)
+    counts = np.bincount(load_table(STAGING_DIR, "ratings")["movieId"])
+    order = np.argsort(-counts, kind="stable")[:TOP_N_MOVIES]
+    top_ids = order[counts[order] > 0]
 
-    for chunk in reader:
-        counts = counts.add(chunk['movieId'].value_counts(), fill_value=0)
+    # 2. Map internal ID to IMDB ID using links.csv
+    links = load_table(STAGING_DIR, "links")
+    link_movies = np.asarray(links["movieId"])
+    imdb_ids = links["imdbId"].take(np.arange(len(link_movies)))
+    keep = np.isin(link_movies, top_ids) & (imdb_ids != "").to_numpy()
 
-    top_ids = set(counts.sort_values(ascending=False).head(TOP_N_MOVIES).index.astype(str))
+    # Pad with zeros to ensure 7 digits (e.g., "114709" -> "0114709")
+    MOVIE_ID_TO_IMDB.clear()
+    MOVIE_ID_TO_IMDB.update(zip(link_movies[keep].astype(str), imdb_ids[keep].str.zfill(7)))
 
-    # 2. Map internal ID to IMDB ID using links.csv
-    links_df = pd.read_csv(f"{INPUT_DIR}/links.csv", dtype=str)
-    mapped_count = 0
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(OUTPUT_DIR, MAPPING_FILE), "w", encoding="utf-8") as fh:
+        json.dump(MOVIE_ID_TO_IMDB, fh)
 
-    for _, row in links_df.iterrows():
-        m_id = row['movieId']
-        imdb_raw = row['imdbId']
+    print(f"   Mapped {len(MOVIE_ID_TO_IMDB)} movies to valid IMDB IDs.")
 
-        if m_id in top_ids and pd.notna(imdb_raw):
-            # Pad with zeros to ensure 7 digits (e.g., "114709" -> "0114709")
-            imdb_clean = str(imdb_raw).zfill(7)
-            MOVIE_ID_TO_IMDB[m_id] = imdb_clean
-            mapped_count += 1
 
-    print(f"   Mapped {mapped_count} movies to valid IMDB IDs.")
+def ensure_movie_mapping():
+    """Loads the mapping written by step 1 when this process did not compute it itself."""
+    if MOVIE_ID_TO_IMDB:
+        return
+    path = os.path.join(OUTPUT_DIR, MAPPING_FILE)
+    if not os.path.exists(path):
+        raise RuntimeError(f"No movie mapping at {path}, run setup_movie_mapping() first")
+    with open(path, encoding="utf-8") as fh:
+        MOVIE_ID_TO_IMDB.update(json.load(fh))
 
 
 # ================= STEP 2: MOVIES =================
 def process_movies():
     print("Step 2: Processing Movies (with Year Extraction)...")
-    movies_df = pd.read_csv(f"{INPUT_DIR}/movies.csv", dtype=str)
-
-    with open(f"{OUTPUT_DIR}/movies.ttl", "w", encoding="utf-8") as f:
-        write_header(f)
-
-        for _, row in movies_df.iterrows():
-            m_id = row['movieId']
-            if m_id not in MOVIE_ID_TO_IMDB: continue
-
-            # CURIE: imdb:0114709
-            imdb_suffix = MOVIE_ID_TO_IMDB[m_id]
-            movie_node = f"imdb:{imdb_suffix}"
-
-            title_raw = row['title']
-            title = clean_text(title_raw)
-
-            # --- NEW: Extract Year from Title ---
-            # Looks for (1995) at the end of the string
-            match = re.search(r'\((\d{4})\)', title_raw)
-            date_ttl = ""
-            if match:
-                year = match.group(1)
-                # Create a valid xsd:date (e.g., "1995-01-01")
-                date_ttl = f'    schema:datePublished "{year}-01-01"^^xsd:date ;'
-
-            # Process Genres into CURIE (e.g., genre:comedy)
-            genre_uris = []
-            if pd.notna(row['genres']):
-                for g in row['genres'].split('|'):
-                    slug = GENRE_MAP.get(g)
-                    if slug:
-                        genre_uris.append(f"genre:{slug}")
-
-            genre_ttl = f"    schema:genre {', '.join(genre_uris)} ;" if genre_uris else ""
-
-            f.write(f"""
-{movie_node} a schema:Movie ;
-    schema:name "{title}" ;
-    dcterms:identifier "{m_id}" ;
-{date_ttl}
-{genre_ttl}
-    .
-""")
+    ensure_movie_mapping()
+    movies = load_table(STAGING_DIR, "movies")
+    movies_df = _strings(movies, np.flatnonzero(_mapped_mask(movies["movieId"])))
 
+    with open_output("movies") as f:
+        movie_node = movie_nodes(movies_df['movieId'])
 
-# ================= STEP 3: RATINGS =================
-def process_ratings():
-    print(f"Step 3: Processing Ratings (Max {MAX_RATINGS_PER_MOVIE} per movie)...")
+        write_triples(f, movie_node, rdf_type(), iri("schema", "Movie"))
+        write_triples(f, movie_node, iri("schema", "name"), literal(clean_text(movies_df['title'])))
+        write_triples(f, movie_node, iri("dcterms", "identifier"), literal(movies_df['movieId']))
+
+        # Year from a "(1995)" in the title, as a valid xsd:date (e.g., "1995-01-01")
+        years = movies_df['title'].str.extract(r'\((\d{4})\)', expand=False)
+        dated = years.notna()
+        write_triples(f, movie_node[dated], iri("schema", "datePublished"),
+                      literal(years[dated] + "-01-01", "date"))
+
+        # Genres as IMDB search IRIs (e.g., genre:comedy)
+        genres = movies_df['genres'].str.split('|').explode().map(GENRE_MAP).dropna()
+        write_triples(f, movie_node.loc[genres.index], iri("schema", "genre"), iri("genre", genres))
+
+
+# ================= SHARDING =================
+def shard_of(movie_ids, shards):
+    """Shard of each movie id (multiplicative hash, so neighbouring ids spread out)."""
+    hashed = (np.asarray(movie_ids, dtype=np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)
+    return (hashed % np.uint64(shards)).astype("int64")
+
+
+def _shard_settings():
+    return {
+        "OUTPUT_FORMAT": "nt", "OUTPUT_DIR": OUTPUT_DIR, "STAGING_DIR": STAGING_DIR, "CHUNK_SIZE": CHUNK_SIZE,
+        "MAX_RATINGS_PER_MOVIE": MAX_RATINGS_PER_MOVIE, "GENOME_THRESHOLD": GENOME_THRESHOLD,
+        "MOVIE_ID_TO_IMDB": dict(MOVIE_ID_TO_IMDB),
+    }
+
+
+def _apply_shard_settings(settings):
+    # Workers may be spawned, i.e. start from the module defaults
+    mapping = settings.pop("MOVIE_ID_TO_IMDB")
+    globals().update(settings)
+    MOVIE_ID_TO_IMDB.clear()
+    MOVIE_ID_TO_IMDB.update(mapping)
+
+
+def _shard_worker(kind, shard, shards, settings):
+    _apply_shard_settings(settings)
+    name = f"{kind}_{shard:04d}"
+
+    with open_output(name, COMPRESS_SHARDS) as f:
+        if kind == "ratings":
+            rows, users = _write_ratings(f, shard=shard, shards=shards, define_users=False)
+        else:
+            rows, users = _write_genome(f, shard=shard, shards=shards), None
+
+    return {"file": output_name(name, COMPRESS_SHARDS), "kind": kind, "rows": rows}, users
+
+
+def _users_worker(user_ids, settings):
+    _apply_shard_settings(settings)
+    with open_output("users", COMPRESS_SHARDS) as f:
+        write_users(f, pd.Series(user_ids.astype(str)))
+    return {"file": output_name("users", COMPRESS_SHARDS), "kind": "ratings", "rows": len(user_ids)}
 
-    ratings_per_movie_count = defaultdict(int)
-    # Track users we have already defined in this file to avoid duplicates
-    seen_users = set()
 
-    reader = pd.read_csv(f"{INPUT_DIR}/ratings.csv", chunksize=500000, dtype=str)
-    with open(f"{OUTPUT_DIR}/ratings.ttl", "w", encoding="utf-8") as f:
-        write_header(f)
-        total_written = 0
+def manifest_name(kind):
+    # One manifest per kind: the ratings and genome steps may run at the same time
+    return f"{kind}_manifest.json"
 
-        for chunk in reader:
-            buffer = []
 
-            for _, row in chunk.iterrows():
-                m_id = row['movieId']
+def _write_manifest(kind, entries):
+    path = os.path.join(OUTPUT_DIR, manifest_name(kind))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump({"format": "nt", "kind": kind, "shards": entries}, fh, indent=2)
+    os.replace(tmp_path, path)
 
-                if m_id not in MOVIE_ID_TO_IMDB:
-                    continue
 
-                if ratings_per_movie_count[m_id] >= MAX_RATINGS_PER_MOVIE:
-                    continue
+def _clear_outputs(kind):
+    """
+    Removes every earlier output of `kind`, sharded or not, with its statistics and manifest,
+    so a run with fewer shards or another layout leaves nothing stale behind for the loader.
+    """
+    names = [kind, "users"] if kind == "ratings" else [kind]
+    pattern = re.compile(rf"^(?:{'|'.join(names)})(?:_\d{{4}})?\.(?:nt|ttl)(?:\.gz)?(?:\.stats\.json)?$")
+    if os.path.isdir(OUTPUT_DIR):
+        for name in os.listdir(OUTPUT_DIR):
+            if pattern.match(name) or name == manifest_name(kind):
+                os.remove(os.path.join(OUTPUT_DIR, name))
 
-                ratings_per_movie_count[m_id] += 1
-                total_written += 1
 
-                imdb_suffix = MOVIE_ID_TO_IMDB[m_id]
-                u_id = row['userId']
-                rating = row['rating']
-                ts = format_date(row['timestamp'])
+def _run_sharded(kind):
+    """Writes `kind` as SHARDS N-Triples shards on a process pool; ratings also get one users shard."""
+    settings = _shard_settings()
+    context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
 
-                rating_node = f"davi-mov:rating_{u_id}_{m_id}"
-                user_node = f"davi-mov:user_{u_id}"
-                movie_node = f"imdb:{imdb_suffix}"
+    with ProcessPoolExecutor(max_workers=min(SHARD_WORKERS, SHARDS), mp_context=context) as pool:
+        futures = [pool.submit(_shard_worker, kind, shard, SHARDS, dict(settings)) for shard in range(SHARDS)]
+        results = [future.result() for future in futures]
+        entries = [entry for entry, _ in results]
 
-                user_def = ""
-                if u_id not in seen_users:
-                    # We define the user instance explicitly as a Person
-                    user_def = f'{user_node} a schema:Person ; rdfs:label "User {u_id}" .\n'
-                    seen_users.add(u_id)
+        if kind == "ratings":
+            # Every user once, no matter how many shards rated with it
+            seen = [users for _, users in results if len(users)]
+            user_ids = np.unique(np.concatenate(seen)) if seen else np.zeros(0, dtype="int64")
+            entries.append(pool.submit(_users_worker, user_ids, dict(settings)).result())
 
-                buffer.append(f"""
-{user_def}{rating_node} a schema:Rating ;
-    schema:author {user_node} ;
-    schema:itemReviewed {movie_node} ;
-    schema:ratingValue {rating} ;
-    schema:datePublished "{ts}"^^xsd:dateTime .
-""")
+    _write_manifest(kind, entries)
+    print(f"   Wrote {len(entries)} {kind} shards ({sum(e['rows'] for e in entries)} rows)")
 
-            if buffer:
-                f.write("".join(buffer))
 
+# ================= STEP 3: RATINGS =================
+def _shard_lookup(mapped, shard, shards):
+    if shards:
+        mapped = mapped & (shard_of(np.arange(len(mapped)), shards) == shard)
+    return mapped
+
+
+def _write_ratings(f, shard=0, shards=0, define_users=True):
+    """
+    Writes the capped ratings of the mapped movies (of one shard, if sharded).
+    Returns (ratings written, ids of the users that rated).
+    """
+    ratings = load_table(STAGING_DIR, "ratings")
+    all_movies = ratings["movieId"]
+    mapped = _mapped_lookup(int(all_movies.max()) + 1 if len(all_movies) else 0)
+    mapped = _shard_lookup(mapped, shard, shards)
+
+    # Ratings kept so far per movie, carried across chunks
+    ratings_per_movie_count = np.zeros(len(mapped), dtype="int64")
+    # Users already defined in this file, indexed by user id
+    seen_users = np.zeros(0, dtype=bool)
+    total_written = 0
+
+    for start in range(0, len(all_movies), CHUNK_SIZE):
+        rows = np.flatnonzero(mapped[all_movies[start:start + CHUNK_SIZE]]) + start
+        movie_ids = np.asarray(all_movies[rows])
+
+        # Position of each rating within its movie, in file order
+        rank = (pd.Series(movie_ids).groupby(movie_ids, sort=False).cumcount().to_numpy()
+                + ratings_per_movie_count[movie_ids])
+        ratings_per_movie_count += np.bincount(movie_ids, minlength=len(ratings_per_movie_count))
+
+        rows = rows[rank < MAX_RATINGS_PER_MOVIE]
+        if not len(rows):
+            continue
+        chunk = _strings(ratings, rows)
+
+        # We define the user instance explicitly as a Person, once
+        new_users, seen_users = _new_users(ratings['userId'][rows], seen_users)
+        if define_users:
+            write_users(f, new_users)
+
+        rating_node = iri("davi-mov", "rating_" + chunk['userId'] + "_" + chunk['movieId'])
+        write_triples(f, rating_node, rdf_type(), iri("schema", "Rating"))
+        write_triples(f, rating_node, iri("schema", "author"), iri("davi-mov", "user_" + chunk['userId']))
+        write_triples(f, rating_node, iri("schema", "itemReviewed"), movie_nodes(chunk['movieId']))
+        write_triples(f, rating_node, iri("schema", "ratingValue"), literal(chunk['rating'], "decimal"))
+
+        dates = format_dates(chunk['timestamp'])
+        dated = dates != ""
+        write_triples(f, rating_node[dated], iri("schema", "datePublished"),
+                      literal(dates[dated], "dateTime"))
+
+        total_written += len(chunk)
+        if not shards:
             print(f"   Processed chunk... Total ratings written: {total_written}")
 
-    print(f"Step 3 Complete. Total Ratings: {total_written}")
+    return total_written, np.flatnonzero(seen_users)
 
 
-# ================= STEP 4: GENOME SCORES =================
-def process_genome():
-    print("Step 4: Processing Genome Scores (Relevance > 0.5)...")
-    reader = pd.read_csv(f"{INPUT_DIR}/genome-scores.csv", chunksize=500000, dtype=str)
+def process_ratings():
+    print(f"Step 3: Processing Ratings (Max {MAX_RATINGS_PER_MOVIE} per movie)...")
+    ensure_movie_mapping()
+    _clear_outputs("ratings")
+
+    if SHARDS:
+        _run_sharded("ratings")
+        return
 
-    with open(f"{OUTPUT_DIR}/genome_scores.ttl", "w", encoding="utf-8") as f:
-        write_header(f)
+    with open_output("ratings") as f:
+        total_written, _ = _write_ratings(f)
+
+    print(f"Step 3 Complete. Total Ratings: {total_written}")
 
-        for chunk in reader:
-            chunk['relevance'] = pd.to_numeric(chunk['relevance'])
-            chunk = chunk[chunk['relevance'] > GENOME_THRESHOLD]
 
-            if chunk.empty: continue
+# ================= STEP 4: GENOME SCORES =================
+def _write_genome(f, shard=0, shards=0):
+    """Writes the relevant genome scores of the mapped movies (of one shard, if sharded)."""
+    scores = load_table(STAGING_DIR, "genome_scores")
+    all_movies = scores["movieId"]
+    mapped = _mapped_lookup(int(all_movies.max()) + 1 if len(all_movies) else 0)
+    mapped = _shard_lookup(mapped, shard, shards)
+    written = 0
+
+    for start in range(0, len(all_movies), CHUNK_SIZE):
+        end = start + CHUNK_SIZE
+        keep = (scores['relevance'][start:end] > GENOME_THRESHOLD) & mapped[all_movies[start:end]]
+        rows = np.flatnonzero(keep) + start
+
+        if not len(rows): continue
+        chunk = _strings(scores, rows)
+
+        relevance_node = iri("davi-mov", "relevance_" + chunk['movieId'] + "_" + chunk['tagId'])
+        write_triples(f, relevance_node, rdf_type(), iri("davi-mov", "GenomeRelevance"))
+        write_triples(f, relevance_node, iri("davi-mov", "isRelevantTo"), movie_nodes(chunk['movieId']))
+        write_triples(f, relevance_node, iri("davi-mov", "hasGenomeTag"),
+                      iri("davi-mov", "genometag_" + chunk['tagId']))
+        write_triples(f, relevance_node, iri("davi-mov", "relevanceScore"),
+                      literal(chunk['relevance'], "decimal"))
+        written += len(chunk)
+
+    return written
 
-            buffer = []
-            for _, row in chunk.iterrows():
-                m_id = row['movieId']
-                if m_id not in MOVIE_ID_TO_IMDB: continue
 
-                imdb_suffix = MOVIE_ID_TO_IMDB[m_id]
-                t_id = row['tagId']
-                score = row['relevance']
+def process_genome():
+    print(f"Step 4: Processing Genome Scores (Relevance > {GENOME_THRESHOLD})...")
+    ensure_movie_mapping()
+    _clear_outputs("genome_scores")
 
-                relevance_node = f"davi-mov:relevance_{m_id}_{t_id}"
-                movie_node = f"imdb:{imdb_suffix}"
-                tag_node = f"davi-mov:genometag_{t_id}"
+    if SHARDS:
+        _run_sharded("genome_scores")
+        return
 
-                buffer.append(f"""
-{relevance_node} a davi-mov:GenomeRelevance ;
-    davi-mov:isRelevantTo {movie_node} ;
-    davi-mov:hasGenomeTag {tag_node} ;
-    davi-mov:relevanceScore {score} .
-""")
-            f.write("".join(buffer))
+    with open_output("genome_scores") as f:
+        _write_genome(f)
 
 
 # ================= STEP 5: TAG METADATA =================
 def process_tags_metadata():
     print("Step 5: Processing Tag Definitions and User Tags...")
+    ensure_movie_mapping()
 
-    df_defs = pd.read_csv(f"{INPUT_DIR}/genome-tags.csv", dtype=str)
-    with open(f"{OUTPUT_DIR}/genome_defs.ttl", "w", encoding="utf-8") as f:
-        write_header(f)
-        for _, row in df_defs.iterrows():
-            t_id = row['tagId']
-            t_name = clean_text(row['tag'])
-            f.write(f'davi-mov:genometag_{t_id} a davi-mov:GenomeTag ; rdfs:label "{t_name}" .\n')
+    genome_tags = load_table(STAGING_DIR, "genome_tags")
+    df_defs = _strings(genome_tags, np.arange(len(genome_tags["tagId"])))
+    with open_output("genome_defs") as f:
+        tag_node = iri("davi-mov", "genometag_" + df_defs['tagId'])
+        write_triples(f, tag_node, rdf_type(), iri("davi-mov", "GenomeTag"))
+        write_triples(f, tag_node, iri("rdfs", "label"), literal(clean_text(df_defs['tag'])))
 
     # User Tags (Free text)
-    df_user_tags = pd.read_csv(f"{INPUT_DIR}/tags.csv", dtype=str)
-    seen_users = set()
-
-    with open(f"{OUTPUT_DIR}/user_tags.ttl", "w", encoding="utf-8") as f:
-        write_header(f)
-        for _, row in df_user_tags.iterrows():
-            m_id = row['movieId']
-            if m_id not in MOVIE_ID_TO_IMDB: continue
-
-            imdb_suffix = MOVIE_ID_TO_IMDB[m_id]
-            u_id = row['userId']
-            ts_raw = row['timestamp']
-            ts = format_date(ts_raw)
-            content = clean_text(row['tag'])
-
-            tag_app_node = f"davi-mov:tagapp_{u_id}_{m_id}_{ts_raw}"
-            movie_node = f"imdb:{imdb_suffix}"
-            user_node = f"davi-mov:user_{u_id}"
-
-            user_def = ""
-            if u_id not in seen_users:
-                user_def = f'{user_node} a schema:Person ; rdfs:label "User {u_id}" .\n'
-                seen_users.add(u_id)
-
-            f.write(f"""
-{user_def}{tag_app_node} a davi-mov:TagApplication ;
-    davi-mov:taggedBy {user_node} ;
-    davi-mov:tagsMovie {movie_node} ;
-    davi-mov:tagContent "{content}" ;
-    schema:startTime "{ts}"^^xsd:dateTime .
-""")
+    tags = load_table(STAGING_DIR, "tags")
+    rows = np.flatnonzero(_mapped_mask(tags["movieId"]))
+    df_user_tags = _strings(tags, rows)
+
+    with open_output("user_tags") as f:
+        new_users, _ = _new_users(tags['userId'][rows], np.zeros(0, dtype=bool))
+        write_users(f, new_users)
+
+        tag_app_node = iri("davi-mov", "tagapp_" + df_user_tags['userId'] + "_" + df_user_tags['movieId']
+                           + "_" + df_user_tags['timestamp'])
+        write_triples(f, tag_app_node, rdf_type(), iri("davi-mov", "TagApplication"))
+        write_triples(f, tag_app_node, iri("davi-mov", "taggedBy"), iri("davi-mov", "user_" + df_user_tags['userId']))
+        write_triples(f, tag_app_node, iri("davi-mov", "tagsMovie"), movie_nodes(df_user_tags['movieId']))
+        write_triples(f, tag_app_node, iri("davi-mov", "tagContent"), literal(clean_text(df_user_tags['tag'])))
+
+        dates = format_dates(df_user_tags['timestamp'])
+        dated = dates != ""
+        write_triples(f, tag_app_node[dated], iri("schema", "startTime"), literal(dates[dated], "dateTime"))
 
 
 if __name__ == "__main__":
+    stage_inputs()
     setup_movie_mapping()
     process_movies()
     process_tags_metadata()
     process_genome()
     process_ratings()
-    print("\nConversion Complete! Output is in 'output_ttl_final/'")
+    print(f"\nConversion Complete! Output is in '{OUTPUT_DIR}'")
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE cpe_map (
+    criteria TEXT PRIMARY KEY,
+    cpe_id TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class CpeMapWriter:
+    """
+    Streams `criteria -> cpeNameId` pairs into an indexed SQLite file while the CPE feed is parsed.
+    Supports the `cpe_map[criteria] = cpe_id` assignments of a dict; the file only
+    replaces `path` once closed.
+    """
+
+    def __init__(self, path, flush_every=50000):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+        self._conn = sqlite3.connect(self._tmp_path)
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(SCHEMA)
+        self._pending = []
+        self._flush_every = flush_every
+        self._count = None
+
+    def __setitem__(self, criteria, cpe_id):
+        self._pending.append((criteria, cpe_id))
+        if len(self._pending) >= self._flush_every:
+            self._flush()
+
+    def _flush(self):
+        # Later entries win, like repeated dict assignments
+        self._conn.executemany("INSERT OR REPLACE INTO cpe_map VALUES (?, ?)", self._pending)
+        self._pending = []
+
+    def __len__(self):
+        if self._count is not None:
+            return self._count
+        self._flush()
+        return self._conn.execute("SELECT COUNT(*) FROM cpe_map").fetchone()[0]
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._count = len(self)
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CpeMap:
+    """
+    Read-only view over a file written by CpeMapWriter, used like the old `cpe_map` dict.
+    Lookups hit the primary-key index of a memory-mapped SQLite file instead of RAM.
+    Can be handed to pool workers: each process opens its own connection on first use.
+    """
+
+    def __init__(self, path, mmap_size=1 << 30):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True)
+            self._conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, criteria, default=None):
+        if not criteria:
+            return default
+        row = self._connection().execute(
+            "SELECT cpe_id FROM cpe_map WHERE criteria = ?", (criteria,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM cpe_map").fetchone()[0]
+
+    def __getstate__(self):
+        return {"path": self.path, "mmap_size": self.mmap_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["mmap_size"])
@@ -1,13 +1,16 @@
 import os
 import json
-import shutil
 import logging
 from urllib.parse import quote
 
-import py7zr
 from rdflib import Graph, Literal, RDF, Namespace, URIRef
 from rdflib.namespace import RDFS, DCTERMS
 
+import paths
+from cpe_map import CpeMapWriter
+from archive_reader import iter_members, list_feeds
+from rdf_writer import open_writer
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("cpe-to-rdf")
 
@@ -54,11 +57,14 @@ def init_graph():
     return g
 
 
-def flush_batch(graph, batch_idx, output_dir):
-    path = os.path.join(output_dir, f"cpe_batch_{batch_idx:04d}.ttl")
-    log.info("Writing batch %d → %s (%d triples)",
-             batch_idx, path, len(graph))
-    graph.serialize(path, format="turtle")
+def open_batch(batch_idx, output_dir, fmt):
+    return open_writer(os.path.join(output_dir, f"cpe_batch_{batch_idx:04d}"), fmt, init_graph)
+
+
+def flush_batch(writer, batch_idx):
+    writer.close()
+    log.info("Wrote batch %d → %s (%d triples)",
+             batch_idx, writer.path, len(writer))
 
 
 def map_cpe_to_rdf(data, part, g, cpe_map):
@@ -108,76 +114,58 @@ def map_cpe_to_rdf(data, part, g, cpe_map):
             break
 
 
-def process_cpe_json_folders(root_folder, output_dir, batch_size=30000):
+def process_cpe_json_folders(root_folder, output_dir, batch_size=30000, fmt="nt"):
     os.makedirs(output_dir, exist_ok=True)
-    temp_dir = "_tmp_extract_cpe"
-    os.makedirs(temp_dir, exist_ok=True)
 
-    # mapping: canonical_criteria_string -> cpeNameId (UUID)
-    cpe_map = {}
+    # mapping: canonical_criteria_string -> cpeNameId (UUID), indexed on disk
+    map_path = os.path.join(output_dir, "cpe_map.sqlite")
+    cpe_map = CpeMapWriter(map_path)
 
-    g = init_graph()
     batch_idx = 0
+    g = open_batch(batch_idx, output_dir, fmt)
     item_count = 0
 
-    for part in ("a", "h", "o"):
-        part_dir = os.path.join(root_folder, part)
-        if not os.path.isdir(part_dir):
-            continue
-
-        log.info("Processing CPE category: %s", part)
-
-        for fname in sorted(os.listdir(part_dir)):
-            if not fname.endswith(".7z"):
-                continue
-
-            archive_path = os.path.join(part_dir, fname)
-            try:
-                with py7zr.SevenZipFile(archive_path, "r") as z:
-                    z.extractall(temp_dir)
-            except Exception as e:
-                log.error(f"Failed to extract {archive_path}: {e}")
+    try:
+        for part in ("a", "h", "o"):
+            part_dir = os.path.join(root_folder, part)
+            if not os.path.isdir(part_dir):
                 continue
 
-            for root, _, files in os.walk(temp_dir):
-                for f in files:
-                    if not f.endswith(".json"):
-                        continue
-
-                    try:
-                        with open(os.path.join(root, f), encoding="utf-8") as fh:
-                            data = json.load(fh)
-                            map_cpe_to_rdf(data, part, g, cpe_map)  
-                    except Exception as e:
-                        log.warning(f"Error parsing JSON {f}: {e}")
-                        continue
-
-                    item_count += 1
-                    if item_count % batch_size == 0:
-                        flush_batch(g, batch_idx, output_dir)
-                        batch_idx += 1
-                        g = init_graph()
-
-            shutil.rmtree(temp_dir)
-            os.makedirs(temp_dir, exist_ok=True)
-
-    map_path = os.path.join(output_dir, "cpe_map.json")
-    with open(map_path, "w", encoding="utf-8") as mf:
-        json.dump(cpe_map, mf, ensure_ascii=False, indent=2)
-
+            log.info("Processing CPE category: %s", part)
+
+            for fname in list_feeds(part_dir):
+                archive_path = os.path.join(part_dir, fname)
+                try:
+                    for f, raw in iter_members(archive_path):
+                        try:
+                            map_cpe_to_rdf(json.loads(raw), part, g, cpe_map)
+                        except Exception as e:
+                            log.warning(f"Error parsing JSON {f}: {e}")
+                            continue
+
+                        item_count += 1
+                        if item_count % batch_size == 0:
+                            flush_batch(g, batch_idx)
+                            batch_idx += 1
+                            g = open_batch(batch_idx, output_dir, fmt)
+                except Exception as e:
+                    log.error(f"Failed to read {archive_path}: {e}")
+                    continue
+    except BaseException:
+        # Never leave the half-written batch next to the complete ones
+        g.discard()
+        raise
+
+    cpe_map.close()
     log.info("Wrote CPE mapping → %s (%d entries)", map_path, len(cpe_map))
 
     if len(g):
-        flush_batch(g, batch_idx, output_dir)
-
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
+        flush_batch(g, batch_idx)
+    else:
+        g.discard()
 
     log.info("All CPE batches generated")
 
 
 if __name__ == "__main__":
-    process_cpe_json_folders(
-        "D:/Master/Anul2Sem1/WADE/Project/davi/data/NIST_NVD/CPE",
-        "D:/Master/Anul2Sem1/WADE/Project/davi/data/results/cpe_rdf_batches"
-    )
+    process_cpe_json_folders(paths.CPE_INPUT_DIR, paths.CPE_OUTPUT_DIR)
@@ -1,14 +1,22 @@
 import os
 import json
 import re
-import shutil
+import hashlib
 import logging
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from urllib.parse import quote
 
-import py7zr
 from rdflib import Graph, Literal, RDF, URIRef, Namespace
 from rdflib.namespace import XSD, DCTERMS
 
+import paths
+from cpe_map import CpeMap
+from archive_reader import iter_json_documents, list_feeds
+from rdf_writer import open_writer, SparqlDeltaWriter
+from watermarks import WatermarkStore
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("cve-to-rdf")
 
@@ -20,7 +28,9 @@ CVSS_STD = Namespace("https://www.first.org/cvss/")
 DAVI_NIST = Namespace("https://purl.org/davi/vocab/nist#")
 SCHEMA = Namespace("http://schema.org/")
 
-CPE_MAP_PATH = "D:/Master/Anul2Sem1/WADE/Project/davi/data/results/cpe_map.json"
+CPE_MAP_PATH = paths.CPE_MAP_PATH
+# Where bulk_loader puts the CVE shards, so incremental deltas update the same triples
+CVE_GRAPH = paths.GRAPH_BASE + "cve"
 
 
 def safe_uri(namespace, value):
@@ -154,60 +164,270 @@ def parse_cvss_metrics(metrics, cve_uri, g):
             )
 
 
-def process_all_cves(input_dir, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    temp_dir = "_tmp_extract_cve"
-    os.makedirs(temp_dir, exist_ok=True)
+# Set once per process: in the parent before forking, or by the pool initializer
+# where workers are spawned. A CpeMap is an on-disk index every worker opens itself.
+_cpe_map = {}
+
 
+def load_cpe_map(path=None):
+    path = path or CPE_MAP_PATH
     try:
-        with open(CPE_MAP_PATH, "r", encoding="utf-8") as mf:
-            cpe_map = json.load(mf)
-        log.info("Loaded CPE mapping (%d entries) from %s", len(cpe_map), CPE_MAP_PATH)
+        if path.endswith(".json"):
+            # Maps written before the indexed format
+            with open(path, "r", encoding="utf-8") as mf:
+                cpe_map = json.load(mf)
+        else:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            cpe_map = CpeMap(path)
+        log.info("Loaded CPE mapping (%d entries) from %s", len(cpe_map), path)
+        return cpe_map
     except Exception as e:
         log.error("Could not load CPE map: %s", e)
-        cpe_map = {}
+        return {}
 
-    batch_idx = 0
 
-    for fname in sorted(os.listdir(input_dir))[:10]:
-        if not fname.endswith(".7z"):
-            continue
+def _init_worker(cpe_map=None):
+    global _cpe_map
+    if cpe_map is not None:
+        _cpe_map = cpe_map
 
-        archive = os.path.join(input_dir, fname)
-        log.info("Processing %s", fname)
 
-        g = init_graph()
+def process_archive(archive, out_base, fmt="nt"):
+    """Converts one NVD feed (archive, file or directory) into an RDF shard. Runs inside a pool worker."""
+    started = time.perf_counter()
+    cves = 0
 
-        try:
-            with py7zr.SevenZipFile(archive, "r") as z:
-                z.extractall(temp_dir)
+    with open_writer(out_base, fmt, init_graph) as g:
+        for _, data in iter_json_documents(archive):
+            parse_cve_json(data, g, _cpe_map)
+            cves += 1
 
-            for root, _, files in os.walk(temp_dir):
-                for f in files:
-                    if f.endswith(".json"):
-                        with open(os.path.join(root, f), encoding="utf-8") as fh:
-                            parse_cve_json(json.load(fh), g, cpe_map)
+    return {
+        "archive": os.path.basename(archive),
+        "shard": g.path,
+        "cves": cves,
+        "triples": len(g),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def scan_archive(archive, state_path):
+    """
+    First incremental pass: (id, lastModified, digest, changed) of every CVE of the feed that
+    is newer than its watermark in `state_path`. `changed` is False when only lastModified
+    moved and the record itself is identical: only its schema:dateModified needs updating.
+    Runs inside a pool worker.
+    """
+    started = time.perf_counter()
+    store = WatermarkStore(state_path, readonly=True)
+    candidates = []
+    seen = 0
 
-        except Exception as e:
-            log.error(f"Error processing {fname}: {e}")
-        finally:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            os.makedirs(temp_dir, exist_ok=True)
+    try:
+        for _, data in iter_json_documents(archive):
+            cve_id = data.get("id")
+            if not cve_id:
+                continue
+            seen += 1
 
-        out = os.path.join(output_dir, f"cve_batch_{batch_idx:04d}.ttl")
-        log.info("Writing %s (%d triples)", out, len(g))
-        g.serialize(out, format="turtle")
+            last_modified = data.get("lastModified")
+            previous = store.get(cve_id)
+            if previous and last_modified and previous[0] and last_modified <= previous[0]:
+                continue
 
-        batch_idx += 1
+            # The record without lastModified: a bump alone is not a change
+            record = {k: v for k, v in data.items() if k != "lastModified"}
+            digest = hashlib.sha1(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+            changed = not previous or previous[1] != digest
+            candidates.append((cve_id, last_modified, digest, changed))
+    finally:
+        store.close()
+
+    return {
+        "archive": os.path.basename(archive),
+        "cves": seen,
+        "newer": len(candidates),
+        "triples": 0,
+        "seconds": round(time.perf_counter() - started, 2),
+        "candidates": candidates,
+    }
+
+
+def diff_archive(archive, out_path, cve_ids, graph=None, bumped=()):
+    """
+    Second incremental pass: writes a SPARQL Update delta replacing the CVEs of `cve_ids`
+    (those this feed holds the newest version of). CVEs of `bumped` only changed their
+    lastModified, so only their schema:dateModified is replaced. Runs inside a pool worker.
+    """
+    started = time.perf_counter()
+    written = 0
 
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
+    delta = SparqlDeltaWriter(out_path, graph=graph)
+    try:
+        for _, data in iter_json_documents(archive):
+            cve_id = data.get("id")
+            if cve_id in cve_ids:
+                delta.replace(CVE[cve_id], linked=(DAVI_NIST.hasCVSSMetric,))
+                parse_cve_json(data, delta, _cpe_map)
+            elif cve_id in bumped:
+                delta.replace_property(CVE[cve_id], SCHEMA.dateModified)
+                add_literal_if_present(
+                    delta, CVE[cve_id], SCHEMA.dateModified,
+                    data.get("lastModified"), datatype=XSD.dateTime
+                )
+            else:
+                continue
+            written += 1
+    except Exception:
+        delta.discard()
+        raise
+
+    if written:
+        delta.close()
+    else:
+        delta.discard()
+
+    return {
+        "archive": os.path.basename(archive),
+        "delta": out_path if written else None,
+        "changed": written,
+        "triples": len(delta),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _report(event, **fields):
+    log.info(json.dumps({"event": event, **fields}))
+
+
+def _run_pool(task, jobs, workers, on_result=None):
+    """
+    Runs task(*args) for every (name, args) of `jobs` on a process pool sharing the CPE map,
+    reporting progress as structured events. Returns (done, failed, triples).
+    """
+    global _cpe_map
+
+    cpe_map = load_cpe_map()
+    workers = workers or os.cpu_count() or 1
+
+    if "fork" in mp.get_all_start_methods():
+        _cpe_map = cpe_map
+        context, initargs = mp.get_context("fork"), ()
+    else:
+        context, initargs = mp.get_context("spawn"), (cpe_map,)
+
+    done = failed = triples = 0
+    _report("start", archives=len(jobs), workers=workers)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(task, *args): name for name, args in jobs}
+
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+                if on_result:
+                    on_result(result)
+                done += 1
+                triples += result["triples"]
+                fields = {k: v for k, v in result.items() if k != "candidates"}
+                _report("archive_done", completed=done + failed, total=len(jobs), **fields)
+            except Exception as e:
+                failed += 1
+                _report("archive_failed", archive=futures[future], error=str(e),
+                        completed=done + failed, total=len(jobs))
+
+    return done, failed, triples
+
+
+def process_all_cves(input_dir, output_dir, workers=None, limit=None, fmt="nt"):
+    """
+    Converts every feed of input_dir (.7z/.zip archive, .json/.json.gz file or extracted
+    directory) into its own shard (cve_batch_NNNN.nt),
+    spreading the archives over a pool of `workers` processes (default: one per core).
+    `limit` only processes the first N archives.
+    `fmt` is "nt" (streamed), "nt.gz" (streamed, gzip) or "turtle" (rdflib Graph, pretty-printed).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    archives = list_feeds(input_dir)
+    if limit is not None:
+        archives = archives[:limit]
+
+    jobs = [
+        (fname, (os.path.join(input_dir, fname), os.path.join(output_dir, f"cve_batch_{idx:04d}"), fmt))
+        for idx, fname in enumerate(archives)
+    ]
+
+    started = time.perf_counter()
+    done, failed, triples = _run_pool(process_archive, jobs, workers)
+
+    _report("finished", archives=done, failed=failed, triples=triples,
+            seconds=round(time.perf_counter() - started, 2))
     log.info("All CVE batches generated ✔")
 
 
+def process_cve_updates(input_dir, output_dir, state_path=None, workers=None, graph=CVE_GRAPH):
+    """
+    Incremental mode: emits cve_delta_<run>_NNNN.ru SPARQL Update files holding only the CVEs
+    added or changed since the previous run (their old triples and metric_* nodes are deleted
+    first), then advances the watermarks. A CVE whose lastModified alone moved only gets its
+    schema:dateModified replaced. Apply the deltas in file-name order.
+    A CVE found in several feeds (a yearly feed and the modified / recent ones) is written
+    once, from the feed with its latest lastModified.
+    The deltas target `graph`, the named graph bulk_loader loads the CVE shards into
+    (None: the default graph).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = state_path or os.path.join(output_dir, "cve_watermarks.sqlite")
+    store = WatermarkStore(state_path)
+
+    run = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    feeds = list_feeds(input_dir)
+    started = time.perf_counter()
+
+    # id -> (lastModified, digest, changed, feed index); later feeds win ties
+    newest = {}
+    feed_index = {fname: idx for idx, fname in enumerate(feeds)}
+
+    def collect(result):
+        idx = feed_index[result["archive"]]
+        for cve_id, last_modified, digest, changed in result["candidates"]:
+            current = newest.get(cve_id)
+            if current is None or (last_modified or "") >= (current[0] or ""):
+                newest[cve_id] = (last_modified, digest, changed, idx)
+
+    try:
+        scan_jobs = [(fname, (os.path.join(input_dir, fname), state_path)) for fname in feeds]
+        _, scan_failed, _ = _run_pool(scan_archive, scan_jobs, workers, on_result=collect)
+
+        # feed index -> (CVEs to replace, CVEs whose lastModified alone moved)
+        owned = {}
+        for cve_id, (_, _, changed, idx) in newest.items():
+            owned.setdefault(idx, (set(), set()))[0 if changed else 1].add(cve_id)
+
+        jobs = [
+            (feeds[idx], (os.path.join(input_dir, feeds[idx]),
+                          os.path.join(output_dir, f"cve_delta_{run}_{idx:04d}.ru"), ids, graph, bumped))
+            for idx, (ids, bumped) in sorted(owned.items())
+        ]
+        changed = 0
+
+        def advance(result):
+            nonlocal changed
+            # Only once the delta file is on disk
+            idx = feed_index[result["archive"]]
+            store.update([(cve_id, newest[cve_id][0], newest[cve_id][1]) for cve_id in set().union(*owned[idx])])
+            changed += result["changed"]
+
+        done, failed, triples = _run_pool(diff_archive, jobs, workers, on_result=advance)
+    finally:
+        store.close()
+
+    _report("finished", archives=len(feeds), failed=scan_failed + failed, changed=changed, triples=triples,
+            seconds=round(time.perf_counter() - started, 2))
+
+
 if __name__ == "__main__":
-    process_all_cves(
-        "D:/Master/Anul2Sem1/WADE/Project/davi/data/NIST_NVD/CVE",
-        "D:/Master/Anul2Sem1/WADE/Project/davi/data/results/cve_rdf_batches"
-    )
+    process_all_cves(paths.CVE_INPUT_DIR, paths.CVE_OUTPUT_DIR)
@@ -6,6 +6,9 @@ from urllib.parse import quote
 from rdflib import Graph, Literal, RDF, Namespace
 from rdflib.namespace import SKOS, DCTERMS
 
+import paths
+from rdf_writer import open_writer
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("cwe-to-rdf")
 
@@ -43,6 +46,52 @@ def init_graph():
     return g
 
 
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_catalog_elements(source, names):
+    """
+    Streams a MITRE XML catalog (a .xml file or every .xml of a .zip), yielding
+    (local name, element, namespace map) for each element of `names` once it is complete.
+    Finished elements are dropped from the tree right away, so memory stays flat.
+    """
+    if source.endswith(".zip"):
+        with zipfile.ZipFile(source, "r") as z:
+            for member in z.namelist():
+                if member.endswith(".xml"):
+                    with z.open(member) as f:
+                        yield from _iter_stream(f, names)
+    else:
+        with open(source, "rb") as f:
+            yield from _iter_stream(f, names)
+
+
+def _iter_stream(f, names):
+    ns = None
+    stack = []
+    depth_in_target = 0
+
+    for event, elem in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            if ns is None:
+                ns_uri = detect_xml_namespace(elem)
+                ns = {"cwe": ns_uri, "capec": ns_uri}
+            stack.append(elem)
+            if _local(elem.tag) in names:
+                depth_in_target += 1
+            continue
+
+        stack.pop()
+        name = _local(elem.tag)
+        if name in names:
+            depth_in_target -= 1
+            yield name, elem, ns
+        if depth_in_target == 0 and stack:
+            # Done with it (and everything below it)
+            stack[-1].remove(elem)
+
+
 def process_weakness(weakness, ns, g):
     cwe_id = weakness.get("ID")
     name = weakness.get("Name")
@@ -63,50 +112,141 @@ def process_weakness(weakness, ns, g):
     desc = weakness.findtext("cwe:Description", namespaces=ns)
     add_en_literal(g, cwe_uri, SCHEMA.description, desc)
 
-    # HIERARCHY
-    for rel in weakness.findall(".//cwe:Related_Weakness", ns):
-        if rel.get("Nature") == "ChildOf":
-            parent_id = rel.get("CWE_ID")
-            if parent_id:
-                parent_uri = CWE[parent_id]
-                g.add((cwe_uri, SKOS.broader, parent_uri))
-                g.add((parent_uri, SKOS.narrower, cwe_uri))
+    # One pass over the weakness instead of a .// search per relation kind
+    for child in weakness.iter():
+        tag = _local(child.tag)
+
+        # HIERARCHY
+        if tag == "Related_Weakness":
+            if child.get("Nature") == "ChildOf":
+                parent_id = child.get("CWE_ID")
+                if parent_id:
+                    parent_uri = CWE[parent_id]
+                    g.add((cwe_uri, SKOS.broader, parent_uri))
+                    g.add((parent_uri, SKOS.narrower, cwe_uri))
+
+        # RELATED ATTACK PATTERNS (CAPEC)
+        elif tag == "Related_Attack_Pattern":
+            capec_id = child.get("CAPEC_ID")
+            if capec_id:
+                g.add((cwe_uri, SKOS.related, CAPEC[capec_id]))
+
+        elif tag == "Alternate_Term":
+            term = child.findtext("cwe:Term", namespaces=ns)
+            add_en_literal(g, cwe_uri, SKOS.altLabel, term)
+
+
+def _catalog(ns):
+    """(URI namespace, identifier prefix, member ID attribute) of the catalog being read."""
+    if ns["cwe"].startswith("http://capec.mitre.org/"):
+        return CAPEC, "CAPEC", "CAPEC_ID"
+    return CWE, "CWE", "CWE_ID"
+
+
+def process_category(category, ns, g):
+    cat_id = category.get("ID")
+    if not cat_id:
+        return
+
+    # CAPEC has categories of its own, with IDs that overlap CWE's
+    namespace, prefix, member_attr = _catalog(ns)
+    cat_uri = namespace[cat_id]
+    g.add((cat_uri, RDF.type, SKOS.Collection))
+    g.add((cat_uri, DCTERMS.identifier, Literal(f"{prefix}-{cat_id}")))
 
-    # RELATED ATTACK PATTERNS (CAPEC)
-    for capec in weakness.findall(".//cwe:Related_Attack_Pattern", ns):
-        capec_id = capec.get("CAPEC_ID")
-        if capec_id:
-            g.add((cwe_uri, SKOS.related, CAPEC[capec_id]))
+    name = category.get("Name")
+    if name:
+        g.add((cat_uri, SKOS.prefLabel, Literal(f"{prefix}-{cat_id}: {name}", lang="en")))
+
+    add_en_literal(g, cat_uri, SCHEMA.description, category.findtext("cwe:Summary", namespaces=ns))
 
-    for alt in weakness.findall(".//cwe:Alternate_Term", ns):
-        term = alt.findtext("cwe:Term", namespaces=ns)
-        add_en_literal(g, cwe_uri, SKOS.altLabel, term)
+    for member in category.iter(f"{{{ns['cwe']}}}Has_Member"):
+        member_id = member.get(member_attr)
+        if member_id:
+            g.add((cat_uri, SKOS.member, namespace[member_id]))
 
 
-def process_cwe_xml(zip_path, output_ttl):
-    log.info("Opening archive %s", zip_path)
-    g = init_graph()
+def process_view(view, ns, g):
+    view_id = view.get("ID")
+    if not view_id:
+        return
 
-    with zipfile.ZipFile(zip_path, "r") as z:
-        xml_file = next(n for n in z.namelist() if n.endswith(".xml"))
-        with z.open(xml_file) as f:
-            tree = ET.parse(f)
-            root = tree.getroot()
+    namespace, prefix, member_attr = _catalog(ns)
+    view_uri = namespace[view_id]
+    g.add((view_uri, RDF.type, SKOS.ConceptScheme))
+    g.add((view_uri, DCTERMS.identifier, Literal(f"{prefix}-{view_id}")))
 
-    ns_uri = detect_xml_namespace(root)
-    ns = {"cwe": ns_uri}
+    name = view.get("Name")
+    if name:
+        g.add((view_uri, SKOS.prefLabel, Literal(f"{prefix}-{view_id}: {name}", lang="en")))
 
-    log.info("Processing CWE weaknesses...")
+    add_en_literal(g, view_uri, SCHEMA.description, view.findtext("cwe:Objective", namespaces=ns))
 
-    for weakness in root.findall(".//cwe:Weakness", ns):
-        process_weakness(weakness, ns, g)
+    for member in view.iter(f"{{{ns['cwe']}}}Has_Member"):
+        member_id = member.get(member_attr)
+        if member_id:
+            g.add((namespace[member_id], SKOS.inScheme, view_uri))
+
+
+def process_attack_pattern(pattern, ns, g):
+    capec_id = pattern.get("ID")
+    if not capec_id:
+        return
 
-    log.info("Serializing RDF → %s", output_ttl)
-    g.serialize(output_ttl, format="turtle")
+    capec_uri = CAPEC[capec_id]
+    g.add((capec_uri, RDF.type, SKOS.Concept))
+    g.add((capec_uri, DCTERMS.identifier, Literal(f"CAPEC-{capec_id}")))
+
+    name = pattern.get("Name")
+    if name:
+        g.add((capec_uri, SKOS.prefLabel, Literal(f"CAPEC-{capec_id}: {name}", lang="en")))
+
+    add_en_literal(g, capec_uri, SCHEMA.description, pattern.findtext("capec:Description", namespaces=ns))
+
+    for child in pattern.iter():
+        tag = _local(child.tag)
+
+        if tag == "Related_Attack_Pattern" and child.get("Nature") == "ChildOf":
+            parent_id = child.get("CAPEC_ID")
+            if parent_id:
+                g.add((capec_uri, SKOS.broader, CAPEC[parent_id]))
+                g.add((CAPEC[parent_id], SKOS.narrower, capec_uri))
+
+        elif tag == "Related_Weakness":
+            cwe_id = child.get("CWE_ID")
+            if cwe_id:
+                g.add((capec_uri, SKOS.related, CWE[cwe_id]))
+
+
+HANDLERS = {
+    "Weakness": process_weakness,
+    "Category": process_category,
+    "View": process_view,
+    "Attack_Pattern": process_attack_pattern,
+}
+
+
+def process_cwe_xml(sources, output_base, fmt="nt"):
+    """
+    Converts MITRE catalogs (the CWE catalog with its weaknesses, categories and views,
+    and the CAPEC catalog) into one RDF file, output_base + the extension of `fmt`.
+    `sources` is a path or a list of .xml / .xml.zip paths.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+
+    counts = dict.fromkeys(HANDLERS, 0)
+
+    with open_writer(output_base, fmt, init_graph) as g:
+        for source in sources:
+            log.info("Streaming %s", source)
+            for name, elem, ns in iter_catalog_elements(source, HANDLERS):
+                HANDLERS[name](elem, ns, g)
+                counts[name] += 1
+
+    log.info("Wrote %s (%d triples, %s)", g.path, len(g), counts)
     log.info("Done.")
 
 
 if __name__ == "__main__":
-    zip_loc = r"D:/Master/Anul2Sem1/WADE/Project/davi/data/NIST_NVD/CWE/Full-Downloads/cwec_latest.xml.zip"
-    out_ttl = r"D:/Master/Anul2Sem1/WADE/Project/davi/data/results/cwe_rdf.ttl"
-    process_cwe_xml(zip_loc, out_ttl)
+    process_cwe_xml([paths.CWE_ZIP, paths.CAPEC_XML], paths.CWE_OUTPUT_BASE)
@@ -0,0 +1,145 @@
+"""
+Columnar staging cache for the MovieLens CSVs.
+
+Every CSV is parsed once into typed, raw column files (compact int32 ids, float32 scores,
+UTF-8 blobs for text) that later stages memory-map instead of re-reading the CSV.
+The cache is rebuilt for a table only when its source file changes.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+STAGING_VERSION = 1
+MANIFEST = "staging.json"
+TEXT = "text"
+
+# table -> (source CSV, {column: dtype}); "text" columns are stored as a blob + offsets
+TABLES = {
+    "ratings": ("ratings.csv", {"userId": "int32", "movieId": "int32", "rating": "float32", "timestamp": "int64"}),
+    "tags": ("tags.csv", {"userId": "int32", "movieId": "int32", "tag": TEXT, "timestamp": "int64"}),
+    "movies": ("movies.csv", {"movieId": "int32", "title": TEXT, "genres": TEXT}),
+    "links": ("links.csv", {"movieId": "int32", "imdbId": TEXT}),
+    "genome_scores": ("genome-scores.csv", {"movieId": "int32", "tagId": "int32", "relevance": "float32"}),
+    "genome_tags": ("genome-tags.csv", {"tagId": "int32", "tag": TEXT}),
+}
+
+
+class TextColumn:
+    """Memory-mapped UTF-8 strings; only the rows that are asked for get decoded."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def take(self, rows):
+        """Strings of `rows` (indices or a boolean mask) as a pandas Series."""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows)
+        starts, ends = self.offsets[rows], self.offsets[rows + 1]
+        blob = self.blob
+        return pd.Series([bytes(blob[s:e]).decode("utf-8") for s, e in zip(starts, ends)], dtype=object)
+
+
+def _column_path(staging_dir, table, column, part="bin"):
+    return os.path.join(staging_dir, f"{table}.{column}.{part}")
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def _read_manifest(staging_dir):
+    path = os.path.join(staging_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    return manifest if manifest.get("version") == STAGING_VERSION else {}
+
+
+def _stage_table(input_dir, staging_dir, table, chunk_size):
+    source, columns = TABLES[table]
+    numeric = {c: t for c, t in columns.items() if t != TEXT}
+    text = [c for c, t in columns.items() if t == TEXT]
+
+    handles = {c: open(_column_path(staging_dir, table, c), "wb") for c in columns}
+    offset_handles = {c: open(_column_path(staging_dir, table, c, "offsets"), "wb") for c in text}
+    text_sizes = dict.fromkeys(text, 0)
+    for c in text:
+        np.zeros(1, dtype="int64").tofile(offset_handles[c])
+
+    rows = 0
+    try:
+        reader = pd.read_csv(
+            os.path.join(input_dir, source), usecols=list(columns), chunksize=chunk_size,
+            dtype={**numeric, **{c: str for c in text}}, keep_default_na=False
+        )
+        for chunk in reader:
+            for c, dtype in numeric.items():
+                chunk[c].to_numpy(dtype=dtype).tofile(handles[c])
+            for c in text:
+                encoded = [v.encode("utf-8") for v in chunk[c].tolist()]
+                handles[c].write(b"".join(encoded))
+                ends = text_sizes[c] + np.cumsum([len(e) for e in encoded], dtype="int64")
+                ends.tofile(offset_handles[c])
+                if len(ends):
+                    text_sizes[c] = int(ends[-1])
+            rows += len(chunk)
+    finally:
+        for fh in list(handles.values()) + list(offset_handles.values()):
+            fh.close()
+
+    return rows
+
+
+def stage_movielens(input_dir, staging_dir, chunk_size=2000000, tables=None):
+    """Parses the CSVs whose cache is missing or stale; returns the staging manifest."""
+    os.makedirs(staging_dir, exist_ok=True)
+    manifest = _read_manifest(staging_dir)
+    manifest["version"] = STAGING_VERSION
+    entries = manifest.setdefault("tables", {})
+
+    for table in tables or TABLES:
+        source = os.path.join(input_dir, TABLES[table][0])
+        signature = _source_signature(source)
+        if entries.get(table, {}).get("source") == signature:
+            continue
+
+        print(f"   Staging {TABLES[table][0]}...")
+        rows = _stage_table(input_dir, staging_dir, table, chunk_size)
+        entries[table] = {"source": signature, "rows": rows}
+
+        # Written after every table, so an interrupted run keeps what is done
+        with open(os.path.join(staging_dir, MANIFEST), "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+
+    return manifest
+
+
+def load_table(staging_dir, table):
+    """{column: memory-mapped array or TextColumn} of a staged table."""
+    manifest = _read_manifest(staging_dir)
+    entry = manifest.get("tables", {}).get(table)
+    if entry is None:
+        raise FileNotFoundError(f"Table {table!r} is not staged in {staging_dir}")
+
+    rows = entry["rows"]
+    out = {}
+    for column, dtype in TABLES[table][1].items():
+        path = _column_path(staging_dir, table, column)
+        if dtype == TEXT:
+            offsets = np.memmap(_column_path(staging_dir, table, column, "offsets"), dtype="int64", mode="r",
+                                shape=(rows + 1,))
+            size = int(offsets[-1])
+            blob = np.memmap(path, dtype="uint8", mode="r", shape=(size,)) if size else np.zeros(0, dtype="uint8")
+            out[column] = TextColumn(blob, offsets)
+        elif rows:
+            out[column] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+        else:
+            out[column] = np.zeros(0, dtype=dtype)
+    return out
@@ -0,0 +1,50 @@
+"""
+Locations of the raw datasets and of the generated RDF.
+
+Everything lives under DAVI_DATA_DIR (default: the repository's data/ directory), laid out as
+    NIST_NVD/{CPE,CVE,CWE,CAPEC}   ML_20M   results/
+"""
+import fnmatch
+import os
+
+DATA_DIR = os.path.abspath(os.getenv(
+    "DAVI_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data")
+))
+RESULTS_DIR = os.path.join(DATA_DIR, "results")
+
+NVD_DIR = os.path.join(DATA_DIR, "NIST_NVD")
+CPE_INPUT_DIR = os.path.join(NVD_DIR, "CPE")
+CVE_INPUT_DIR = os.path.join(NVD_DIR, "CVE")
+CWE_ZIP = os.path.join(NVD_DIR, "CWE", "Full-Downloads", "cwec_latest.xml.zip")
+CAPEC_XML = os.path.join(NVD_DIR, "CAPEC", "capec_latest.xml")
+MOVIELENS_INPUT_DIR = os.path.join(DATA_DIR, "ML_20M")
+
+CPE_OUTPUT_DIR = os.path.join(RESULTS_DIR, "cpe_rdf_batches")
+CPE_MAP_PATH = os.path.join(CPE_OUTPUT_DIR, "cpe_map.sqlite")
+CVE_OUTPUT_DIR = os.path.join(RESULTS_DIR, "cve_rdf_batches")
+CWE_OUTPUT_BASE = os.path.join(RESULTS_DIR, "cwe_rdf")
+MOVIELENS_OUTPUT_DIR = os.path.join(RESULTS_DIR, "movielens")
+
+# Named graph of each source in the triple store: GRAPH_BASE + source name
+GRAPH_BASE = "https://purl.org/davi/graph/"
+
+# Source name -> where its RDF is written (directories or globs), shared by bulk_loader and void_stats
+SOURCES = {
+    "cpe": [CPE_OUTPUT_DIR],
+    "cve": [CVE_OUTPUT_DIR],
+    "cwe": [CWE_OUTPUT_BASE + ".*"],
+    "movielens": [MOVIELENS_OUTPUT_DIR],
+}
+
+# Statistics of the generated RDF (void_stats); the REST API reads the same STATISTICS_PATH
+STATISTICS_PATH = os.path.abspath(os.getenv("STATISTICS_PATH", os.path.join(RESULTS_DIR, "statistics.json")))
+
+
+def source_name(path):
+    """Name of the source whose output `path` (a directory, file or glob) is, or None."""
+    path = os.path.abspath(path)
+    for name, locations in SOURCES.items():
+        for location in locations:
+            if path == location or fnmatch.fnmatch(path, location) or os.path.dirname(path) == location:
+                return name
+    return None
@@ -0,0 +1,352 @@
+"""
+Ingestion pipeline: runs the prep stages as a DAG and skips the ones that are up to date.
+
+A stage's key hashes its parameters, its inputs (files are fingerprinted by size and mtime,
+or by content with --hash-contents), the code of the scripts it runs and the keys of the
+stages it depends on. Stages whose key matches the previous run, and whose outputs still
+exist, are skipped. Ready stages run in parallel, each in its own process.
+
+    python pipeline.py                                # everything that is out of date
+    python pipeline.py --set GENOME_THRESHOLD=0.6     # only re-runs ml_genome and void
+    python pipeline.py --only cve --force cve
+
+Per-stage timings are logged and kept, with the keys, in results/.pipeline_state.json.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import paths
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("pipeline")
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".pipeline_state.json"
+
+DEFAULT_PARAMS = {
+    "NVD_FORMAT": "nt",
+    "CVE_WORKERS": 0,
+    "TOP_N_MOVIES": 1000,
+    "MAX_RATINGS_PER_MOVIE": 1000,
+    "GENOME_THRESHOLD": 0.5,
+    "MOVIELENS_FORMAT": "turtle",
+    "MOVIELENS_SHARDS": 0,
+}
+
+NVD_CODE = ["rdf_writer.py", "archive_reader.py", "void_stats.py", "paths.py"]
+MOVIELENS_CODE = ["convert_movielens_final.py", "movielens_staging.py", "void_stats.py", "paths.py"]
+
+
+class Stage:
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), params=(), code=()):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = list(params)
+        self.code = list(code)
+
+
+# ================= STAGE RUNNERS (executed in a child process) =================
+def _run_cpe(params):
+    import cpe_parser
+    cpe_parser.process_cpe_json_folders(paths.CPE_INPUT_DIR, paths.CPE_OUTPUT_DIR, fmt=params["NVD_FORMAT"])
+
+
+def _run_cve(params):
+    import cve_parser
+    cve_parser.CPE_MAP_PATH = paths.CPE_MAP_PATH
+    cve_parser.process_all_cves(paths.CVE_INPUT_DIR, paths.CVE_OUTPUT_DIR,
+                                workers=params["CVE_WORKERS"] or None, fmt=params["NVD_FORMAT"])
+
+
+def _run_cwe(params):
+    import cwe_parser
+    sources = [p for p in (paths.CWE_ZIP, paths.CAPEC_XML) if os.path.exists(p)]
+    cwe_parser.process_cwe_xml(sources, paths.CWE_OUTPUT_BASE, fmt=params["NVD_FORMAT"])
+
+
+def _movielens(params):
+    import convert_movielens_final as ml
+    ml.INPUT_DIR = paths.MOVIELENS_INPUT_DIR
+    ml.OUTPUT_DIR = paths.MOVIELENS_OUTPUT_DIR
+    ml.STAGING_DIR = os.path.join(ml.OUTPUT_DIR, "_staging")
+    ml.TOP_N_MOVIES = int(params["TOP_N_MOVIES"])
+    ml.MAX_RATINGS_PER_MOVIE = int(params["MAX_RATINGS_PER_MOVIE"])
+    ml.GENOME_THRESHOLD = float(params["GENOME_THRESHOLD"])
+    ml.OUTPUT_FORMAT = params["MOVIELENS_FORMAT"]
+    ml.SHARDS = int(params["MOVIELENS_SHARDS"])
+    return ml
+
+
+def _run_ml_staging(params):
+    _movielens(params).stage_inputs()
+
+
+def _run_ml_mapping(params):
+    _movielens(params).setup_movie_mapping()
+
+
+def _run_ml_movies(params):
+    _movielens(params).process_movies()
+
+
+def _run_ml_ratings(params):
+    _movielens(params).process_ratings()
+
+
+def _run_ml_genome(params):
+    _movielens(params).process_genome()
+
+
+def _run_ml_tags(params):
+    _movielens(params).process_tags_metadata()
+
+
+def _run_void(params):
+    import void_stats
+    void_stats.build_void()
+
+
+def _nvd_extension(params):
+    return {"nt": ".nt", "nt.gz": ".nt.gz", "turtle": ".ttl"}[params["NVD_FORMAT"]]
+
+
+def _movielens_outputs(params, *names, users=False):
+    """
+    Files the MovieLens stage writing `names` leaves behind: one each, or the shards and the
+    manifest of its kind (`names[0]`).
+    """
+    out = paths.MOVIELENS_OUTPUT_DIR
+    shards = int(params["MOVIELENS_SHARDS"])
+    if not shards:
+        ext = ".nt" if params["MOVIELENS_FORMAT"] == "nt" else ".ttl"
+        return [os.path.join(out, name + ext) for name in names]
+
+    # Sharded output is always gzip-compressed N-Triples
+    files = [os.path.join(out, f"{name}_{shard:04d}.nt.gz") for name in names for shard in range(shards)]
+    if users:
+        files.append(os.path.join(out, "users.nt.gz"))
+    return files + [os.path.join(out, f"{names[0]}_manifest.json")]
+
+
+def build_stages(params):
+    ml_out = paths.MOVIELENS_OUTPUT_DIR
+    ml_common = {"code": MOVIELENS_CODE, "deps": ["ml_mapping"]}
+    unsharded = {**params, "MOVIELENS_SHARDS": 0}
+    stages = [
+        Stage("cpe", _run_cpe, inputs=[paths.CPE_INPUT_DIR], outputs=[paths.CPE_MAP_PATH],
+              params=["NVD_FORMAT"], code=NVD_CODE + ["cpe_parser.py", "cpe_map.py"]),
+        Stage("cve", _run_cve, deps=["cpe"], inputs=[paths.CVE_INPUT_DIR], outputs=[paths.CVE_OUTPUT_DIR],
+              params=["NVD_FORMAT", "CVE_WORKERS"], code=NVD_CODE + ["cve_parser.py", "cpe_map.py", "watermarks.py"]),
+        Stage("cwe", _run_cwe, inputs=[paths.CWE_ZIP, paths.CAPEC_XML],
+              outputs=[paths.CWE_OUTPUT_BASE + _nvd_extension(params)],
+              params=["NVD_FORMAT"], code=NVD_CODE + ["cwe_parser.py"]),
+        Stage("ml_staging", _run_ml_staging, inputs=[paths.MOVIELENS_INPUT_DIR],
+              outputs=[os.path.join(ml_out, "_staging")], code=MOVIELENS_CODE),
+        Stage("ml_mapping", _run_ml_mapping, deps=["ml_staging"], outputs=[os.path.join(ml_out, "movie_mapping.json")],
+              params=["TOP_N_MOVIES"], code=MOVIELENS_CODE),
+        Stage("ml_movies", _run_ml_movies, outputs=_movielens_outputs(unsharded, "movies"),
+              params=["MOVIELENS_FORMAT"], **ml_common),
+        Stage("ml_tags", _run_ml_tags, outputs=_movielens_outputs(unsharded, "genome_defs", "user_tags"),
+              params=["MOVIELENS_FORMAT"], **ml_common),
+        Stage("ml_genome", _run_ml_genome, outputs=_movielens_outputs(params, "genome_scores"),
+              params=["GENOME_THRESHOLD", "MOVIELENS_FORMAT", "MOVIELENS_SHARDS"], **ml_common),
+        Stage("ml_ratings", _run_ml_ratings, outputs=_movielens_outputs(params, "ratings", users=True),
+              params=["MAX_RATINGS_PER_MOVIE", "MOVIELENS_FORMAT", "MOVIELENS_SHARDS"], **ml_common),
+        # Merges the statistics every writer saved next to its output
+        Stage("void", _run_void, deps=["cpe", "cve", "cwe", "ml_movies", "ml_tags", "ml_genome", "ml_ratings"],
+              outputs=[paths.STATISTICS_PATH], code=["void_stats.py", "paths.py"]),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+# ================= KEYS & STATE =================
+def _fingerprint(path, hash_contents):
+    """Digest of a file or directory tree (metadata, or contents with hash_contents)."""
+    digest = hashlib.sha256()
+    if not os.path.exists(path):
+        digest.update(b"<missing>")
+        return digest.hexdigest()
+
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, f) for root, _, names in os.walk(path) for f in names
+    )
+    for f in files:
+        digest.update(os.path.relpath(f, path).encode("utf-8"))
+        if hash_contents:
+            with open(f, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(block)
+        else:
+            stat = os.stat(f)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii"))
+    return digest.hexdigest()
+
+
+def stage_key(stage, params, dep_keys, hash_contents=False):
+    payload = {
+        "stage": stage.name,
+        "params": {p: params[p] for p in stage.params},
+        "inputs": {p: _fingerprint(p, hash_contents) for p in stage.inputs},
+        # Code always by content: touching a file must not trigger a rebuild, editing it must
+        "code": {c: _fingerprint(os.path.join(SCRIPTS_DIR, c), True) for c in stage.code},
+        "deps": dep_keys,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
+
+
+# ================= EXECUTION =================
+def _run_in_process(stage, params):
+    # A fresh process per stage: module-level settings do not leak between stages,
+    # and stages may start their own process pools
+    process = mp.get_context("spawn").Process(target=stage.run, args=(params,), name=f"stage-{stage.name}")
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Stage {stage.name} exited with code {process.exitcode}")
+
+
+def _report(event, **fields):
+    log.info(json.dumps({"event": event, **fields}))
+
+
+def run_pipeline(params=None, only=None, force=(), workers=2, hash_contents=False, dry_run=False):
+    """
+    Runs the out-of-date stages (of `only` and what they depend on, if given).
+    Returns {stage: "skipped" | "done" | "would_run" | "failed" | "blocked"}.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    stages = build_stages(params)
+    state_path = os.path.join(paths.RESULTS_DIR, STATE_FILE)
+    state = _load_state(state_path)
+    state_lock = threading.Lock()
+
+    selected = set(only or stages)
+    pending = list(selected)
+    while pending:
+        for dep in stages[pending.pop()].deps:
+            if dep not in selected:
+                selected.add(dep)
+                pending.append(dep)
+
+    keys, status = {}, {}
+    remaining = {name for name in stages if name in selected}
+
+    def ready(name):
+        return all(status.get(dep) in ("skipped", "done", "would_run") for dep in stages[name].deps)
+
+    def blocked(name):
+        return any(status.get(dep) in ("failed", "blocked") for dep in stages[name].deps)
+
+    def execute(name):
+        stage = stages[name]
+        started = time.perf_counter()
+        _report("stage_started", stage=name)
+        _run_in_process(stage, params)
+        seconds = round(time.perf_counter() - started, 2)
+        with state_lock:
+            state[name] = {"key": keys[name], "seconds": seconds,
+                           "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+            _save_state(state_path, state)
+        _report("stage_done", stage=name, seconds=seconds)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while remaining or running:
+            for name in sorted(remaining):
+                if blocked(name):
+                    status[name] = "blocked"
+                    remaining.discard(name)
+                elif ready(name):
+                    remaining.discard(name)
+                    stage = stages[name]
+                    # Keys of upstream stages are final once they are skipped or done
+                    keys[name] = stage_key(stage, params, {d: keys[d] for d in stage.deps}, hash_contents)
+                    previous = state.get(name, {})
+                    up_to_date = (previous.get("key") == keys[name]
+                                  and all(os.path.exists(p) for p in stage.outputs))
+
+                    if up_to_date and name not in force:
+                        status[name] = "skipped"
+                        _report("stage_skipped", stage=name, last_seconds=previous.get("seconds"))
+                    elif dry_run:
+                        status[name] = "would_run"
+                        _report("stage_would_run", stage=name)
+                    else:
+                        running[pool.submit(execute, name)] = name
+
+            if not running:
+                if remaining and not any(ready(n) or blocked(n) for n in remaining):
+                    raise RuntimeError(f"Unsatisfiable stage dependencies: {sorted(remaining)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    future.result()
+                    status[name] = "done"
+                except Exception as e:
+                    status[name] = "failed"
+                    _report("stage_failed", stage=name, error=str(e))
+
+    _report("pipeline_finished", stages=status,
+            seconds={n: state.get(n, {}).get("seconds") for n in status})
+    return status
+
+
+def _parse_value(raw):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the DaVi data preparation pipeline.")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help=f"Override a parameter ({', '.join(DEFAULT_PARAMS)})")
+    parser.add_argument("--only", nargs="+", help="Run these stages (and what they need)")
+    parser.add_argument("--force", nargs="+", default=[], help="Run these stages even if up to date")
+    parser.add_argument("--workers", type=int, default=2, help="Stages running at the same time")
+    parser.add_argument("--hash-contents", action="store_true", help="Hash input files by content")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run")
+    args = parser.parse_args()
+
+    params = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        if key not in DEFAULT_PARAMS:
+            parser.error(f"Unknown parameter {key}")
+        params[key] = _parse_value(value)
+
+    status = run_pipeline(params, args.only, set(args.force), args.workers, args.hash_contents, args.dry_run)
+    raise SystemExit(1 if any(s in ("failed", "blocked") for s in status.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
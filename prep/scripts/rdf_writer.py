@@ -0,0 +1,251 @@
+import gzip
+import os
+import re
+import shutil
+import tempfile
+
+from rdflib import Graph, Literal, BNode
+
+from void_stats import StatisticsCollector, SIDECAR_SUFFIX
+
+# Suffix of outputs still being written; the loader ignores them
+PARTIAL_SUFFIX = ".part"
+
+# Output formats understood by open_writer, with the file extension each one gets
+EXTENSIONS = {
+    "nt": ".nt",
+    "nt.gz": ".nt.gz",
+    "turtle": ".ttl",
+}
+
+_LITERAL_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"}
+_LITERAL_SPECIAL = re.compile(r'[\\"\n\r]')
+# Characters N-Triples does not allow inside <...>
+_IRI_SPECIAL = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+
+def _iri(value):
+    if _IRI_SPECIAL.search(value):
+        value = _IRI_SPECIAL.sub(lambda m: "%{:02X}".format(ord(m.group())), value)
+    return f"<{value}>"
+
+
+def _term(term):
+    if isinstance(term, Literal):
+        lexical = _LITERAL_SPECIAL.sub(lambda m: _LITERAL_ESCAPES[m.group()], str(term))
+        if term.language:
+            return f'"{lexical}"@{term.language}'
+        if term.datatype:
+            return f'"{lexical}"^^{_iri(term.datatype)}'
+        return f'"{lexical}"'
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return _iri(str(term))
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class NTriplesWriter:
+    """
+    Drop-in replacement for the rdflib Graph used by the parsers:
+    every added triple is written straight to an N-Triples file (gzip if the path ends in .gz),
+    so memory use does not grow with the number of triples.
+    With `stats`, the VoID statistics of the file are saved next to it on close.
+    The file is written as `<path>.part` and only renamed once closed; leaving the `with`
+    block on an exception discards it instead, so no truncated shard is ever left behind.
+    """
+
+    def __init__(self, path, compresslevel=6, stats=True):
+        self.path = path
+        self.stats = StatisticsCollector() if stats else None
+        self._tmp = path + PARTIAL_SUFFIX
+        if path.endswith(".gz"):
+            self._fh = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=compresslevel)
+        else:
+            self._fh = open(self._tmp, "w", encoding="utf-8", buffering=1 << 20)
+        self._count = 0
+
+    def add(self, triple):
+        s, p, o = (_term(t) for t in triple)
+        self._fh.write(f"{s} {p} {o} .\n")
+        self._count += 1
+        if self.stats is not None:
+            self.stats.add(s, p, o)
+
+    def bind(self, *args, **kwargs):
+        # N-Triples has no prefixes
+        pass
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+            os.replace(self._tmp, self.path)
+            if self.stats is not None:
+                self.stats.save(self.path + SIDECAR_SUFFIX)
+
+    def discard(self):
+        """Drops the output, and whatever an earlier run left under the same name."""
+        if not self._fh.closed:
+            self._fh.close()
+        _remove(self._tmp, self.path, self.path + SIDECAR_SUFFIX)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class TurtleGraphWriter:
+    """Previous behaviour: collects an rdflib Graph and pretty-prints it as Turtle on close."""
+
+    def __init__(self, path, graph=None, stats=True):
+        self.path = path
+        self.graph = graph if graph is not None else Graph()
+        self.stats = stats
+
+    def add(self, triple):
+        self.graph.add(triple)
+
+    def bind(self, *args, **kwargs):
+        self.graph.bind(*args, **kwargs)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def close(self):
+        tmp = self.path + PARTIAL_SUFFIX
+        self.graph.serialize(tmp, format="turtle")
+        os.replace(tmp, self.path)
+        if self.stats:
+            # Counted from the graph, which has already dropped duplicate triples
+            collector = StatisticsCollector()
+            for triple in self.graph:
+                collector.add(*(_term(t) for t in triple))
+            collector.save(self.path + SIDECAR_SUFFIX)
+
+    def discard(self):
+        _remove(self.path + PARTIAL_SUFFIX, self.path, self.path + SIDECAR_SUFFIX)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class SparqlDeltaWriter:
+    """
+    Writes a SPARQL Update file that replaces whole resources: every subject passed to
+    `replace` first loses all its triples (and those of the nodes it links to through
+    `linked` predicates), then the added triples are inserted.
+    `replace_property` only drops the values of one predicate of a subject.
+    Inserted triples are spooled to a temporary file, so memory only grows with the subject list.
+    """
+
+    def __init__(self, path, graph=None, batch_size=500):
+        self.path = path
+        self.graph = graph
+        self.batch_size = batch_size
+        self._subjects = {}
+        self._properties = []
+        self._inserts = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._count = 0
+
+    def replace(self, subject, linked=()):
+        self._subjects[subject] = tuple(linked)
+
+    def replace_property(self, subject, predicate):
+        self._properties.append((subject, predicate))
+
+    def add(self, triple):
+        s, p, o = triple
+        self._inserts.write(f"{_term(s)} {_term(p)} {_term(o)} .\n")
+        self._count += 1
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return bool(self._subjects) or bool(self._properties) or self._count > 0
+
+    def _scoped(self, pattern):
+        return f"GRAPH {_iri(self.graph)} {{ {pattern} }}" if self.graph else pattern
+
+    def _write_deletes(self, out):
+        subjects = list(self._subjects.items())
+        for start in range(0, len(subjects), self.batch_size):
+            chunk = subjects[start:start + self.batch_size]
+            values = " ".join(_iri(str(s)) for s, _ in chunk)
+
+            # Linked nodes go first, while the links to them still exist
+            for predicate in sorted({p for _, preds in chunk for p in preds}):
+                link = self._scoped(f"?s {_iri(str(predicate))} ?n . ?n ?np ?no .")
+                out.write(
+                    f"DELETE {{ {self._scoped('?n ?np ?no .')} }}\n"
+                    f"WHERE {{ VALUES ?s {{ {values} }} {link} }} ;\n"
+                )
+            out.write(
+                f"DELETE {{ {self._scoped('?s ?p ?o .')} }}\n"
+                f"WHERE {{ VALUES ?s {{ {values} }} {self._scoped('?s ?p ?o .')} }} ;\n"
+            )
+
+        for start in range(0, len(self._properties), self.batch_size):
+            chunk = self._properties[start:start + self.batch_size]
+            values = " ".join(f"({_iri(str(s))} {_iri(str(p))})" for s, p in chunk)
+            out.write(
+                f"DELETE {{ {self._scoped('?s ?p ?o .')} }}\n"
+                f"WHERE {{ VALUES (?s ?p) {{ {values} }} {self._scoped('?s ?p ?o .')} }} ;\n"
+            )
+
+    def close(self):
+        if self._inserts.closed:
+            return
+        with open(self.path, "w", encoding="utf-8") as out:
+            self._write_deletes(out)
+            open_data, close_data = ("{", "}") if not self.graph else (f"{{ GRAPH {_iri(self.graph)} {{", "} }")
+            out.write(f"INSERT DATA {open_data}\n")
+            self._inserts.seek(0)
+            shutil.copyfileobj(self._inserts, out)
+            out.write(f"{close_data}\n")
+        self._inserts.close()
+
+    def discard(self):
+        self._inserts.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(base_path, fmt="nt", init_graph=None, stats=True):
+    """
+    Opens `base_path` + the extension of `fmt` for writing.
+    `init_graph` builds the (prefix-bound) Graph used by the Turtle backend.
+    `stats` saves the file's VoID statistics as `<file>.stats.json` (see void_stats).
+    """
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown output format {fmt!r}, expected one of {sorted(EXTENSIONS)}")
+
+    path = base_path + EXTENSIONS[fmt]
+    if fmt == "turtle":
+        return TurtleGraphWriter(path, init_graph() if init_graph else None, stats=stats)
+    return NTriplesWriter(path, stats=stats)
@@ -0,0 +1,374 @@
+"""
+VoID-style statistics of the generated RDF, collected while it is written.
+
+Every writer keeps a StatisticsCollector and saves it next to its output as `<file>.stats.json`:
+triples per predicate and per class, distinct subjects / objects per predicate (HyperLogLog
+sketches, so they merge across shards and workers) and min / max of numeric and date literals.
+`build_void` merges the sidecars of each source into one VoID description (results/void.ttl)
+and the compact JSON read by the REST API, written to STATISTICS_PATH: point the API's
+STATISTICS_PATH at the same file (or export it for both).
+
+    python void_stats.py
+"""
+import base64
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import paths
+from bulk_loader import DEFAULT_GRAPH_BASE, collect_sources
+
+SIDECAR_SUFFIX = ".stats.json"
+STATS_VERSION = 1
+
+# source -> dataset identifier in the registry
+DATASETS = {
+    "cpe": "nist-nvd",
+    "cve": "nist-nvd",
+    "cwe": "nist-nvd",
+    "movielens": "movielens-20m",
+}
+# source -> (dataset, output locations); graph names follow bulk_loader (graph base + source)
+SOURCES = {name: (DATASETS[name], locations) for name, locations in paths.SOURCES.items()}
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+NUMERIC_TYPES = {"integer", "int", "long", "short", "decimal", "float", "double", "nonNegativeInteger",
+                 "positiveInteger", "nonPositiveInteger", "negativeInteger", "unsignedInt", "unsignedLong"}
+DATE_TYPES = {"date", "dateTime", "gYear", "gYearMonth"}
+
+# "lexical"^^<datatype> or "lexical"^^prefix:datatype
+_TYPED_LITERAL = re.compile(r'^"(.*)"\^\^<?(?:[^>]*[#/:])?([A-Za-z]+)>?$', re.S)
+
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+
+def _hashes(values):
+    # Stable across processes (unlike hash()), so sketches of different workers merge
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _hll_update(registers, hashes):
+    """Adds 64-bit hashes to a HyperLogLog register array."""
+    if not len(hashes):
+        return
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    # The guard bit caps the rank; >> 11 keeps the value exact as a float64 for frexp
+    rest = (hashes << np.uint64(HLL_PRECISION)) | np.uint64(1 << (HLL_PRECISION - 1))
+    _, exponent = np.frexp((rest >> np.uint64(11)).astype(np.float64))
+    rank = (64 - (exponent + 11) + 1).astype(np.uint8)
+    np.maximum.at(registers, index, rank)
+
+
+def hll_estimate(registers):
+    m = float(len(registers))
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+def _merge_bound(current, value, pick):
+    if value is None:
+        return current
+    return value if current is None else pick(current, value)
+
+
+class _PredicateStats:
+    __slots__ = ("triples", "subjects", "objects", "kind", "min", "max")
+
+    def __init__(self):
+        self.triples = 0
+        self.subjects = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        self.objects = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        self.kind = None
+        self.min = self.max = None
+
+    def bound(self, kind, low, high):
+        if self.kind not in (None, kind):
+            return
+        self.kind = kind
+        self.min = _merge_bound(self.min, low, min)
+        self.max = _merge_bound(self.max, high, max)
+
+    def merge(self, other):
+        self.triples += other.triples
+        np.maximum(self.subjects, other.subjects, out=self.subjects)
+        np.maximum(self.objects, other.objects, out=self.objects)
+        if other.kind:
+            self.bound(other.kind, other.min, other.max)
+
+
+def _encode(registers):
+    # Sketches of small outputs are mostly zeros and compress well
+    return base64.b64encode(zlib.compress(registers.tobytes())).decode("ascii")
+
+
+def _decode(text):
+    return np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=np.uint8).copy()
+
+
+class StatisticsCollector:
+    """
+    Streaming statistics of the triples written to one output.
+    Terms are given in their serialized form (N-Triples, or prefixed names resolved with `prefixes`).
+    """
+
+    def __init__(self, prefixes=None, buffer_size=100000):
+        self.prefixes = prefixes or {}
+        self.buffer_size = buffer_size
+        self.predicates = {}
+        self.classes = {}
+        self.subjects = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        self._buffer = []
+
+    def _uri(self, term):
+        if term.startswith("<"):
+            return term[1:-1]
+        prefix, _, local = term.partition(":")
+        return self.prefixes.get(prefix, prefix + ":") + local
+
+    def add(self, s, p, o):
+        """One serialized triple; buffered and processed column-wise."""
+        self._buffer.append((s, p, o))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        frame = pd.DataFrame(self._buffer, columns=["s", "p", "o"])
+        self._buffer = []
+        for p, group in frame.groupby("p", sort=False):
+            self.add_columns(group["s"], p, group["o"])
+
+    def add_columns(self, s, p, o):
+        """Triples of one predicate `p`; `s` and `o` are Series or constants."""
+        size = len(s) if isinstance(s, pd.Series) else len(o) if isinstance(o, pd.Series) else 1
+        if not size:
+            return
+        uri = self._uri(p)
+        stats = self.predicates.get(uri)
+        if stats is None:
+            stats = self.predicates[uri] = _PredicateStats()
+        stats.triples += size
+
+        subjects = _hashes(s if isinstance(s, pd.Series) else [s])
+        _hll_update(stats.subjects, subjects)
+        _hll_update(self.subjects, subjects)
+        objects = o if isinstance(o, pd.Series) else pd.Series([o])
+        _hll_update(stats.objects, _hashes(objects))
+
+        if uri == RDF_TYPE:
+            counts = objects.value_counts() if isinstance(o, pd.Series) else {o: size}
+            for cls, count in counts.items():
+                cls = self._uri(cls)
+                self.classes[cls] = self.classes.get(cls, 0) + int(count)
+        elif str(objects.iloc[0]).startswith('"'):
+            self._literal_bounds(stats, objects)
+
+    @staticmethod
+    def _literal_bounds(stats, objects):
+        parts = objects.str.extract(_TYPED_LITERAL).dropna()
+        for datatype, values in parts.groupby(1)[0]:
+            if datatype in NUMERIC_TYPES:
+                numbers = pd.to_numeric(values, errors="coerce").dropna()
+                if len(numbers):
+                    stats.bound("numeric", numbers.min().item(), numbers.max().item())
+            elif datatype in DATE_TYPES:
+                stats.bound("date", values.min(), values.max())
+
+    def merge(self, other):
+        for uri, stats in other.predicates.items():
+            self.predicates.setdefault(uri, _PredicateStats()).merge(stats)
+        for cls, count in other.classes.items():
+            self.classes[cls] = self.classes.get(cls, 0) + count
+        np.maximum(self.subjects, other.subjects, out=self.subjects)
+
+    @property
+    def triples(self):
+        return sum(stats.triples for stats in self.predicates.values())
+
+    def save(self, path):
+        """Writes the mergeable form (sketches included)."""
+        self.flush()
+        data = {
+            "version": STATS_VERSION,
+            "subjects": _encode(self.subjects),
+            "classes": self.classes,
+            "predicates": {
+                uri: {"triples": s.triples, "subjects": _encode(s.subjects), "objects": _encode(s.objects),
+                      "kind": s.kind, "min": s.min, "max": s.max}
+                for uri, s in self.predicates.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("version") != STATS_VERSION:
+            raise ValueError(f"Unsupported statistics version in {path}")
+
+        collector = cls()
+        collector.subjects = _decode(data["subjects"])
+        collector.classes = data["classes"]
+        for uri, entry in data["predicates"].items():
+            stats = collector.predicates[uri] = _PredicateStats()
+            stats.triples = entry["triples"]
+            stats.subjects, stats.objects = _decode(entry["subjects"]), _decode(entry["objects"])
+            stats.kind, stats.min, stats.max = entry["kind"], entry["min"], entry["max"]
+        return collector
+
+    def summary(self):
+        """{"predicates": {uri: {...}}, "classes": {uri: {"instances"}}}, the API format."""
+        self.flush()
+        predicates = {}
+        for uri, s in self.predicates.items():
+            entry = {"triples": s.triples, "distinct_subjects": hll_estimate(s.subjects),
+                     "distinct_objects": hll_estimate(s.objects)}
+            if s.kind:
+                entry.update(min=s.min, max=s.max)
+            predicates[uri] = entry
+        classes = {cls: {"instances": count} for cls, count in self.classes.items()}
+        return {"predicates": predicates, "classes": classes}
+
+
+class StatsOutput:
+    """Text output file whose triples are counted (see write_triples in convert_movielens_final)."""
+
+    def __init__(self, fh, path, prefixes=None):
+        self._fh = fh
+        self.path = path
+        self.stats = StatisticsCollector(prefixes)
+
+    def write(self, text):
+        return self._fh.write(text)
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+            self.stats.save(self.path + SIDECAR_SUFFIX)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ================= VoID =================
+def _iri(uri):
+    return f"<{uri}>"
+
+
+def _literal(value, kind):
+    if kind == "numeric":
+        return f'"{value}"^^<{XSD}{"integer" if isinstance(value, int) else "double"}>'
+    datatype = "dateTime" if "T" in str(value) else "date"
+    return f'"{value}"^^<{XSD}{datatype}>'
+
+
+def void_turtle(graphs):
+    """VoID description: one void:Dataset per named graph, with class and property partitions."""
+    lines = [
+        "@prefix void: <http://rdfs.org/ns/void#> .",
+        "@prefix davi-meta: <https://purl.org/davi/vocab/meta#> .",
+        "@prefix dcterms: <http://purl.org/dc/terms/> .",
+        "",
+    ]
+    for name, info in graphs.items():
+        summary = info["summary"]
+        lines.append(f"{_iri(info['graph'])} a void:Dataset ;")
+        lines.append(f'    dcterms:identifier "{name}" ;')
+        lines.append(f'    dcterms:isPartOf "{info["dataset"]}" ;')
+        lines.append(f"    void:triples {info['triples']} ;")
+        lines.append(f"    void:distinctSubjects {info['distinct_subjects']} ;")
+        lines.append(f"    void:properties {len(summary['predicates'])} ;")
+        lines.append(f"    void:classes {len(summary['classes'])} ;")
+        lines.append(f"    davi-meta:sizeBytes {info['bytes']} ;")
+        lines.append(f"    davi-meta:fileCount {info['files']}")
+        for cls, entry in sorted(summary["classes"].items()):
+            lines[-1] += " ;"
+            lines.append(f"    void:classPartition [ void:class {_iri(cls)} ; void:entities {entry['instances']} ]")
+        for uri, entry in sorted(summary["predicates"].items()):
+            lines[-1] += " ;"
+            partition = (f"void:property {_iri(uri)} ; void:triples {entry['triples']} ; "
+                         f"void:distinctSubjects {entry['distinct_subjects']} ; "
+                         f"void:distinctObjects {entry['distinct_objects']}")
+            if "min" in entry:
+                kind = "date" if isinstance(entry["min"], str) else "numeric"
+                partition += (f" ; davi-meta:minValue {_literal(entry['min'], kind)}"
+                              f" ; davi-meta:maxValue {_literal(entry['max'], kind)}")
+            lines.append(f"    void:propertyPartition [ {partition} ]")
+        lines[-1] += " ."
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_void(sources=None, output_dir=paths.RESULTS_DIR, graph_base=DEFAULT_GRAPH_BASE,
+               statistics_path=paths.STATISTICS_PATH):
+    """
+    Merges the sidecar statistics of every source ({name: (dataset, [locations])}) and writes
+    void.ttl to `output_dir` and the JSON document to `statistics_path`. Returns the document.
+    """
+    sources = sources or SOURCES
+    merged = StatisticsCollector()
+    graphs, datasets, missing = {}, {}, []
+
+    for name, (dataset, locations) in sources.items():
+        files = collect_sources(f"{name}={location}" for location in locations)[0].get(name, [])
+        if not files:
+            continue
+
+        collector = StatisticsCollector()
+        for path in files:
+            sidecar = path + SIDECAR_SUFFIX
+            if os.path.exists(sidecar):
+                collector.merge(StatisticsCollector.load(sidecar))
+            else:
+                missing.append(path)
+        merged.merge(collector)
+
+        graphs[name] = {
+            "graph": graph_base + name,
+            "dataset": dataset,
+            "triples": collector.triples,
+            "distinct_subjects": hll_estimate(collector.subjects),
+            "files": len(files),
+            "bytes": sum(os.path.getsize(f) for f in files),
+            "summary": collector.summary(),
+        }
+        totals = datasets.setdefault(dataset, {"triples": 0, "files": 0, "bytes": 0, "graphs": []})
+        for key in ("triples", "files", "bytes"):
+            totals[key] += graphs[name][key]
+        totals["graphs"].append(graphs[name]["graph"])
+
+    document = merged.summary()
+    document["graphs"] = {name: {k: v for k, v in info.items() if k != "summary"} for name, info in graphs.items()}
+    document["datasets"] = datasets
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "void.ttl"), "w", encoding="utf-8") as fh:
+        fh.write(void_turtle(graphs))
+    os.makedirs(os.path.dirname(statistics_path), exist_ok=True)
+    with open(statistics_path, "w", encoding="utf-8") as fh:
+        json.dump(document, fh)
+
+    print(f"Statistics for {len(graphs)} graphs, {merged.triples} triples -> {statistics_path}")
+    if missing:
+        print(f"   {len(missing)} files have no statistics sidecar (written before statistics existed?)")
+    return document
+
+
+if __name__ == "__main__":
+    build_void()
@@ -0,0 +1,55 @@
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    id TEXT PRIMARY KEY,
+    last_modified TEXT,
+    digest TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class WatermarkStore:
+    """
+    Per-record `lastModified` and content digest of everything already converted,
+    kept in SQLite so incremental runs only emit records that changed since.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True) if os.path.exists(path) else None
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(SCHEMA)
+
+    def get(self, record_id):
+        """(last_modified, digest) of a record, or None if it was never seen."""
+        if self._conn is None:
+            return None
+        return self._conn.execute(
+            "SELECT last_modified, digest FROM watermarks WHERE id = ?", (record_id,)
+        ).fetchone()
+
+    def update(self, marks):
+        """Stores (id, last_modified, digest) rows; an older last_modified never replaces a newer one."""
+        self._conn.executemany(
+            "INSERT INTO watermarks VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET last_modified = excluded.last_modified, digest = excluded.digest "
+            "WHERE watermarks.last_modified IS NULL OR excluded.last_modified >= watermarks.last_modified",
+            marks
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM watermarks").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
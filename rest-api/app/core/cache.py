@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+_registry: List["LRUCache"] = []
+_reload_hooks: List[Callable[[], None]] = []
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache.
+    Capacity is measured in entries, or in the sum of `weigher(value)` when a weigher is given.
+    """
+
+    def __init__(self, maxsize: int, weigher: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self._weigher = weigher or (lambda _: 1)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        hits = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    hits[key] = self._data[key]
+        return hits
+
+    def put(self, key: Hashable, value: Any) -> None:
+        weight = self._weigher(value)
+        with self._lock:
+            if key in self._data:
+                self._total -= self._weights.pop(key)
+                del self._data[key]
+            if weight > self.maxsize:
+                return
+            self._data[key] = value
+            self._weights[key] = weight
+            self._total += weight
+            while self._total > self.maxsize:
+                old_key, _ = self._data.popitem(last=False)
+                self._total -= self._weights.pop(old_key)
+
+    def items(self) -> List[tuple]:
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self._total = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def register_reload_hook(hook: Callable[[], None]) -> None:
+    """Registers a callback that drops state derived from the data (loaded indexes, statistics)."""
+    _reload_hooks.append(hook)
+
+
+def invalidate_all_caches() -> None:
+    """Drops every cached entry, e.g. after the triple store has been reloaded."""
+    for cache in _registry:
+        cache.clear()
+    for hook in _reload_hooks:
+        hook()
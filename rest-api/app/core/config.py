@@ -22,3 +22,68 @@ PREFIX davi-meta: <https://purl.org/davi/vocab/meta#>
 PREFIX davi-nist: <https://purl.org/davi/vocab/nist#>
 PREFIX davi-mov: <https://purl.org/davi/vocab/movielens#>
 """
+
+# Connection discovery (bidirectional BFS)
+PATH_MAX_DEPTH = int(os.getenv("PATH_MAX_DEPTH", "6"))
+PATH_FRONTIER_BATCH_SIZE = int(os.getenv("PATH_FRONTIER_BATCH_SIZE", "100"))
+PATH_EXPANSION_LIMIT = int(os.getenv("PATH_EXPANSION_LIMIT", "5000"))
+
+# Label resolution
+LABEL_CACHE_SIZE = int(os.getenv("LABEL_CACHE_SIZE", "200000"))
+LABEL_BATCH_SIZE = int(os.getenv("LABEL_BATCH_SIZE", "200"))
+# Preferred label languages, best first. An empty entry matches untagged literals.
+LABEL_LANGUAGES = [lang.strip() for lang in os.getenv("LABEL_LANGUAGES", "en,").split(",")]
+# Small vocabularies whose labels are loaded into the cache on startup.
+LABEL_PRELOAD_CLASSES = [
+    c.strip() for c in os.getenv(
+        "LABEL_PRELOAD_CLASSES",
+        "https://purl.org/davi/vocab/nist#Weakness,https://purl.org/davi/vocab/movielens#GenomeTag"
+    ).split(",") if c.strip()
+]
+
+# Offline indexes built by the jobs in app/jobs
+INDEX_DIR = os.getenv("INDEX_DIR", "indexes")
+
+# Node importance (degree / PageRank / hub scores)
+IMPORTANCE_INDEX_PATH = os.getenv("IMPORTANCE_INDEX_PATH", os.path.join(INDEX_DIR, "node_importance.npz"))
+IMPORTANCE_METRIC = os.getenv("IMPORTANCE_METRIC", "pagerank")
+IMPORTANCE_SCALE = float(os.getenv("IMPORTANCE_SCALE", "9.0"))
+
+# N-way comparison
+COMPARE_MAX_ENTITIES = int(os.getenv("COMPARE_MAX_ENTITIES", "20"))
+
+# Similarity search (MinHash/LSH)
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", os.path.join(INDEX_DIR, "similarity"))
+SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", "20000"))
+
+# Dataset statistics used for query planning and dataset sizes. Written by app.jobs.predicate_statistics
+# or, at ingestion time, by prep/scripts/void_stats.py: give both the same STATISTICS_PATH
+STATISTICS_PATH = os.getenv("STATISTICS_PATH", os.path.join(INDEX_DIR, "statistics.json"))
+
+# Full-text index backing CONTAINS / NOT_CONTAINS filters
+FULLTEXT_INDEX_PATH = os.getenv("FULLTEXT_INDEX_PATH", os.path.join(INDEX_DIR, "fulltext.sqlite"))
+# Most index matches a CONTAINS / NOT_CONTAINS filter inlines as a VALUES or NOT IN list; above, every value is tested
+FULLTEXT_MAX_CANDIDATES = int(os.getenv("FULLTEXT_MAX_CANDIDATES", "5000"))
+
+# Typeahead / autocomplete
+TYPEAHEAD_MAX_VIEWS = int(os.getenv("TYPEAHEAD_MAX_VIEWS", "8"))
+TYPEAHEAD_LABELS_PATH = os.getenv("TYPEAHEAD_LABELS_PATH", os.path.join(INDEX_DIR, "typeahead.sqlite"))
+TYPEAHEAD_PAGE_SIZE = int(os.getenv("TYPEAHEAD_PAGE_SIZE", "100000"))
+# Words after the first one that are also indexed, so "story" finds "Toy Story"
+TYPEAHEAD_MAX_WORDS = int(os.getenv("TYPEAHEAD_MAX_WORDS", "6"))
+
+# Filter candidate-set cache
+# Largest subject set that is cached (and injected back as a VALUES block)
+FILTER_CACHE_MAX_SET = int(os.getenv("FILTER_CACHE_MAX_SET", "5000"))
+# Total number of cached subject URIs across all entries
+FILTER_CACHE_BUDGET = int(os.getenv("FILTER_CACHE_BUDGET", "1000000"))
+
+# Facet value catalogs
+FACET_CATALOG_PATH = os.getenv("FACET_CATALOG_PATH", os.path.join(INDEX_DIR, "facets.sqlite"))
+FACET_CATALOG_MAX_VALUES = int(os.getenv("FACET_CATALOG_MAX_VALUES", "100000"))
+FACET_REBUILD_ON_RELOAD = os.getenv("FACET_REBUILD_ON_RELOAD", "true").lower() == "true"
+
+# Batch filtering
+FILTER_BATCH_MAX_REQUESTS = int(os.getenv("FILTER_BATCH_MAX_REQUESTS", "50"))
+# Concurrent SPARQL executions per batch
+FILTER_BATCH_WORKERS = int(os.getenv("FILTER_BATCH_WORKERS", "4"))
@@ -1,8 +1,14 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+from SPARQLWrapper import SPARQLWrapper, JSON, POST
 from app.core.config import FUSEKI_ENDPOINT, PREFIXES
 
+# Batched VALUES queries quickly outgrow the URL length accepted by GET requests.
+MAX_GET_QUERY_LENGTH = 2000
+
+
 def run_sparql(query: str):
     sparql = SPARQLWrapper(FUSEKI_ENDPOINT)
     sparql.setQuery(PREFIXES + query)
     sparql.setReturnFormat(JSON)
+    if len(query) > MAX_GET_QUERY_LENGTH:
+        sparql.setMethod(POST)
     return sparql.query().convert()["results"]["bindings"]
@@ -0,0 +1,86 @@
+"""
+Offline job precomputing facet value catalogs.
+
+For every dimension declared on a DataView (davi-meta:hasDimension), stores its distinct
+values with counts and resolved labels in a SQLite file, indexed for prefix search and
+paging by popularity.
+
+Usage: python -m app.jobs.facet_catalogs
+"""
+import logging
+import os
+import sqlite3
+
+from app.core.config import FACET_CATALOG_PATH, FACET_CATALOG_MAX_VALUES
+from app.core.sparql import run_sparql
+from app.services.datasets_service import get_view_analytics_config
+from app.services.label_service import resolve_labels
+from app.utils.helpers import unpack_sparql_row
+from app.utils.sparql_queries import build_all_views_query, build_facet_values_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("facet-catalogs")
+
+SCHEMA = """
+CREATE TABLE facet_values (
+    view TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    label TEXT NOT NULL,
+    label_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (view, dimension, rank)
+) WITHOUT ROWID;
+CREATE INDEX facet_values_prefix ON facet_values (view, dimension, label_key);
+"""
+
+
+def label_key(label: str) -> str:
+    return " ".join(label.casefold().split())
+
+
+def _catalog_rows(view_uri: str, dimension: str, target_class: str):
+    rows = run_sparql(build_facet_values_query(dimension, target_class, FACET_CATALOG_MAX_VALUES))
+    values = [(unpack_sparql_row(r, "value"), unpack_sparql_row(r, "count", 0, int)) for r in rows]
+    labels = resolve_labels(value for value, _ in values)
+
+    for rank, (value, count) in enumerate(values):
+        label = labels.get(value) or (value.split("#")[-1].split("/")[-1] if value.startswith("http") else value)
+        yield view_uri, dimension, rank, value, label, label_key(label), count
+
+
+def build_facet_catalogs(output_path: str = FACET_CATALOG_PATH) -> None:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.executescript(SCHEMA)
+
+    for row in run_sparql(build_all_views_query()):
+        view_uri = unpack_sparql_row(row, "view")
+        target_class = unpack_sparql_row(row, "targetClass")
+        dimensions, _ = get_view_analytics_config(view_uri)
+
+        for dim in dimensions:
+            try:
+                conn.executemany(
+                    "INSERT INTO facet_values VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    _catalog_rows(view_uri, dim.uri, target_class)
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error("Failed to build catalog for %s / %s: %s", view_uri, dim.uri, e)
+
+        logger.info("Built %d facet catalogs for %s", len(dimensions), view_uri)
+
+    conn.close()
+    os.replace(tmp_path, output_path)
+    logger.info("Wrote facet catalogs → %s", output_path)
+
+
+if __name__ == "__main__":
+    build_facet_catalogs()
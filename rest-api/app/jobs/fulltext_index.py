@@ -0,0 +1,77 @@
+"""
+Offline job building the SQLite FTS5 index used to resolve CONTAINS / NOT_CONTAINS filters.
+
+Labels, names and descriptions are indexed with the trigram tokenizer, which supports
+case-insensitive substring matching.
+
+Usage: python -m app.jobs.fulltext_index
+"""
+import logging
+import os
+import sqlite3
+from typing import List
+
+from app.core.config import FULLTEXT_INDEX_PATH
+from app.core.sparql import run_sparql
+from app.utils.helpers import unpack_sparql_row
+from app.utils.sparql_queries import build_literal_page_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("fulltext-index")
+
+FULLTEXT_PREDICATES = [
+    "http://www.w3.org/2000/01/rdf-schema#label",
+    "http://schema.org/name",
+    "http://www.w3.org/2004/02/skos/core#prefLabel",
+    "http://www.w3.org/2004/02/skos/core#altLabel",
+    "http://schema.org/description",
+    "https://purl.org/davi/vocab/movielens#tagContent",
+    "https://purl.org/davi/vocab/nist#cpe23",
+]
+
+PAGE_SIZE = 100000
+
+
+def build_fulltext_index(output_path: str = FULLTEXT_INDEX_PATH, predicates: List[str] = FULLTEXT_PREDICATES):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(
+        "CREATE VIRTUAL TABLE documents USING fts5(subject UNINDEXED, predicate UNINDEXED, text, tokenize='trigram')"
+    )
+    conn.execute("CREATE TABLE predicates (uri TEXT PRIMARY KEY)")
+
+    for predicate in predicates:
+        offset = 0
+        total = 0
+        while True:
+            rows = run_sparql(build_literal_page_query(predicate, PAGE_SIZE, offset))
+            conn.executemany(
+                "INSERT INTO documents (subject, predicate, text) VALUES (?, ?, ?)",
+                ((unpack_sparql_row(r, "s"), predicate, unpack_sparql_row(r, "o")) for r in rows)
+            )
+            total += len(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        conn.execute("INSERT INTO predicates (uri) VALUES (?)", (predicate,))
+        conn.commit()
+        logger.info("Indexed %d values of %s", total, predicate)
+
+    conn.execute("INSERT INTO documents (documents) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+    # Readers never see a half-built index
+    os.replace(tmp_path, output_path)
+    logger.info("Wrote full-text index → %s", output_path)
+
+
+if __name__ == "__main__":
+    build_fulltext_index()
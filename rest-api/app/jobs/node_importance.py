@@ -0,0 +1,134 @@
+"""
+Offline job computing node importance scores for graph sizing.
+
+Builds a sparse adjacency matrix from selected edge predicates in the triple store,
+computes degree, PageRank and hub (HITS) scores and stores them in a compact,
+array-backed index that the API loads at runtime.
+
+Usage: python -m app.jobs.node_importance
+"""
+import logging
+import os
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.core.config import IMPORTANCE_INDEX_PATH
+from app.core.sparql import run_sparql
+from app.utils.helpers import unpack_sparql_row
+from app.utils.sparql_queries import build_edge_page_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("node-importance")
+
+EDGE_PREDICATES = [
+    "https://purl.org/davi/vocab/nist#hasWeakness",      # CVE -> CWE
+    "https://purl.org/davi/vocab/nist#affectsSoftware",  # CVE -> CPE
+    "http://www.w3.org/2004/02/skos/core#broader",       # CWE -> parent CWE
+    "http://schema.org/manufacturer",                    # CPE -> vendor
+    "http://schema.org/genre",                           # Movie -> genre
+    "http://schema.org/itemReviewed",                    # Rating -> Movie
+]
+
+PAGE_SIZE = 100000
+
+
+def fetch_edges(predicate: str) -> Iterator[Tuple[str, str]]:
+    offset = 0
+    while True:
+        rows = run_sparql(build_edge_page_query(predicate, PAGE_SIZE, offset))
+        for row in rows:
+            yield unpack_sparql_row(row, "s"), unpack_sparql_row(row, "o")
+        if len(rows) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+def build_adjacency(predicates: List[str]) -> Tuple[List[str], sparse.csr_matrix]:
+    node_ids: Dict[str, int] = {}
+    rows, cols = array("i"), array("i")
+
+    for predicate in predicates:
+        before = len(rows)
+        for s_uri, o_uri in fetch_edges(predicate):
+            rows.append(node_ids.setdefault(s_uri, len(node_ids)))
+            cols.append(node_ids.setdefault(o_uri, len(node_ids)))
+        logger.info("Loaded %d edges for %s", len(rows) - before, predicate)
+
+    n = len(node_ids)
+    data = np.ones(len(rows), dtype=np.float32)
+    adj = sparse.csr_matrix(
+        (data, (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=(n, n)
+    )
+    # Parallel edges (same pair through several predicates) count once
+    adj.data[:] = 1.0
+
+    return list(node_ids.keys()), adj
+
+
+def degree_scores(adj: sparse.csr_matrix) -> np.ndarray:
+    out_deg = np.asarray(adj.sum(axis=1)).ravel()
+    in_deg = np.asarray(adj.sum(axis=0)).ravel()
+    return out_deg + in_deg
+
+
+def pagerank(adj: sparse.csr_matrix, damping: float = 0.85, tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+    n = adj.shape[0]
+    out_deg = np.asarray(adj.sum(axis=1)).ravel()
+    inv_out = np.divide(1.0, out_deg, out=np.zeros_like(out_deg), where=out_deg > 0)
+    transition_t = (sparse.diags(inv_out) @ adj).T.tocsr()
+    dangling = out_deg == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new_rank = damping * (transition_t @ rank + rank[dangling].sum() / n) + (1.0 - damping) / n
+        if np.abs(new_rank - rank).sum() < tol:
+            return new_rank
+        rank = new_rank
+    return rank
+
+
+def hub_scores(adj: sparse.csr_matrix, tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+    n = adj.shape[0]
+    adj_t = adj.T.tocsr()
+    hubs = np.full(n, 1.0 / np.sqrt(n))
+    for _ in range(max_iter):
+        authorities = adj_t @ hubs
+        authorities /= np.linalg.norm(authorities) or 1.0
+        new_hubs = adj @ authorities
+        new_hubs /= np.linalg.norm(new_hubs) or 1.0
+        if np.abs(new_hubs - hubs).sum() < tol:
+            return new_hubs
+        hubs = new_hubs
+    return hubs
+
+
+def _normalize(scores: np.ndarray) -> np.ndarray:
+    top = scores.max() if scores.size else 0.0
+    return (scores / top if top > 0 else scores).astype(np.float32)
+
+
+def build_importance_index(output_path: str = IMPORTANCE_INDEX_PATH, predicates: List[str] = EDGE_PREDICATES):
+    uris, adj = build_adjacency(predicates)
+    if not uris:
+        logger.warning("No edges found, index not written")
+        return
+
+    logger.info("Computing scores for %d nodes / %d edges", len(uris), adj.nnz)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    np.savez_compressed(
+        output_path,
+        uris=np.frombuffer("\n".join(uris).encode("utf-8"), dtype=np.uint8),
+        degree=_normalize(degree_scores(adj)),
+        pagerank=_normalize(pagerank(adj)),
+        hub=_normalize(hub_scores(adj)),
+    )
+    logger.info("Wrote importance index → %s", output_path)
+
+
+if __name__ == "__main__":
+    build_importance_index()
@@ -0,0 +1,52 @@
+"""
+Offline job collecting per-predicate and per-class statistics of the loaded data,
+used by the filter query planner for selectivity estimates.
+
+Usage: python -m app.jobs.predicate_statistics
+"""
+import json
+import logging
+import os
+
+from app.core.config import STATISTICS_PATH
+from app.core.sparql import run_sparql
+from app.utils.helpers import unpack_sparql_row
+from app.utils.sparql_queries import build_predicate_statistics_query, build_class_statistics_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("predicate-statistics")
+
+
+def collect_statistics() -> dict:
+    predicates = {}
+    for row in run_sparql(build_predicate_statistics_query()):
+        predicates[unpack_sparql_row(row, "p")] = {
+            "triples": unpack_sparql_row(row, "triples", 0, int),
+            "distinct_subjects": unpack_sparql_row(row, "subjects", 0, int),
+            "distinct_objects": unpack_sparql_row(row, "objects", 0, int),
+        }
+
+    classes = {}
+    for row in run_sparql(build_class_statistics_query()):
+        classes[unpack_sparql_row(row, "c")] = {"instances": unpack_sparql_row(row, "instances", 0, int)}
+
+    return {"predicates": predicates, "classes": classes}
+
+
+def write_statistics(output_path: str = STATISTICS_PATH) -> None:
+    stats = collect_statistics()
+    if os.path.exists(output_path):
+        # Keep what only ingestion knows (per-dataset sizes, graphs), replace the counts
+        with open(output_path, encoding="utf-8") as fh:
+            previous = json.load(fh)
+        stats = {**{k: v for k, v in previous.items() if k not in stats}, **stats}
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as fh:
+        json.dump(stats, fh)
+    logger.info("Wrote statistics for %d predicates / %d classes → %s",
+                len(stats["predicates"]), len(stats["classes"]), output_path)
+
+
+if __name__ == "__main__":
+    write_statistics()
@@ -0,0 +1,94 @@
+"""
+Offline job building MinHash/LSH similarity indexes.
+
+For every DataView, the target-class resources are turned into sets of (property, value)
+tokens - the same pairs the compare extension matches on - and stored as MinHash signatures
+that the /similar endpoint loads into memory.
+
+Usage: python -m app.jobs.similarity_index
+"""
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Set
+
+import numpy as np
+
+from app.core.sparql import run_sparql
+from app.services.similarity_service import similarity_index_path
+from app.utils.helpers import unpack_sparql_row
+from app.utils.minhash import signature
+from app.utils.sparql_queries import (
+    build_all_views_query,
+    build_feature_page_query,
+    build_feature_path_page_query
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("similarity-index")
+
+# Predicates whose values are unique per resource and would only dilute the similarity
+EXCLUDED_PREDICATES = [
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#type",
+    "https://purl.org/davi/vocab/nist#hasCVSSMetric",
+    "http://schema.org/url",
+]
+
+# Extra features reachable through a property path, per target class
+EXTRA_FEATURE_PATHS = {
+    "http://schema.org/Movie": ["^davi-mov:isRelevantTo/davi-mov:hasGenomeTag"],
+}
+
+PAGE_SIZE = 100000
+
+
+def _paged(query_builder):
+    offset = 0
+    while True:
+        rows = run_sparql(query_builder(offset))
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+def collect_feature_sets(class_uri: str) -> Dict[str, Set[str]]:
+    features: Dict[str, Set[str]] = defaultdict(set)
+
+    for row in _paged(lambda off: build_feature_page_query(class_uri, EXCLUDED_PREDICATES, PAGE_SIZE, off)):
+        features[unpack_sparql_row(row, "s")].add(f"{unpack_sparql_row(row, 'p')} {unpack_sparql_row(row, 'o')}")
+
+    for path in EXTRA_FEATURE_PATHS.get(class_uri, []):
+        for row in _paged(lambda off: build_feature_path_page_query(class_uri, path, PAGE_SIZE, off)):
+            features[unpack_sparql_row(row, "s")].add(f"{path} {unpack_sparql_row(row, 'o')}")
+
+    return features
+
+
+def build_similarity_index(class_uri: str) -> None:
+    features = collect_feature_sets(class_uri)
+    if not features:
+        logger.warning("No features for %s, skipping", class_uri)
+        return
+
+    uris = list(features.keys())
+    signatures = np.vstack([signature(features[uri]) for uri in uris])
+
+    path = similarity_index_path(class_uri)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(
+        path,
+        uris=np.frombuffer("\n".join(uris).encode("utf-8"), dtype=np.uint8),
+        signatures=signatures
+    )
+    logger.info("Wrote similarity index for %s (%d resources) → %s", class_uri, len(uris), path)
+
+
+def build_all_similarity_indexes() -> None:
+    classes = {unpack_sparql_row(row, "targetClass") for row in run_sparql(build_all_views_query())}
+    for class_uri in sorted(classes):
+        build_similarity_index(class_uri)
+
+
+if __name__ == "__main__":
+    build_all_similarity_indexes()
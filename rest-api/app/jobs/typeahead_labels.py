@@ -0,0 +1,78 @@
+"""
+Offline job precomputing the label catalog behind the typeahead endpoint.
+
+For every DataView, stores the best label of each instance of its target class in a
+SQLite file; the API builds its in-memory prefix index from it on first use of a view.
+
+Usage: python -m app.jobs.typeahead_labels
+"""
+import logging
+import os
+import sqlite3
+
+from app.core.config import TYPEAHEAD_LABELS_PATH, TYPEAHEAD_PAGE_SIZE
+from app.core.sparql import run_sparql
+from app.services.label_service import pick_best_labels
+from app.utils.helpers import unpack_sparql_row
+from app.utils.sparql_queries import build_all_views_query, build_class_labels_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("typeahead-labels")
+
+SCHEMA = """
+CREATE TABLE views (uri TEXT PRIMARY KEY);
+CREATE TABLE labels (
+    view TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (view, uri)
+) WITHOUT ROWID;
+"""
+
+
+def _class_labels(class_uri: str) -> dict:
+    rows, offset = [], 0
+    while True:
+        page = run_sparql(build_class_labels_query(class_uri, TYPEAHEAD_PAGE_SIZE, offset))
+        rows.extend(page)
+        if len(page) < TYPEAHEAD_PAGE_SIZE:
+            break
+        offset += TYPEAHEAD_PAGE_SIZE
+    return pick_best_labels(rows)
+
+
+def build_typeahead_labels(output_path: str = TYPEAHEAD_LABELS_PATH) -> None:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.executescript(SCHEMA)
+
+    for row in run_sparql(build_all_views_query()):
+        view_uri = unpack_sparql_row(row, "view")
+        target_class = unpack_sparql_row(row, "targetClass")
+        try:
+            labels = _class_labels(target_class)
+            conn.executemany(
+                "INSERT OR IGNORE INTO labels VALUES (?, ?, ?)",
+                ((view_uri, uri, label) for uri, label in labels.items())
+            )
+            conn.execute("INSERT OR IGNORE INTO views (uri) VALUES (?)", (view_uri,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to collect labels for %s: %s", view_uri, e)
+            continue
+        logger.info("Collected %d labels for %s", len(labels), view_uri)
+
+    conn.close()
+    # Readers never see a half-built catalog
+    os.replace(tmp_path, output_path)
+    logger.info("Wrote typeahead labels → %s", output_path)
+
+
+if __name__ == "__main__":
+    build_typeahead_labels()
@@ -55,6 +55,7 @@ class DatasetSchema(BaseModel):
     size_in_bytes: int
     number_of_files: int
     number_of_downloads: int
+    number_of_triples: Optional[int] = None
     added_date: Optional[str] = None
     uploaded_by: Optional[str] = None
     uploaded_by_url: Optional[str] = None
@@ -111,6 +112,32 @@ class GraphResponse(BaseModel):
     links: List[GraphLink]
 
 
+class EdgeDirection(str, Enum):
+    OUT = "out"
+    IN = "in"
+
+
+class NeighborhoodGroup(BaseModel):
+    predicate: str
+    label: str
+    direction: EdgeDirection
+    count: int
+    collapsed: bool = False
+
+
+class NeighborhoodSummaryResponse(BaseModel):
+    center_node: str
+    groups: List[NeighborhoodGroup]
+    graph: GraphResponse
+
+
+class NeighborhoodPage(BaseModel):
+    predicate: str
+    direction: EdgeDirection
+    graph: GraphResponse
+    next_cursor: Optional[str] = None
+
+
 class FilterOperator(str, Enum):
     EQUALS = "EQ"
     NOT_EQUALS = "NEQ"
@@ -140,6 +167,28 @@ class FilterResultItem(BaseModel):
     type: Optional[str] = None
     matches: Dict[str, Any] = {}
 
+class BatchFilterEntry(BaseModel):
+    id: str
+    request: FilterRequest
+
+class BatchFilterRequest(BaseModel):
+    requests: List[BatchFilterEntry]
+
+    @validator("requests")
+    def ids_must_be_unique(cls, v):
+        ids = [entry.id for entry in v]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Request ids must be unique within a batch")
+        return v
+
+class BatchFilterResult(BaseModel):
+    status: int = 200
+    items: List[FilterResultItem] = []
+    error: Optional[str] = None
+
+class BatchFilterResponse(BaseModel):
+    results: Dict[str, BatchFilterResult]
+
 class ComparisonItem(BaseModel):
     property_uri: str
     property_label: str
@@ -151,4 +200,44 @@ class ComparisonResponse(BaseModel):
     entity_b: str
     common_properties: List[ComparisonItem] = []
     unique_to_a: List[ComparisonItem] = []
-    unique_to_b: List[ComparisonItem] = []
\ No newline at end of file
+    unique_to_b: List[ComparisonItem] = []
+
+class SharedComparisonItem(ComparisonItem):
+    entities: List[str] = []
+
+class MultiComparisonResponse(BaseModel):
+    entities: List[str]
+    common_properties: List[ComparisonItem] = []
+    partially_shared: List[SharedComparisonItem] = []
+    unique: Dict[str, List[ComparisonItem]] = {}
+
+class SimilarItem(BaseModel):
+    uri: str
+    label: str
+    score: float
+
+class SimilarityResponse(BaseModel):
+    resource_uri: str
+    view_id: str
+    items: List[SimilarItem] = []
+
+class AutocompleteItem(BaseModel):
+    uri: str
+    label: str
+    score: float = 0.0
+
+class AutocompleteResponse(BaseModel):
+    view_id: str
+    query: str
+    items: List[AutocompleteItem] = []
+
+class FacetValue(BaseModel):
+    value: str
+    label: str
+    count: int
+
+class FacetValuesResponse(BaseModel):
+    view_id: str
+    dimension: str
+    total: int
+    items: List[FacetValue] = []
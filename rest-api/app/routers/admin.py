@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from app.core.cache import invalidate_all_caches
+
+router = APIRouter()
+
+
+@router.post("/reload")
+def notify_data_reload():
+    """
+    **Maintenance**
+    Call after (re)loading data into the triple store: drops cached filter results and labels,
+    and reloads the offline indexes on their next use.
+    """
+    invalidate_all_caches()
+    return {"status": "ok"}
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query, HTTPException
+from app.models.schemas import AutocompleteResponse
+from app.services.autocomplete_service import autocomplete
+
+router = APIRouter()
+
+
+@router.get("/", response_model=AutocompleteResponse)
+def get_suggestions(
+        view_id: str = Query(..., description="The View URI whose target class is searched (e.g. view_nist_cwe)"),
+        q: str = Query(..., description="The text typed so far"),
+        k: int = Query(10, ge=1, le=50, description="Number of suggestions")
+):
+    """
+    **Typeahead Extension**
+
+    Suggests resources of the View's target class whose label (`rdfs:label`, `schema:name`
+    or `skos:prefLabel`) starts with `q`, or has a word starting with `q`.
+    Suggestions are ranked by precomputed node importance.
+
+    The index of a View is built in memory on its first request.
+    """
+    try:
+        return autocomplete(view_id, q, k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, Query, HTTPException
-from app.services.compare_service import compare_entities
-from app.models.schemas import ComparisonResponse
+from app.services.compare_service import compare_entities, compare_many_entities
+from app.models.schemas import ComparisonResponse, MultiComparisonResponse
 
 router = APIRouter()
 
@@ -26,3 +26,25 @@ def compare_resources(
         return compare_entities(uri_a, uri_b, view_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/multi", response_model=MultiComparisonResponse)
+def compare_many_resources(
+        uris: List[str] = Query(..., description="Full URIs of the resources to compare (repeat the parameter)"),
+        view_id: Optional[str] = Query(None,
+                                       description="Optional: The View URI to use for label overrides.")
+):
+    """
+    **Compare Extension (N-way)**
+
+    Compares up to `COMPARE_MAX_ENTITIES` RDF resources at once (e.g. ten CVEs or movies).
+
+    Every property/value pair is reported as common to all resources, partially shared
+    (with the list of resources that have it) or unique to a single resource.
+    """
+    try:
+        return compare_many_entities(uris, view_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,28 @@
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+from app.models.schemas import FacetValuesResponse
+from app.services.facet_service import get_facet_values
+
+router = APIRouter()
+
+
+@router.get("/", response_model=FacetValuesResponse)
+def get_facet_catalog(
+        view_id: str = Query(..., description="The View URI (e.g. view_nist_cve)"),
+        dimension: str = Query(..., description="A dimension of the View, as listed in its `dimensions`"),
+        prefix: Optional[str] = Query(None, description="Optional: Only values whose label starts with this text"),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    **Facet Catalogs**
+
+    Serves the precomputed distinct values of a View dimension (e.g. vendors, CWE ids, genres)
+    with their counts and labels, most frequent first. Catalogs are rebuilt after each data reload.
+    """
+    try:
+        return get_facet_values(view_id, dimension, prefix, offset, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,8 @@
 import logging
 from fastapi import APIRouter, HTTPException, Body
 from typing import List
-from app.models.schemas import FilterRequest, FilterResultItem
-from app.services.filter_service import build_intelligent_query
+from app.models.schemas import FilterRequest, FilterResultItem, BatchFilterRequest, BatchFilterResponse
+from app.services.filter_service import build_intelligent_query, run_filter_batch
 
 logger = logging.getLogger(__name__)
 
@@ -32,4 +32,26 @@ def intelligent_search(
     try:
         return build_intelligent_query(request)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"SPARQL Generation Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"SPARQL Generation Error: {str(e)}")
+
+
+@router.post("/batch", response_model=BatchFilterResponse)
+def batch_search(
+    batch: BatchFilterRequest = Body(..., description="Several `/advanced` requests, each with a unique id.")
+):
+    """
+    **Batch Filtering Extension**
+
+    Runs several filter requests (e.g. one per dashboard panel) in a single call.
+    Identical requests are executed once and the rest run concurrently.
+
+    Results are keyed by request id. A failing request gets its own `status` and `error`
+    without failing the rest of the batch.
+    """
+    try:
+        return run_filter_batch(batch)
+    except HTTPException:
+        # e.g. 400 for a batch over FILTER_BATCH_MAX_REQUESTS
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch Filtering Error: {str(e)}")
@@ -1,7 +1,13 @@
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, Query, HTTPException
-from app.models.schemas import GraphResponse
-from app.services.graph_service import get_node_neighborhood
+from app.core.config import PATH_MAX_DEPTH
+from app.models.schemas import GraphResponse, EdgeDirection, NeighborhoodSummaryResponse, NeighborhoodPage
+from app.services.graph_service import (
+    get_node_neighborhood,
+    find_connection_paths,
+    get_neighborhood_summary,
+    get_neighborhood_group_page
+)
 
 router = APIRouter()
 
@@ -19,3 +25,70 @@ def get_graph_neighborhood(
         return get_node_neighborhood(resource_uri, view_id, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/neighborhood/summary", response_model=NeighborhoodSummaryResponse)
+def get_graph_neighborhood_summary(
+    resource_uri: str = Query(..., description="The full URI of the center node"),
+    sample_size: int = Query(5, ge=0, le=100, description="Neighbours shown per predicate group."),
+    collapse_threshold: int = Query(50, ge=0, description="Groups larger than this become one aggregate node.")
+):
+    """
+    **Graph/Network Extension (Hub Mode)**
+    Summarizes the neighborhood of a hub node (e.g. CWE-79) by predicate and direction.
+
+    Every predicate group is represented: small groups are sampled, large ones are collapsed
+    into a single aggregate node (e.g. "2400 × Vulnerability"). Use `/neighborhood/group`
+    to page through a single group.
+    """
+    try:
+        return get_neighborhood_summary(resource_uri, sample_size, collapse_threshold)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/neighborhood/group", response_model=NeighborhoodPage)
+def get_graph_neighborhood_group(
+    resource_uri: str = Query(..., description="The full URI of the center node"),
+    predicate: str = Query(..., description="The predicate of the group to page through"),
+    direction: EdgeDirection = Query(..., description="`out` for center -> neighbour, `in` for neighbour -> center"),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` of the previous page"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    **Graph/Network Extension (Hub Mode)**
+    Fetches one page of a single predicate group of the neighborhood.
+    """
+    try:
+        return get_neighborhood_group_page(resource_uri, predicate, direction, cursor, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/path", response_model=GraphResponse)
+def get_connection_path(
+    source_uri: str = Query(..., description="The full URI of the first resource"),
+    target_uri: str = Query(..., description="The full URI of the second resource"),
+    max_depth: int = Query(4, ge=1, le=PATH_MAX_DEPTH, description="Maximum number of edges in a path."),
+    predicates: Optional[List[str]] = Query(None, description="Optional: Only traverse these predicates."),
+    time_budget_ms: int = Query(5000, ge=100, le=30000, description="Search time budget in milliseconds."),
+    max_paths: int = Query(5, ge=1, le=50)
+):
+    """
+    **Connection Discovery Extension**
+    Finds how two resources are connected (e.g. a CVE and a vendor through
+    `affectsSoftware`/`manufacturer`) using a bidirectional breadth-first search.
+
+    Returns the shortest path(s) found within the depth and time budget. If no path
+    is found, only the two endpoints are returned.
+    """
+    try:
+        return find_connection_paths(source_uri, target_uri, max_depth, predicates, time_budget_ms, max_paths)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query, HTTPException
+from app.models.schemas import SimilarityResponse
+from app.services.similarity_service import find_similar_resources
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SimilarityResponse)
+def get_similar_resources(
+        resource_uri: str = Query(..., description="Full URI of the reference resource"),
+        view_id: str = Query(..., description="The View URI whose target class is searched (e.g. view_nist_cve)"),
+        k: int = Query(10, ge=1, le=100, description="Number of neighbours to return")
+):
+    """
+    **Similarity Extension**
+
+    Finds the resources most similar to `resource_uri` within a View (e.g. CVEs with similar
+    CWE/CPE sets, or movies with similar genres and genome tags).
+
+    Scores are approximate Jaccard similarities of the resources' property/value sets,
+    served from a precomputed MinHash/LSH index.
+    """
+    try:
+        return find_similar_resources(resource_uri, view_id, k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,166 @@
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.core.cache import LRUCache, register_reload_hook
+from app.core.config import TYPEAHEAD_LABELS_PATH, TYPEAHEAD_MAX_VIEWS, TYPEAHEAD_MAX_WORDS
+from app.core.sparql import run_sparql
+from app.models.schemas import AutocompleteItem, AutocompleteResponse
+from app.services.importance_service import get_importance_index
+from app.utils.helpers import is_safe_uri
+from app.utils.sparql_queries import build_view_target_class_query
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalized label keys; a prefix maps to a contiguous range found by binary search.
+    Each key points at a resource, and ranges are ranked by precomputed node importance.
+    Built from the label catalog written by `app.jobs.typeahead_labels`.
+    """
+
+    def __init__(self, entries: List[Tuple[str, int]], uris: List[str], labels: List[str]):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.resource_ids = np.fromiter((rid for _, rid in entries), dtype=np.int32, count=len(entries))
+        self.uris = uris
+        self.labels = labels
+
+        importance = get_importance_index()
+        resource_scores = np.fromiter((importance.score(u) for u in uris), dtype=np.float32, count=len(uris))
+        self.scores = resource_scores[self.resource_ids] if len(entries) else np.empty(0, dtype=np.float32)
+
+    @classmethod
+    def from_labels(cls, labels_by_uri: dict) -> "PrefixIndex":
+        uris = list(labels_by_uri.keys())
+        labels = [labels_by_uri[u] for u in uris]
+        entries = []
+        for rid, label in enumerate(labels):
+            key = _normalize(label)
+            entries.append((key, rid))
+            words = key.split(" ")
+            for i in range(1, min(len(words), TYPEAHEAD_MAX_WORDS + 1)):
+                entries.append((" ".join(words[i:]), rid))
+        return cls(entries, uris, labels)
+
+    def search(self, prefix: str, k: int) -> List[Tuple[str, str, float]]:
+        prefix = _normalize(prefix)
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        if lo >= hi:
+            return []
+
+        scores = self.scores[lo:hi]
+        # A resource can match through several words; over-fetch before de-duplicating
+        want = min(hi - lo, k * 4)
+        if want < hi - lo:
+            top = np.argpartition(-scores, want - 1)[:want]
+        else:
+            top = np.arange(hi - lo)
+        # Highest importance first, then alphabetical
+        top = top[np.lexsort((top, -scores[top]))]
+
+        results, seen = [], set()
+        for pos in top:
+            rid = int(self.resource_ids[lo + pos])
+            if rid in seen:
+                continue
+            seen.add(rid)
+            results.append((self.uris[rid], self.labels[rid], float(scores[pos])))
+            if len(results) == k:
+                break
+        return results
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+_indexes = LRUCache(maxsize=TYPEAHEAD_MAX_VIEWS)
+_local = threading.local()
+_lock = threading.Lock()
+# One lock per view being built, so a slow view does not hold up the others
+_view_locks: Dict[str, threading.Lock] = {}
+# Bumped on reload so every thread reopens the (possibly replaced) label catalog
+_generation = 0
+
+
+def _reset() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+register_reload_hook(_reset)
+
+
+def _connection() -> Optional[sqlite3.Connection]:
+    if not os.path.exists(TYPEAHEAD_LABELS_PATH):
+        return None
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(f"file:{TYPEAHEAD_LABELS_PATH}?mode=ro", uri=True)
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+def _build_index(view_id: str) -> PrefixIndex:
+    if not run_sparql(build_view_target_class_query(view_id)):
+        raise HTTPException(status_code=404, detail="View not found")
+
+    conn = _connection()
+    if conn is None or conn.execute("SELECT 1 FROM views WHERE uri = ?", (view_id,)).fetchone() is None:
+        logger.warning("No typeahead labels for %s in %s, run app.jobs.typeahead_labels", view_id, TYPEAHEAD_LABELS_PATH)
+        labels = {}
+    else:
+        labels = dict(conn.execute("SELECT uri, label FROM labels WHERE view = ?", (view_id,)))
+
+    index = PrefixIndex.from_labels(labels)
+    logger.info("Built typeahead index for %s (%d keys)", view_id, len(index))
+    return index
+
+
+def _get_index(view_id: str) -> PrefixIndex:
+    index = _indexes.get(view_id)
+    if index is not None:
+        return index
+
+    with _lock:
+        view_lock = _view_locks.setdefault(view_id, threading.Lock())
+    with view_lock:
+        try:
+            index = _indexes.get(view_id)
+            if index is None:
+                index = _build_index(view_id)
+                _indexes.put(view_id, index)
+        finally:
+            with _lock:
+                _view_locks.pop(view_id, None)
+    return index
+
+
+def autocomplete(view_id: str, query: str, k: int = 10) -> AutocompleteResponse:
+    if not is_safe_uri(view_id):
+        raise HTTPException(status_code=400, detail="Invalid View URI")
+
+    items = []
+    if query.strip():
+        items = [
+            AutocompleteItem(uri=uri, label=label, score=score)
+            for uri, label, score in _get_index(view_id).search(query, k)
+        ]
+
+    return AutocompleteResponse(view_id=view_id, query=query, items=items)
@@ -1,80 +1,142 @@
 from collections import defaultdict
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+from fastapi import HTTPException
+
+from app.core.config import COMPARE_MAX_ENTITIES
 from app.core.sparql import run_sparql
-from app.models.schemas import ComparisonResponse, ComparisonItem
+from app.models.schemas import ComparisonResponse, ComparisonItem, MultiComparisonResponse, SharedComparisonItem
+from app.services.label_service import resolve_labels
+from app.utils.helpers import is_safe_uri
 from app.utils.sparql_queries import build_comparison_query, build_view_config_query
 
 
 def compare_entities(uri_a: str, uri_b: str, view_id: Optional[str] = None) -> ComparisonResponse:
-    query = build_comparison_query(uri_a, uri_b)
-    results = run_sparql(query)
+    items, presence = _build_presence_matrix([uri_a, uri_b], view_id)
+
+    common = []
+    unique_a = []
+    unique_b = []
+
+    for key, mask in presence.items():
+        if mask == 0b11:
+            common.append(items[key])
+        elif mask == 0b01:
+            unique_a.append(items[key])
+        else:
+            unique_b.append(items[key])
+
+    common.sort(key=lambda x: x.property_label)
+    unique_a.sort(key=lambda x: x.property_label)
+    unique_b.sort(key=lambda x: x.property_label)
+
+    return ComparisonResponse(
+        entity_a=uri_a,
+        entity_b=uri_b,
+        common_properties=common,
+        unique_to_a=unique_a,
+        unique_to_b=unique_b
+    )
+
+
+def compare_many_entities(uris: List[str], view_id: Optional[str] = None) -> MultiComparisonResponse:
+    """
+    N-way comparison: every (property, value) pair is classified as common to all entities,
+    shared by some of them, or unique to one.
+    """
+    entities = list(dict.fromkeys(uris))
+    if len(entities) < 2:
+        raise HTTPException(status_code=400, detail="At least two distinct resources are required")
+    if len(entities) > COMPARE_MAX_ENTITIES:
+        raise HTTPException(status_code=400, detail=f"At most {COMPARE_MAX_ENTITIES} resources can be compared")
+
+    items, presence = _build_presence_matrix(entities, view_id)
+    everyone = (1 << len(entities)) - 1
+
+    common = []
+    partial = []
+    unique = {uri: [] for uri in entities}
+
+    for key, mask in presence.items():
+        item = items[key]
+        if mask == everyone:
+            common.append(item)
+        elif mask & (mask - 1) == 0:
+            unique[entities[mask.bit_length() - 1]].append(item)
+        else:
+            partial.append(SharedComparisonItem(
+                **item.model_dump(),
+                entities=[uri for idx, uri in enumerate(entities) if mask >> idx & 1]
+            ))
+
+    common.sort(key=lambda x: x.property_label)
+    partial.sort(key=lambda x: (-len(x.entities), x.property_label))
+    for items_of_entity in unique.values():
+        items_of_entity.sort(key=lambda x: x.property_label)
+
+    return MultiComparisonResponse(
+        entities=entities,
+        common_properties=common,
+        partially_shared=partial,
+        unique=unique
+    )
+
+
+def _build_presence_matrix(
+        uris: List[str],
+        view_id: Optional[str]
+) -> Tuple[Dict[Tuple[str, str], ComparisonItem], Dict[Tuple[str, str], int]]:
+    """
+    Fetches all property/value pairs of `uris` in one query and builds the property x entity
+    presence matrix: one bitmask per (property, value), bit i set when uris[i] has it.
+    """
+    for uri in uris:
+        if not is_safe_uri(uri):
+            raise HTTPException(status_code=400, detail=f"Invalid Resource URI: {uri}")
+
+    results = run_sparql(build_comparison_query(uris))
+    labels = resolve_labels(
+        uri for row in results for uri in (row["p"]["value"], row["o"]["value"])
+    )
 
     view_labels_map = {}
     if view_id:
         view_labels_map = _get_view_label_overrides(view_id)
 
-    data_map = defaultdict(lambda: defaultdict(set))
-
-    prop_meta_map = {}
+    entity_bits: Dict[str, int] = defaultdict(int)
+    for idx, uri in enumerate(uris):
+        entity_bits[uri] |= 1 << idx
 
-    val_meta_map = {}
+    presence: Dict[Tuple[str, str], int] = defaultdict(int)
+    items: Dict[Tuple[str, str], ComparisonItem] = {}
 
     for row in results:
-        source = row["source"]["value"]  # "A" or "B"
         p_uri = row["p"]["value"]
         o_val = row["o"]["value"]
+        key = (p_uri, o_val)
+
+        presence[key] |= entity_bits[row["s"]["value"]]
+
+        if key in items:
+            continue
 
         if p_uri in view_labels_map:
             p_label = view_labels_map[p_uri]
         else:
-            p_label = row.get("pLabel", {}).get("value", p_uri.split("#")[-1].split("/")[-1])
+            p_label = labels.get(p_uri, p_uri.split("#")[-1].split("/")[-1])
 
-        prop_meta_map[p_uri] = p_label
-
-        o_label = row.get("oLabel", {}).get("value")
+        o_label = labels.get(o_val)
         if not o_label and "http" in o_val:
             o_label = o_val.split("#")[-1].split("/")[-1]
 
-        val_meta_map[(p_uri, o_val)] = o_label
-
-        data_map[p_uri][o_val].add(source)
-
-    common = []
-    unique_a = []
-    unique_b = []
+        items[key] = ComparisonItem(
+            property_uri=p_uri,
+            property_label=p_label,
+            value=o_val,
+            value_label=o_label
+        )
 
-    for p_uri, values_dict in data_map.items():
-        p_label_final = prop_meta_map[p_uri]
-
-        for val, sources in values_dict.items():
-            val_label_final = val_meta_map[(p_uri, val)]
-
-            item_obj = ComparisonItem(
-                property_uri=p_uri,
-                property_label=p_label_final,
-                value=val,
-                value_label=val_label_final
-            )
-
-            if "A" in sources and "B" in sources:
-                common.append(item_obj)
-            elif "A" in sources:
-                unique_a.append(item_obj)
-            elif "B" in sources:
-                unique_b.append(item_obj)
-
-    common.sort(key=lambda x: x.property_label)
-    unique_a.sort(key=lambda x: x.property_label)
-    unique_b.sort(key=lambda x: x.property_label)
-
-    return ComparisonResponse(
-        entity_a=uri_a,
-        entity_b=uri_b,
-        common_properties=common,
-        unique_to_a=unique_a,
-        unique_to_b=unique_b
-    )
+    return items, presence
 
 
 def _get_view_label_overrides(view_id: str) -> dict:
@@ -3,6 +3,7 @@ from app.models.schemas import (
     DatasetSchema, DataViewSchema, VisualizationModule,
     VisualizationOption, AnalyzableProperty
 )
+from app.services.statistics_service import get_statistics
 from app.utils.helpers import unpack_sparql_row
 from app.utils.sparql_queries import (
     build_all_datasets_query,
@@ -22,19 +23,7 @@ def datasets_get_all_query() -> list[DatasetSchema]:
 
         views = _get_views_for_dataset(ds_uri)
 
-        datasets.append(DatasetSchema(
-            id=unpack_sparql_row(row, "id"),
-            name=unpack_sparql_row(row, "name"),
-            description=unpack_sparql_row(row, "desc"),
-            url=unpack_sparql_row(row, "url"),
-            added_date=unpack_sparql_row(row, "date"),
-            size_in_bytes=unpack_sparql_row(row, "sizeBytes", 0, int),
-            number_of_files=unpack_sparql_row(row, "numFiles", 0, int),
-            number_of_downloads=unpack_sparql_row(row, "numDownloads", 0, int),
-            uploaded_by=unpack_sparql_row(row, "uploadedBy"),
-            uploaded_by_url=unpack_sparql_row(row, "uploadedByUrl"),
-            views=views
-        ))
+        datasets.append(_build_dataset(row, views))
     return datasets
 
 
@@ -49,15 +38,24 @@ def dataset_get_by_id_query(dataset_id: str) -> DatasetSchema | None:
     ds_uri = unpack_sparql_row(row, "ds")
     views = _get_views_for_dataset(ds_uri)
 
+    return _build_dataset(row, views)
+
+
+def _build_dataset(row, views: list[DataViewSchema]) -> DatasetSchema:
+    dataset_id = unpack_sparql_row(row, "id")
+    # Sizes measured at ingestion take precedence over the ones declared in the registry
+    measured = get_statistics().dataset(dataset_id) or {}
+
     return DatasetSchema(
-        id=unpack_sparql_row(row, "id"),
+        id=dataset_id,
         name=unpack_sparql_row(row, "name"),
         description=unpack_sparql_row(row, "desc"),
         url=unpack_sparql_row(row, "url"),
         added_date=unpack_sparql_row(row, "date"),
-        size_in_bytes=unpack_sparql_row(row, "sizeBytes", 0, int),
-        number_of_files=unpack_sparql_row(row, "numFiles", 0, int),
+        size_in_bytes=measured.get("bytes", unpack_sparql_row(row, "sizeBytes", 0, int)),
+        number_of_files=measured.get("files", unpack_sparql_row(row, "numFiles", 0, int)),
         number_of_downloads=unpack_sparql_row(row, "numDownloads", 0, int),
+        number_of_triples=measured.get("triples"),
         uploaded_by=unpack_sparql_row(row, "uploadedBy"),
         uploaded_by_url=unpack_sparql_row(row, "uploadedByUrl"),
         views=views
@@ -71,7 +69,7 @@ def _get_views_for_dataset(dataset_uri: str) -> list[DataViewSchema]:
     for r in rows:
         view_uri = unpack_sparql_row(r, "view")
 
-        dims, metrics = _get_view_analytics_config(view_uri)
+        dims, metrics = get_view_analytics_config(view_uri)
         viz_modules = _get_view_visualizations(view_uri)
 
         views.append(DataViewSchema(
@@ -88,7 +86,7 @@ def _get_views_for_dataset(dataset_uri: str) -> list[DataViewSchema]:
     return views
 
 
-def _get_view_analytics_config(view_uri: str):
+def get_view_analytics_config(view_uri: str):
     rows = run_sparql(build_view_config_query(view_uri))
     dims_map = {}
     metrics_map = {}
@@ -0,0 +1,91 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.cache import register_reload_hook
+from app.core.config import FACET_CATALOG_PATH, FACET_REBUILD_ON_RELOAD
+from app.jobs.facet_catalogs import build_facet_catalogs, label_key
+from app.models.schemas import FacetValue, FacetValuesResponse
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_lock = threading.Lock()
+# Bumped whenever the catalog file is replaced, so every thread reopens it
+_generation = 0
+_rebuild_thread: Optional[threading.Thread] = None
+
+
+def _connection() -> Optional[sqlite3.Connection]:
+    if not os.path.exists(FACET_CATALOG_PATH):
+        return None
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(f"file:{FACET_CATALOG_PATH}?mode=ro", uri=True)
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+def _rebuild() -> None:
+    global _generation
+    try:
+        build_facet_catalogs()
+    except Exception as e:
+        logger.error("Facet catalog rebuild failed: %s", e)
+    with _lock:
+        _generation += 1
+
+
+def schedule_rebuild() -> None:
+    """Rebuilds the catalogs in the background; a rebuild already in progress is not restarted."""
+    global _rebuild_thread
+    with _lock:
+        if _rebuild_thread is not None and _rebuild_thread.is_alive():
+            return
+        _rebuild_thread = threading.Thread(target=_rebuild, name="facet-catalog-rebuild", daemon=True)
+        _rebuild_thread.start()
+
+
+if FACET_REBUILD_ON_RELOAD:
+    register_reload_hook(schedule_rebuild)
+
+
+def get_facet_values(
+        view_id: str,
+        dimension: str,
+        prefix: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+) -> FacetValuesResponse:
+    conn = _connection()
+    if conn is None:
+        raise HTTPException(status_code=503, detail="Facet catalogs have not been built yet")
+
+    where = "view = ? AND dimension = ?"
+    params = [view_id, dimension]
+
+    if prefix:
+        key = label_key(prefix)
+        # Range scan on the (view, dimension, label_key) index
+        where += " AND label_key >= ? AND label_key < ?"
+        params += [key, key + "\uffff"]
+
+    total = conn.execute(f"SELECT COUNT(*) FROM facet_values WHERE {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT value, label, count FROM facet_values WHERE {where} ORDER BY rank LIMIT ? OFFSET ?",
+        params + [limit, offset]
+    ).fetchall()
+
+    return FacetValuesResponse(
+        view_id=view_id,
+        dimension=dimension,
+        total=total,
+        items=[FacetValue(value=value, label=label, count=count) for value, label, count in rows]
+    )
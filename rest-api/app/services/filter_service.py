@@ -1,157 +1,253 @@
+import json
 import logging
-import re
-from typing import List, Union
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 from fastapi import HTTPException
 
+from app.core.cache import LRUCache
+from app.core.config import (
+    FILTER_CACHE_MAX_SET, FILTER_CACHE_BUDGET, FILTER_BATCH_MAX_REQUESTS, FILTER_BATCH_WORKERS
+)
 from app.core.sparql import run_sparql
-from app.models.schemas import FilterRequest, FilterOperator, FilterResultItem
-from app.utils.helpers import is_safe_uri
+from app.models.schemas import (
+    FilterRequest, FilterResultItem, FilterCondition, BatchFilterRequest, BatchFilterResult, BatchFilterResponse
+)
+from app.services.label_service import resolve_labels
+from app.services.query_planner import QueryPlan, plan_filter_query
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (target_class, canonical filter set) -> sorted tuple of every matching subject
+_candidate_cache = LRUCache(maxsize=FILTER_CACHE_BUDGET, weigher=len)
+# Filter sets known to match more than FILTER_CACHE_MAX_SET subjects
+_oversized = LRUCache(maxsize=10000)
+# Filter sets requested once; the second request materializes their subject set
+_requested = LRUCache(maxsize=10000)
 
+CanonicalFilter = Tuple[str, str, str, str]
 
-def _format_value_for_sparql(value: Union[str, int, float, bool]) -> str:
-    """
-    Formats Python values into SPARQL literals.
-    """
-    if isinstance(value, bool):
-        return f"'{str(value).lower()}'^^xsd:boolean"
-
-    if isinstance(value, (int, float)):
-        return str(value)
-
-    val_str = str(value)
-
-    if val_str.startswith("http://") or val_str.startswith("https://"):
-        return f"<{val_str}>"
-
-    if re.match(r"^\d{4}-\d{2}-\d{2}", val_str):
-        return f"'{val_str}'^^xsd:dateTime"
-
-    clean_val = val_str.replace("'", "\\'")
-    return f"'{clean_val}'"
-
-
-def build_intelligent_query(request: FilterRequest) -> List[FilterResultItem]:
-    select_vars = ["DISTINCT ?s", "?label", "?sType"]
-
-    active_paths = {}
-
-    if not is_safe_uri(request.target_class):
-        raise HTTPException(status_code=400, detail="Invalid Target Class URI")
-
-    where_clauses = [f"?s a <{request.target_class}> ."]
-    filter_clauses = []
-
-    for idx, f in enumerate(request.filters):
-        var_name = f"?v{idx}"
-
-        clean_prop_uri = f.property_uri.strip()
-
-        if clean_prop_uri.startswith("^"):
-            check_uri = clean_prop_uri[1:]
-            prop = f"^<{check_uri}>"
-        else:
-            check_uri = clean_prop_uri
-            prop = f"<{check_uri}>"
-
-        if not is_safe_uri(check_uri):
-            raise HTTPException(status_code=400, detail=f"Invalid Property URI: {check_uri}")
-
-        select_vars.append(var_name)
-
-        if f.operator == FilterOperator.TRANSITIVE:
-            val_clean = str(f.value).replace('"', '\\"')
-            target_node = f"<{val_clean}>" if "http" in str(f.value) else f"'{val_clean}'"
-
-            where_clauses.append(f"""
-                ?s {prop} ?concept .
-                ?concept (skos:broader*|rdfs:subClassOf*) {target_node} .
-                BIND({target_node} AS {var_name}) 
-            """)
-
-        else:
-            if f.path_to_target:
-                if not is_safe_uri(f.path_to_target):
-                    raise HTTPException(status_code=400, detail="Invalid Path URI")
-
-                path_key = f.property_uri
 
-                if path_key in active_paths:
-                    intermediate_var = active_paths[path_key]
-                else:
-                    intermediate_var = f"?inter_{idx}"
-                    active_paths[path_key] = intermediate_var
-                    where_clauses.append(f"?s {prop} {intermediate_var} .")
+def _canonical_filter(f: FilterCondition) -> CanonicalFilter:
+    return f.property_uri.strip(), f.operator.value, json.dumps(f.value), f.path_to_target or ""
 
-                where_clauses.append(f"{intermediate_var} <{f.path_to_target}> {var_name} .")
-            else:
-                where_clauses.append(f"?s {prop} {var_name} .")
 
-            formatted_val = _format_value_for_sparql(f.value)
-            val_clean = str(f.value).replace('"', '\\"')
+def _canonical_key(request: FilterRequest) -> Tuple[str, FrozenSet[CanonicalFilter]]:
+    return request.target_class, frozenset(_canonical_filter(f) for f in request.filters)
 
-            if f.operator == FilterOperator.CONTAINS:
-                filter_clauses.append(f"FILTER(regex(str({var_name}), \"{val_clean}\", \"i\"))")
 
-            elif f.operator == FilterOperator.NOT_CONTAINS:
-                filter_clauses.append(f"FILTER(!regex(str({var_name}), \"{val_clean}\", \"i\"))")
+def _find_cached_base(key) -> Optional[Tuple[FrozenSet[CanonicalFilter], tuple]]:
+    """Smallest cached subject set whose filters are a strict subset of the requested ones."""
+    target_class, filters = key
+    best = None
+    for (cached_class, cached_filters), subjects in _candidate_cache.items():
+        if cached_class == target_class and cached_filters < filters:
+            if best is None or len(subjects) < len(best[1]):
+                best = (cached_filters, subjects)
+    return best
 
-            elif f.operator == FilterOperator.EQUALS:
-                filter_clauses.append(f"FILTER({var_name} = {formatted_val})")
 
-            elif f.operator == FilterOperator.NOT_EQUALS:
-                filter_clauses.append(f"FILTER({var_name} != {formatted_val})")
+def _select_subjects(plan: QueryPlan, within: Optional[tuple]) -> Optional[tuple]:
+    """
+    Every subject matching the planned request (optionally restricted to `within`),
+    or None when there are more than FILTER_CACHE_MAX_SET of them.
+    """
+    restriction = _values_clause(within) if within is not None else ""
+    query_body = "\n".join(plan.where_clauses)
 
-            elif f.operator == FilterOperator.GT:
-                filter_clauses.append(f"FILTER({var_name} > {formatted_val})")
+    query = f"""
+    SELECT DISTINCT ?s
+    WHERE {{
+        {restriction}
+        {query_body}
+    }}
+    LIMIT {FILTER_CACHE_MAX_SET + 1}
+    """
+    subjects = {r["s"]["value"] for r in run_sparql(query)}
+    if len(subjects) > FILTER_CACHE_MAX_SET:
+        return None
+    return tuple(sorted(subjects))
 
-            elif f.operator == FilterOperator.LT:
-                filter_clauses.append(f"FILTER({var_name} < {formatted_val})")
 
-    where_clauses.append("OPTIONAL { ?s rdfs:label ?label }")
-    where_clauses.append("OPTIONAL { ?s schema:name ?label }")
-    where_clauses.append("OPTIONAL { ?s skos:prefLabel ?label }")
-    where_clauses.append("OPTIONAL { ?s a ?sType }")
+def _resolve_candidates(request: FilterRequest, plan: QueryPlan) -> Optional[tuple]:
+    """
+    Candidate subjects for `request`, served from the cache when possible.
+    A request that refines a cached one (same class, same filters plus more) is evaluated
+    in full, restricted to the cached subject set instead of the whole class: evaluating
+    only the extra filters would lose variables shared between filters (see `path_vars`).
+    The set is only materialized when the cache can pay off: a cached base to start from,
+    or a filter set asked for before (paging). Otherwise None, and the page is queried directly.
+    """
+    key = _canonical_key(request)
+    cached = _candidate_cache.get(key)
+    if cached is not None:
+        return cached
+    if _oversized.get(key):
+        return None
+
+    base = _find_cached_base(key)
+    if base is not None:
+        subjects = _select_subjects(plan, within=base[1])
+    elif _requested.get(key):
+        subjects = _select_subjects(plan, within=None)
+    else:
+        _requested.put(key, True)
+        return None
+
+    if subjects is None:
+        _oversized.put(key, True)
+    else:
+        _candidate_cache.put(key, subjects)
+    return subjects
+
+
+def _values_clause(subjects) -> str:
+    return f"VALUES ?s {{ {' '.join(f'<{u}>' for u in subjects)} }}"
+
+
+def _select_page(request: FilterRequest, plan: QueryPlan, candidates: Optional[tuple]) -> List[str]:
+    """
+    Phase 1: exactly one page of distinct subjects, using only the filter patterns.
+    Cached candidate sets are already sorted and are paged in memory.
+    """
+    if candidates is not None:
+        return list(candidates[request.offset:request.offset + request.limit])
 
-    query_body = "\n".join(where_clauses + filter_clauses)
+    query_body = "\n".join(plan.where_clauses)
 
     query = f"""
-    SELECT {" ".join(select_vars)}
+    SELECT DISTINCT ?s
     WHERE {{
         {query_body}
     }}
+    ORDER BY ?s
     LIMIT {request.limit}
     OFFSET {request.offset}
     """
+    return [r["s"]["value"] for r in run_sparql(query)]
 
-    results = run_sparql(query)
 
-    items = []
-    for r in results:
+def _hydrate_page(request: FilterRequest, plan: QueryPlan, page: List[str]) -> List[FilterResultItem]:
+    """
+    Phase 2: types and matched values for exactly the subjects of the page, in one batched query.
+    Labels come from the label service.
+    """
+    value_vars = list(dict.fromkeys(plan.value_vars.values()))
+    query_body = "\n".join([_values_clause(page)] + plan.where_clauses + ["OPTIONAL { ?s a ?sType }"])
+
+    query = f"""
+    SELECT ?s ?sType {" ".join(f"?{v}" for v in value_vars)}
+    WHERE {{
+        {query_body}
+    }}
+    """
+
+    types = defaultdict(set)
+    values = defaultdict(dict)
+    for r in run_sparql(query):
         uri = r["s"]["value"]
+        if "sType" in r:
+            types[uri].add(r["sType"]["value"])
+        for v_key in value_vars:
+            if v_key in r:
+                # Keep the smallest value so multi-valued matches are reported deterministically
+                current = values[uri].get(v_key)
+                if current is None or r[v_key]["value"] < current:
+                    values[uri][v_key] = r[v_key]["value"]
 
+    labels = resolve_labels(page)
+
+    items = []
+    for uri in page:
         matches_data = {}
-        for idx in range(len(request.filters)):
-            v_key = f"v{idx}"
-            if v_key in r:
-                matches_data[request.filters[idx].property_uri] = r[v_key]["value"]
+        for idx, v_key in plan.value_vars.items():
+            if v_key in values[uri]:
+                matches_data[request.filters[idx].property_uri] = values[uri][v_key]
 
-        if "label" in r:
-            label = r["label"]["value"]
+        if uri in labels:
+            label = labels[uri]
         elif "#" in uri:
             label = uri.split("#")[-1]
         else:
             label = uri.split("/")[-1]
 
+        subject_types = types[uri]
+        if request.target_class in subject_types:
+            s_type = request.target_class
+        else:
+            s_type = min(subject_types) if subject_types else None
+
         items.append(FilterResultItem(
             uri=uri,
             label=label,
-            type=r.get("sType", {}).get("value"),
+            type=s_type,
             matches=matches_data
         ))
 
     return items
+
+
+def build_intelligent_query(request: FilterRequest) -> List[FilterResultItem]:
+    return _execute_plan(request, plan_filter_query(request))
+
+
+def _execute_plan(request: FilterRequest, plan: QueryPlan) -> List[FilterResultItem]:
+    candidates = _resolve_candidates(request, plan)
+
+    page = _select_page(request, plan, candidates)
+    if not page:
+        return []
+
+    return _hydrate_page(request, plan, page)
+
+
+def _error_result(e: Exception) -> BatchFilterResult:
+    if isinstance(e, HTTPException):
+        return BatchFilterResult(status=e.status_code, error=str(e.detail))
+    logger.error("Batch filter request failed: %s", e)
+    return BatchFilterResult(status=500, error=str(e))
+
+
+def run_filter_batch(batch: BatchFilterRequest) -> BatchFilterResponse:
+    """
+    Runs every request of the batch, identical ones only once, on a bounded pool.
+    A failing request only yields an error entry for its own id.
+    """
+    if len(batch.requests) > FILTER_BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {FILTER_BATCH_MAX_REQUESTS} requests"
+        )
+
+    # canonical request JSON -> ids asking for it
+    groups: Dict[str, List[str]] = defaultdict(list)
+    unique: Dict[str, FilterRequest] = {}
+    for entry in batch.requests:
+        key = json.dumps(entry.request.model_dump(mode="json"), sort_keys=True)
+        groups[key].append(entry.id)
+        unique.setdefault(key, entry.request)
+
+    outcomes: Dict[str, BatchFilterResult] = {}
+
+    # Plan everything up front so invalid requests never reach the store
+    plans: Dict[str, QueryPlan] = {}
+    for key, request in unique.items():
+        try:
+            plans[key] = plan_filter_query(request)
+        except Exception as e:
+            outcomes[key] = _error_result(e)
+
+    if plans:
+        with ThreadPoolExecutor(max_workers=min(FILTER_BATCH_WORKERS, len(plans))) as pool:
+            futures = {key: pool.submit(_execute_plan, unique[key], plan) for key, plan in plans.items()}
+            for key, future in futures.items():
+                try:
+                    outcomes[key] = BatchFilterResult(items=future.result())
+                except Exception as e:
+                    outcomes[key] = _error_result(e)
+
+    return BatchFilterResponse(results={
+        request_id: outcomes[key] for key, ids in groups.items() for request_id in ids
+    })
@@ -0,0 +1,75 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+from app.core.cache import register_reload_hook
+from app.core.config import FULLTEXT_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+# The trigram tokenizer cannot match shorter queries
+MIN_QUERY_LENGTH = 3
+
+_local = threading.local()
+_indexed_predicates: Optional[set] = None
+_lock = threading.Lock()
+# Bumped on reload so every thread reopens the (possibly replaced) index file
+_generation = 0
+
+
+def _reset() -> None:
+    global _indexed_predicates, _generation
+    with _lock:
+        _indexed_predicates = None
+        _generation += 1
+
+
+register_reload_hook(_reset)
+
+
+def _connection() -> Optional[sqlite3.Connection]:
+    if not os.path.exists(FULLTEXT_INDEX_PATH):
+        return None
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(f"file:{FULLTEXT_INDEX_PATH}?mode=ro", uri=True)
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+def _get_indexed_predicates(conn: sqlite3.Connection) -> set:
+    global _indexed_predicates
+    if _indexed_predicates is None:
+        with _lock:
+            if _indexed_predicates is None:
+                _indexed_predicates = {row[0] for row in conn.execute("SELECT uri FROM predicates")}
+                logger.info("Full-text index covers %d predicates", len(_indexed_predicates))
+    return _indexed_predicates
+
+
+def search_subjects(predicate: str, text: str) -> Optional[List[str]]:
+    """
+    Every resource whose `predicate` value contains `text` (case-insensitive substring match),
+    as resolved by the local full-text index built by `app.jobs.fulltext_index`.
+
+    Returns None when the index cannot answer (no index, predicate not indexed, query too
+    short); callers then fall back to SPARQL.
+    """
+    if len(text) < MIN_QUERY_LENGTH:
+        return None
+
+    conn = _connection()
+    if conn is None or predicate not in _get_indexed_predicates(conn):
+        return None
+
+    phrase = '"' + text.replace('"', '""') + '"'
+    rows = conn.execute(
+        "SELECT DISTINCT subject FROM documents WHERE documents MATCH ? AND predicate = ?",
+        (phrase, predicate)
+    ).fetchall()
+    return [row[0] for row in rows]
@@ -1,13 +1,28 @@
-from typing import List, Dict, Optional
+import base64
+import binascii
+import math
+import time
+from typing import List, Dict, Optional, Tuple
 
 from fastapi import HTTPException
 
+from app.core.config import PATH_MAX_DEPTH, PATH_FRONTIER_BATCH_SIZE, PATH_EXPANSION_LIMIT
 from app.core.sparql import run_sparql
-from app.models.schemas import GraphResponse, GraphNode, GraphLink
+from app.models.schemas import (
+    GraphResponse, GraphNode, GraphLink, EdgeDirection,
+    NeighborhoodGroup, NeighborhoodSummaryResponse, NeighborhoodPage
+)
+from app.services.importance_service import node_value
+from app.services.label_service import resolve_labels
 from app.utils.sparql_queries import (
     build_neighborhood_query,
     build_hierarchy_query,
-    build_view_target_class_query
+    build_view_target_class_query,
+    build_path_expansion_query,
+    build_nodes_info_query,
+    build_neighborhood_counts_query,
+    build_neighborhood_samples_query,
+    build_neighborhood_page_query
 )
 from app.utils.helpers import unpack_sparql_row, is_safe_uri
 
@@ -34,6 +49,122 @@ def get_node_neighborhood(resource_uri: str, view_id: Optional[str], limit: int
     return _transform_sparql_to_graph(results, center_node=resource_uri)
 
 
+def get_neighborhood_summary(
+        resource_uri: str,
+        sample_size: int = 5,
+        collapse_threshold: int = 50
+) -> NeighborhoodSummaryResponse:
+    """
+    Hub-aware neighborhood: edge counts per predicate and direction from one grouped query.
+    Small groups are sampled (up to `sample_size` neighbours each), groups larger than
+    `collapse_threshold` are collapsed into a single aggregate node.
+    """
+    if not is_safe_uri(resource_uri):
+        raise HTTPException(status_code=400, detail="Invalid Resource URI")
+
+    count_rows = run_sparql(build_neighborhood_counts_query(resource_uri))
+    labels = resolve_labels(
+        uri for row in count_rows for uri in (unpack_sparql_row(row, "p"), unpack_sparql_row(row, "type"))
+    )
+
+    groups: List[NeighborhoodGroup] = []
+    group_types = {}
+    for row in count_rows:
+        p_uri = unpack_sparql_row(row, "p")
+        count = unpack_sparql_row(row, "count", 0, int)
+        direction = EdgeDirection(unpack_sparql_row(row, "dir"))
+        groups.append(NeighborhoodGroup(
+            predicate=p_uri,
+            label=labels.get(p_uri, p_uri.split("#")[-1].split("/")[-1]),
+            direction=direction,
+            count=count,
+            collapsed=count > collapse_threshold
+        ))
+        group_types[(p_uri, direction)] = unpack_sparql_row(row, "type")
+
+    sampled = [(g.predicate, g.direction.value) for g in groups if not g.collapsed and is_safe_uri(g.predicate)]
+    rows = run_sparql(build_neighborhood_samples_query(resource_uri, sampled, sample_size)) if sampled else []
+    graph = _transform_sparql_to_graph(rows, center_node=resource_uri)
+
+    if not any(n.id == resource_uri for n in graph.nodes):
+        graph.nodes.insert(0, GraphNode(
+            id=resource_uri,
+            label=resolve_labels([resource_uri]).get(resource_uri, resource_uri.split("/")[-1]),
+            group="Unknown",
+            value=node_value(resource_uri)
+        ))
+
+    for g in groups:
+        if g.collapsed:
+            _add_aggregate_node(graph, g, group_types.get((g.predicate, g.direction)), labels)
+
+    return NeighborhoodSummaryResponse(center_node=resource_uri, groups=groups, graph=graph)
+
+
+def _add_aggregate_node(graph: GraphResponse, group: NeighborhoodGroup,
+                        type_uri: Optional[str], labels: Dict[str, str]) -> None:
+    node_id = f"group:{group.direction.value}:{group.predicate}"
+    type_label = labels.get(type_uri, type_uri.split("#")[-1].split("/")[-1]) if type_uri else group.label
+
+    graph.nodes.append(GraphNode(
+        id=node_id,
+        label=f"{group.count} × {type_label}",
+        group="Aggregate",
+        value=1.0 + math.log10(group.count)
+    ))
+    source, target = (graph.center_node, node_id) if group.direction == EdgeDirection.OUT else (node_id, graph.center_node)
+    graph.links.append(GraphLink(
+        source=source,
+        target=target,
+        relationship=group.predicate.split("#")[-1].split("/")[-1],
+        weight=float(group.count)
+    ))
+
+
+def _encode_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_neighborhood_group_page(
+        resource_uri: str,
+        predicate: str,
+        direction: EdgeDirection,
+        cursor: Optional[str] = None,
+        limit: int = 50
+) -> NeighborhoodPage:
+    """Pages through the neighbours of one predicate/direction group, `limit` at a time."""
+    if not is_safe_uri(resource_uri):
+        raise HTTPException(status_code=400, detail="Invalid Resource URI")
+    if not is_safe_uri(predicate) or not predicate.startswith(("http://", "https://")):
+        raise HTTPException(status_code=400, detail="Invalid Property URI")
+
+    after = _decode_cursor(cursor) if cursor else None
+
+    # One extra neighbour tells whether another page exists
+    rows = run_sparql(build_neighborhood_page_query(resource_uri, predicate, direction.value, limit + 1, after))
+    neighbours = sorted({unpack_sparql_row(row, "n") for row in rows})
+
+    next_cursor = None
+    if len(neighbours) > limit:
+        page = set(neighbours[:limit])
+        rows = [row for row in rows if unpack_sparql_row(row, "n") in page]
+        next_cursor = _encode_cursor(neighbours[limit - 1])
+
+    return NeighborhoodPage(
+        predicate=predicate,
+        direction=direction,
+        graph=_transform_sparql_to_graph(rows, center_node=resource_uri),
+        next_cursor=next_cursor
+    )
+
+
 def get_hierarchy_tree(
         root_node: Optional[str],
         child_property: str,
@@ -48,6 +179,10 @@ def get_hierarchy_tree(
     query = build_hierarchy_query(child_property, root_node, target_class, limit)
     results = run_sparql(query)
 
+    labels = resolve_labels(
+        uri for row in results for uri in (unpack_sparql_row(row, "parent"), unpack_sparql_row(row, "child"))
+    )
+
     nodes_map: Dict[str, GraphNode] = {}
     links: List[GraphLink] = []
 
@@ -61,13 +196,13 @@ def get_hierarchy_tree(
         if p_uri not in nodes_map:
             nodes_map[p_uri] = GraphNode(
                 id=p_uri,
-                label=unpack_sparql_row(row, "parentLabel", p_uri.split("/")[-1]),
+                label=labels.get(p_uri, p_uri.split("/")[-1]),
                 group=unpack_sparql_row(row, "parentType", "Node")
             )
         if c_uri not in nodes_map:
             nodes_map[c_uri] = GraphNode(
                 id=c_uri,
-                label=unpack_sparql_row(row, "childLabel", c_uri.split("/")[-1]),
+                label=labels.get(c_uri, c_uri.split("/")[-1]),
                 group=unpack_sparql_row(row, "childType", "Node")
             )
 
@@ -79,14 +214,33 @@ def get_hierarchy_tree(
                 relationship=child_property.split("#")[-1].split("/")[-1]
             ))
 
+    nodes = list(nodes_map.values())
+    _apply_importance(nodes, links)
+
     return GraphResponse(
         center_node=root_node if root_node else "root",
-        nodes=list(nodes_map.values()),
+        nodes=nodes,
         links=links
     )
 
 
+def _apply_importance(nodes: List[GraphNode], links: List[GraphLink]) -> None:
+    """Sizes nodes by their precomputed importance; links weigh the mean of their endpoints."""
+    values = {}
+    for node in nodes:
+        if node.group != "Literal":
+            node.value = node_value(node.id)
+        values[node.id] = node.value
+
+    for link in links:
+        link.weight = (values.get(link.source, 1.0) + values.get(link.target, 1.0)) / 2
+
+
 def _transform_sparql_to_graph(results, center_node) -> GraphResponse:
+    labels = resolve_labels(
+        uri for row in results for uri in (unpack_sparql_row(row, "s"), unpack_sparql_row(row, "o"))
+    )
+
     nodes_map: Dict[str, GraphNode] = {}
     links: List[GraphLink] = []
 
@@ -101,7 +255,7 @@ def _transform_sparql_to_graph(results, center_node) -> GraphResponse:
         if s_uri not in nodes_map:
             nodes_map[s_uri] = GraphNode(
                 id=s_uri,
-                label=unpack_sparql_row(row, "sLabel", s_uri.split("/")[-1]),
+                label=labels.get(s_uri, s_uri.split("/")[-1]),
                 group=unpack_sparql_row(row, "sType", "Unknown")
             )
 
@@ -109,7 +263,7 @@ def _transform_sparql_to_graph(results, center_node) -> GraphResponse:
             is_literal = (row.get("o", {}).get("type") == "literal")
             nodes_map[o_uri] = GraphNode(
                 id=o_uri,
-                label=o_uri if is_literal else unpack_sparql_row(row, "oLabel", o_uri.split("/")[-1]),
+                label=o_uri if is_literal else labels.get(o_uri, o_uri.split("/")[-1]),
                 group="Literal" if is_literal else unpack_sparql_row(row, "oType", "Unknown")
             )
 
@@ -122,8 +276,179 @@ def _transform_sparql_to_graph(results, center_node) -> GraphResponse:
                 relationship=rel_label
             ))
 
+    nodes = list(nodes_map.values())
+    _apply_importance(nodes, links)
+
     return GraphResponse(
         center_node=center_node,
-        nodes=list(nodes_map.values()),
+        nodes=nodes,
+        links=links
+    )
+
+
+# (subject, predicate, object) exactly as stored, regardless of the direction it was traversed in.
+Triple = Tuple[str, str, str]
+
+
+class _SearchSide:
+    """One half of the bidirectional search, rooted at `root`."""
+
+    def __init__(self, root: str):
+        self.parents: Dict[str, List[Tuple[str, Triple]]] = {root: []}
+        self.depths: Dict[str, int] = {root: 0}
+        self.frontier: List[str] = [root]
+        self.depth = 0
+
+
+def find_connection_paths(
+        source_uri: str,
+        target_uri: str,
+        max_depth: int = 4,
+        predicates: Optional[List[str]] = None,
+        time_budget_ms: int = 5000,
+        max_paths: int = 5
+) -> GraphResponse:
+    """
+    Bidirectional BFS between two resources. Each step expands the smaller frontier
+    with batched VALUES queries until the two searches meet, the depth cap is reached
+    or the time budget runs out. Returns the shortest path(s) found as a graph.
+    """
+    for uri in (source_uri, target_uri):
+        if not is_safe_uri(uri):
+            raise HTTPException(status_code=400, detail=f"Invalid Resource URI: {uri}")
+
+    for p in predicates or []:
+        if not is_safe_uri(p) or not p.startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail=f"Invalid Property URI: {p}")
+
+    max_depth = max(1, min(max_depth, PATH_MAX_DEPTH))
+    deadline = time.monotonic() + time_budget_ms / 1000
+
+    forward = _SearchSide(source_uri)
+    backward = _SearchSide(target_uri)
+    meeting = {source_uri} if source_uri == target_uri else set()
+
+    while not meeting and forward.depth + backward.depth < max_depth:
+        candidates = [side for side in (forward, backward) if side.frontier]
+        if not candidates:
+            break
+
+        side = min(candidates, key=lambda x: len(x.frontier))
+        other = backward if side is forward else forward
+
+        completed = _expand_side(side, predicates, deadline)
+        meeting = {n for n in side.frontier if n in other.parents}
+
+        if not completed:
+            break
+
+    paths = _collect_paths(forward, backward, meeting, max_paths)
+    return _paths_to_graph(paths, source_uri, target_uri)
+
+
+def _expand_side(side: _SearchSide, predicates: Optional[List[str]], deadline: float) -> bool:
+    """
+    Advances `side` by one BFS level. Returns False when the time budget ran out
+    before the whole frontier could be expanded.
+    """
+    next_level: Dict[str, List[Tuple[str, Triple]]] = {}
+    completed = True
+
+    for i in range(0, len(side.frontier), PATH_FRONTIER_BATCH_SIZE):
+        if time.monotonic() > deadline:
+            completed = False
+            break
+
+        batch = side.frontier[i:i + PATH_FRONTIER_BATCH_SIZE]
+        rows = run_sparql(build_path_expansion_query(batch, predicates, PATH_EXPANSION_LIMIT))
+
+        for row in rows:
+            n_uri = unpack_sparql_row(row, "n")
+            p_uri = unpack_sparql_row(row, "p")
+            m_uri = unpack_sparql_row(row, "m")
+
+            if m_uri in side.parents or not is_safe_uri(m_uri):
+                continue
+
+            triple = (n_uri, p_uri, m_uri) if unpack_sparql_row(row, "dir") == "out" else (m_uri, p_uri, n_uri)
+            next_level.setdefault(m_uri, []).append((n_uri, triple))
+
+    side.depth += 1
+    for node, edges in next_level.items():
+        side.parents[node] = edges
+        side.depths[node] = side.depth
+    side.frontier = list(next_level.keys())
+
+    return completed
+
+
+def _walk_back(side: _SearchSide, node: str, cap: int) -> List[List[Triple]]:
+    """All root -> node edge sequences recorded by the search, at most `cap` of them."""
+    if not side.parents[node]:
+        return [[]]
+
+    paths = []
+    for prev, triple in side.parents[node]:
+        for head in _walk_back(side, prev, cap):
+            paths.append(head + [triple])
+            if len(paths) >= cap:
+                return paths
+    return paths
+
+
+def _collect_paths(forward: _SearchSide, backward: _SearchSide, meeting: set, max_paths: int) -> List[List[Triple]]:
+    ordered = sorted(meeting, key=lambda n: forward.depths[n] + backward.depths[n])
+
+    paths = []
+    for node in ordered:
+        for head in _walk_back(forward, node, max_paths):
+            for tail in _walk_back(backward, node, max_paths):
+                paths.append(head + list(reversed(tail)))
+                if len(paths) >= max_paths:
+                    return paths
+    return paths
+
+
+def _paths_to_graph(paths: List[List[Triple]], source_uri: str, target_uri: str) -> GraphResponse:
+    node_uris = [source_uri, target_uri]
+    for path in paths:
+        for s_uri, _, o_uri in path:
+            node_uris.extend([s_uri, o_uri])
+    node_uris = list(dict.fromkeys(node_uris))
+
+    types = {}
+    for row in run_sparql(build_nodes_info_query(node_uris)):
+        n_uri = unpack_sparql_row(row, "n")
+        if not types.get(n_uri):
+            types[n_uri] = unpack_sparql_row(row, "type")
+    labels = resolve_labels(node_uris)
+
+    nodes = [
+        GraphNode(
+            id=uri,
+            label=labels.get(uri, uri.split("/")[-1]),
+            group=types.get(uri) or "Unknown"
+        )
+        for uri in node_uris
+    ]
+
+    links: List[GraphLink] = []
+    seen = set()
+    for path in paths:
+        for s_uri, p_uri, o_uri in path:
+            if (s_uri, p_uri, o_uri) in seen:
+                continue
+            seen.add((s_uri, p_uri, o_uri))
+            links.append(GraphLink(
+                source=s_uri,
+                target=o_uri,
+                relationship=p_uri.split("#")[-1].split("/")[-1]
+            ))
+
+    _apply_importance(nodes, links)
+
+    return GraphResponse(
+        center_node=source_uri,
+        nodes=nodes,
         links=links
     )
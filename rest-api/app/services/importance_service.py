@@ -0,0 +1,71 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.core.cache import register_reload_hook
+from app.core.config import IMPORTANCE_INDEX_PATH, IMPORTANCE_METRIC, IMPORTANCE_SCALE
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("degree", "pagerank", "hub")
+
+
+class ImportanceIndex:
+    """
+    Array-backed node importance scores produced by `app.jobs.node_importance`.
+    Scores are normalized to [0, 1]; lookups are O(1) per URI.
+    """
+
+    def __init__(self, uris, scores: Dict[str, np.ndarray]):
+        self._rows = {uri: i for i, uri in enumerate(uris)}
+        self._scores = scores
+
+    @classmethod
+    def load(cls, path: str) -> "ImportanceIndex":
+        with np.load(path) as data:
+            uris = data["uris"].tobytes().decode("utf-8").split("\n")
+            return cls(uris, {m: data[m] for m in METRICS})
+
+    def score(self, uri: str, metric: str = IMPORTANCE_METRIC) -> float:
+        row = self._rows.get(uri)
+        if row is None or metric not in self._scores:
+            return 0.0
+        return float(self._scores[metric][row])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+_index: Optional[ImportanceIndex] = None
+_lock = threading.Lock()
+
+
+def _reset() -> None:
+    global _index
+    with _lock:
+        _index = None
+
+
+register_reload_hook(_reset)
+
+
+def get_importance_index() -> ImportanceIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                if os.path.exists(IMPORTANCE_INDEX_PATH):
+                    _index = ImportanceIndex.load(IMPORTANCE_INDEX_PATH)
+                    logger.info("Loaded importance scores for %d nodes", len(_index))
+                else:
+                    logger.warning("No importance index at %s, nodes keep default sizes", IMPORTANCE_INDEX_PATH)
+                    _index = ImportanceIndex([], {})
+    return _index
+
+
+def node_value(uri: str) -> float:
+    """Display size for a graph node: 1.0 for unknown nodes, up to 1.0 + IMPORTANCE_SCALE."""
+    return 1.0 + IMPORTANCE_SCALE * get_importance_index().score(uri)
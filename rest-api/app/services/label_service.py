@@ -0,0 +1,79 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import LABEL_CACHE_SIZE, LABEL_BATCH_SIZE, LABEL_LANGUAGES, LABEL_PRELOAD_CLASSES
+from app.core.sparql import run_sparql
+from app.utils.helpers import unpack_sparql_row, is_safe_uri
+from app.utils.sparql_queries import build_label_lookup_query, build_class_labels_query
+
+logger = logging.getLogger(__name__)
+
+# Predicate precedence when a resource carries several kinds of label.
+_PREDICATE_RANK = {
+    "http://www.w3.org/2004/02/skos/core#prefLabel": 0,
+    "http://www.w3.org/2000/01/rdf-schema#label": 1,
+    "http://schema.org/name": 2,
+}
+
+# URIs without any label are cached too, so they are not looked up again.
+_NO_LABEL = ""
+
+_label_cache = LRUCache(maxsize=LABEL_CACHE_SIZE)
+
+
+def _rank(row) -> tuple:
+    lang = row.get("label", {}).get("xml:lang", "")
+    lang_rank = LABEL_LANGUAGES.index(lang) if lang in LABEL_LANGUAGES else len(LABEL_LANGUAGES)
+    return lang_rank, _PREDICATE_RANK.get(unpack_sparql_row(row, "lp"), len(_PREDICATE_RANK))
+
+
+def pick_best_labels(rows) -> Dict[str, str]:
+    best = {}
+    for row in rows:
+        uri = unpack_sparql_row(row, "n")
+        rank = _rank(row)
+        if uri not in best or rank < best[uri][0]:
+            best[uri] = (rank, unpack_sparql_row(row, "label"))
+    return {uri: label for uri, (_, label) in best.items()}
+
+
+def resolve_labels(uris: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolves labels for a batch of resources, honouring the configured language preference.
+    Cache misses are fetched with one VALUES query per batch. Resources without a label are omitted.
+    """
+    wanted = list(dict.fromkeys(u for u in uris if u and u.startswith(("http://", "https://"))))
+    cached = _label_cache.get_many(wanted)
+    missing = [u for u in wanted if u not in cached and is_safe_uri(u)]
+
+    for i in range(0, len(missing), LABEL_BATCH_SIZE):
+        batch = missing[i:i + LABEL_BATCH_SIZE]
+        found = pick_best_labels(run_sparql(build_label_lookup_query(batch)))
+        for uri in batch:
+            label = found.get(uri, _NO_LABEL)
+            _label_cache.put(uri, label)
+            cached[uri] = label
+
+    return {uri: label for uri, label in cached.items() if label != _NO_LABEL}
+
+
+def get_label(uri: str, default: Optional[str] = None) -> Optional[str]:
+    return resolve_labels([uri]).get(uri, default)
+
+
+def preload_vocabularies(class_uris: Optional[List[str]] = None) -> int:
+    """
+    Warms the cache with every label of the given (small) vocabularies,
+    e.g. CWE weaknesses or genome tags. Returns the number of labels loaded.
+    """
+    loaded = 0
+    for class_uri in class_uris if class_uris is not None else LABEL_PRELOAD_CLASSES:
+        if not is_safe_uri(class_uri):
+            continue
+        rows = run_sparql(build_class_labels_query(class_uri, LABEL_CACHE_SIZE))
+        for uri, label in pick_best_labels(rows).items():
+            _label_cache.put(uri, label)
+            loaded += 1
+    logger.info("Preloaded %d labels", loaded)
+    return loaded
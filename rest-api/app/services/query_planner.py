@@ -0,0 +1,269 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+from app.core.config import FULLTEXT_MAX_CANDIDATES
+from app.models.schemas import FilterRequest, FilterCondition, FilterOperator
+from app.services.fulltext_service import search_subjects
+from app.services.statistics_service import DatasetStatistics, get_statistics
+from app.utils.helpers import is_safe_uri
+from app.utils.sparql_queries import sparql_string
+
+# Estimates used when no statistics are available for a predicate or class
+UNKNOWN_CARDINALITY = 1_000_000
+UNKNOWN_DISTINCT_VALUES = 1_000
+
+CONTAINS_SELECTIVITY = 0.1
+RANGE_SELECTIVITY = 1 / 3
+TRANSITIVE_FANOUT = 10
+
+
+@dataclass
+class PlannedStep:
+    clauses: List[str]
+    estimate: float
+
+
+@dataclass
+class QueryPlan:
+    where_clauses: List[str]
+    # filter index -> SPARQL variable holding the matched value
+    value_vars: Dict[int, str]
+
+
+def _format_value_for_sparql(value: Union[str, int, float, bool]) -> str:
+    """
+    Formats Python values into SPARQL literals.
+    """
+    if isinstance(value, bool):
+        return f"'{str(value).lower()}'^^xsd:boolean"
+
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    val_str = str(value)
+
+    if val_str.startswith("http://") or val_str.startswith("https://"):
+        if not is_safe_uri(val_str):
+            raise HTTPException(status_code=400, detail=f"Invalid Value URI: {val_str}")
+        return f"<{val_str}>"
+
+    if re.match(r"^\d{4}-\d{2}-\d{2}", val_str):
+        return f"'{val_str}'^^xsd:dateTime"
+
+    clean_val = val_str.replace("'", "\\'")
+    return f"'{clean_val}'"
+
+
+def _parse_property(property_uri: str) -> Tuple[str, str, bool]:
+    """Returns (SPARQL predicate, plain URI, is_inverse) for `p` or `^p`."""
+    clean_prop_uri = property_uri.strip()
+
+    if clean_prop_uri.startswith("^"):
+        check_uri = clean_prop_uri[1:]
+        prop = f"^<{check_uri}>"
+    else:
+        check_uri = clean_prop_uri
+        prop = f"<{check_uri}>"
+
+    if not is_safe_uri(check_uri):
+        raise HTTPException(status_code=400, detail=f"Invalid Property URI: {check_uri}")
+
+    return prop, check_uri, clean_prop_uri.startswith("^")
+
+
+def _predicate_cardinality(stats: DatasetStatistics, uri: str, inverse: bool) -> Tuple[float, float]:
+    """(triples, distinct values on the far side) for a predicate traversed from ?s."""
+    p_stats = stats.predicate(uri)
+    if not p_stats:
+        return UNKNOWN_CARDINALITY, UNKNOWN_DISTINCT_VALUES
+    distinct = p_stats.get("distinct_subjects" if inverse else "distinct_objects") or 1
+    return p_stats.get("triples", UNKNOWN_CARDINALITY), max(distinct, 1)
+
+
+def _range_fraction(f: FilterCondition, p_stats: Optional[dict]) -> float:
+    low, high = (p_stats or {}).get("min"), (p_stats or {}).get("max")
+    if not isinstance(f.value, (int, float)) or not isinstance(low, (int, float)) or not isinstance(high, (int, float)):
+        return RANGE_SELECTIVITY
+    if high <= low:
+        return 1.0
+
+    if f.operator == FilterOperator.GT:
+        fraction = (high - f.value) / (high - low)
+    else:
+        fraction = (f.value - low) / (high - low)
+    return min(max(fraction, 1 / UNKNOWN_CARDINALITY), 1.0)
+
+
+def _selectivity(f: FilterCondition, distinct: float, p_stats: Optional[dict]) -> float:
+    if f.operator == FilterOperator.EQUALS:
+        return 1 / distinct
+    if f.operator == FilterOperator.TRANSITIVE:
+        return min(1.0, TRANSITIVE_FANOUT / distinct)
+    if f.operator in (FilterOperator.GT, FilterOperator.LT):
+        return _range_fraction(f, p_stats)
+    if f.operator == FilterOperator.CONTAINS:
+        return CONTAINS_SELECTIVITY
+    if f.operator == FilterOperator.NOT_CONTAINS:
+        return 1 - CONTAINS_SELECTIVITY
+    return 1 - 1 / distinct
+
+
+def _contains(var_name: str, value) -> str:
+    """Case-insensitive substring test, the same one the full-text index answers."""
+    return f"CONTAINS(LCASE(STR({var_name})), {sparql_string(str(value).lower())})"
+
+
+def _value_constraint(f: FilterCondition, var_name: str) -> str:
+    if f.operator == FilterOperator.CONTAINS:
+        return f"FILTER({_contains(var_name, f.value)})"
+    if f.operator == FilterOperator.NOT_CONTAINS:
+        return f"FILTER(!{_contains(var_name, f.value)})"
+
+    formatted_val = _format_value_for_sparql(f.value)
+    operators = {
+        FilterOperator.EQUALS: "=",
+        FilterOperator.NOT_EQUALS: "!=",
+        FilterOperator.GT: ">",
+        FilterOperator.LT: "<",
+    }
+    return f"FILTER({var_name} {operators[f.operator]} {formatted_val})"
+
+
+def _plan_filter(idx: int, f: FilterCondition, path_vars: Dict[str, str], stats: DatasetStatistics) -> PlannedStep:
+    var_name = f"?v{idx}"
+    prop, check_uri, inverse = _parse_property(f.property_uri)
+    triples, distinct = _predicate_cardinality(stats, check_uri, inverse)
+
+    if f.operator == FilterOperator.TRANSITIVE:
+        val_clean = str(f.value).replace('"', '\\"')
+        target_node = f"<{val_clean}>" if "http" in str(f.value) else f"'{val_clean}'"
+
+        return PlannedStep(
+            clauses=[f"""
+                ?s {prop} ?concept{idx} .
+                ?concept{idx} (skos:broader*|rdfs:subClassOf*) {target_node} .
+                BIND({target_node} AS {var_name})
+            """],
+            estimate=triples * _selectivity(f, distinct, stats.predicate(check_uri))
+        )
+
+    clauses = []
+    subject_var = "?s"
+    value_pred = prop
+    value_stats = stats.predicate(check_uri)
+    estimate_base = triples
+
+    if f.path_to_target:
+        if not is_safe_uri(f.path_to_target):
+            raise HTTPException(status_code=400, detail="Invalid Path URI")
+
+        # Filters through the same first hop share its intermediate node
+        subject_var = path_vars.setdefault(f.property_uri, f"?inter_{idx}")
+        clauses.append(f"?s {prop} {subject_var} .")
+
+        value_pred = f"<{f.path_to_target}>"
+        value_stats = stats.predicate(f.path_to_target)
+        _, distinct = _predicate_cardinality(stats, f.path_to_target, False)
+
+    if f.operator in (FilterOperator.CONTAINS, FilterOperator.NOT_CONTAINS):
+        # Literal values are only reachable through a forward predicate
+        text_pred = f.path_to_target or (None if inverse else check_uri)
+        candidates = search_subjects(text_pred, str(f.value)) if text_pred else None
+
+        if candidates is not None:
+            return _plan_indexed_text_filter(f, var_name, subject_var, value_pred, clauses, candidates,
+                                             estimate_base)
+
+    formatted_val = None if f.operator in (FilterOperator.CONTAINS, FilterOperator.NOT_CONTAINS) \
+        else _format_value_for_sparql(f.value)
+
+    if f.operator == FilterOperator.EQUALS and formatted_val.startswith("<"):
+        # Equality on a resource becomes a bound triple pattern instead of a FILTER over all values
+        clauses.append(f"{subject_var} {value_pred} {formatted_val} .")
+        clauses.append(f"BIND({formatted_val} AS {var_name})")
+    else:
+        clauses.append(f"{subject_var} {value_pred} {var_name} .")
+        clauses.append(_value_constraint(f, var_name))
+
+    return PlannedStep(clauses=clauses, estimate=estimate_base * _selectivity(f, distinct, value_stats))
+
+
+def _plan_indexed_text_filter(f: FilterCondition, var_name: str, subject_var: str, value_pred: str,
+                              clauses: List[str], candidates: List[str], estimate_base: float) -> PlannedStep:
+    """
+    CONTAINS / NOT_CONTAINS resolved by the full-text index, with the same semantics as
+    `_value_constraint`: a resource matches when at least one of its values does (not) contain
+    the text, and {var_name} is bound to such a value.
+    CONTAINS joins the matching resources back as a VALUES block. NOT_CONTAINS keeps every
+    value of the other resources untested; the substring test only runs for the candidates.
+    Above FULLTEXT_MAX_CANDIDATES, or when a candidate URI cannot be inlined, every value is
+    tested instead.
+    """
+    resources = [f"<{uri}>" for uri in candidates if is_safe_uri(uri)]
+    inlined = len(resources) == len(candidates) and len(resources) <= FULLTEXT_MAX_CANDIDATES
+
+    if f.operator == FilterOperator.CONTAINS:
+        values = [f"VALUES {subject_var} {{ {' '.join(resources)} }}"] if inlined else []
+        return PlannedStep(
+            clauses=values + clauses + [
+                f"{subject_var} {value_pred} {var_name} .",
+                # On the candidates, a cheap re-check keeps only the matching values in {var_name}
+                f"FILTER({_contains(var_name, f.value)})"
+            ],
+            estimate=len(candidates)
+        )
+
+    clauses.append(f"{subject_var} {value_pred} {var_name} .")
+    if not candidates:
+        return PlannedStep(clauses=clauses, estimate=estimate_base)
+    if inlined:
+        clauses.append(
+            f"FILTER({subject_var} NOT IN ({', '.join(resources)}) || !{_contains(var_name, f.value)})"
+        )
+    else:
+        clauses.append(f"FILTER(!{_contains(var_name, f.value)})")
+    return PlannedStep(clauses=clauses, estimate=estimate_base)
+
+
+def plan_filter_query(request: FilterRequest) -> QueryPlan:
+    """
+    Compiles the filters of `request` into WHERE clauses ordered by estimated selectivity,
+    so that the most selective facet is evaluated first.
+    """
+    if not is_safe_uri(request.target_class):
+        raise HTTPException(status_code=400, detail="Invalid Target Class URI")
+
+    stats = get_statistics()
+    class_size = stats.class_size(request.target_class)
+    steps = [PlannedStep(
+        clauses=[f"?s a <{request.target_class}> ."],
+        estimate=class_size if class_size is not None else UNKNOWN_CARDINALITY
+    )]
+
+    value_vars: Dict[int, str] = {}
+    seen_filters: Dict[tuple, str] = {}
+    path_vars: Dict[str, str] = {}
+
+    for idx, f in enumerate(request.filters):
+        key = (f.property_uri.strip(), f.operator, str(f.value), f.path_to_target)
+        if key in seen_filters:
+            # Identical condition: reuse the variable instead of joining the same pattern twice
+            value_vars[idx] = seen_filters[key]
+            continue
+
+        steps.append(_plan_filter(idx, f, path_vars, stats))
+        value_vars[idx] = seen_filters[key] = f"v{idx}"
+
+    # Stable sort keeps the client's order between equally selective steps
+    steps.sort(key=lambda step: step.estimate)
+
+    where_clauses = []
+    for step in steps:
+        for clause in step.clauses:
+            if clause not in where_clauses:
+                where_clauses.append(clause)
+
+    return QueryPlan(where_clauses=where_clauses, value_vars=value_vars)
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.core.cache import register_reload_hook
+from app.core.config import SIMILARITY_INDEX_DIR, SIMILARITY_MAX_CANDIDATES
+from app.models.schemas import SimilarItem, SimilarityResponse
+from app.services.graph_service import _get_target_class
+from app.services.label_service import resolve_labels
+from app.utils.helpers import is_safe_uri
+from app.utils.minhash import BANDS, band_keys
+
+logger = logging.getLogger(__name__)
+
+
+def similarity_index_path(class_uri: str) -> str:
+    slug = hashlib.sha1(class_uri.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SIMILARITY_INDEX_DIR, f"{slug}.npz")
+
+
+class SimilarityIndex:
+    """
+    MinHash signatures of one target class, with LSH band tables kept as sorted key arrays
+    so that bucket lookups are binary searches.
+    """
+
+    def __init__(self, uris: List[str], signatures: np.ndarray):
+        self.uris = uris
+        self.signatures = signatures
+        self._rows = {uri: i for i, uri in enumerate(uris)}
+
+        # One contiguous sorted row per band
+        keys = np.ascontiguousarray(band_keys(signatures).T)
+        order = np.argsort(keys, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._order = order.astype(np.int32)
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        with np.load(path) as data:
+            uris = data["uris"].tobytes().decode("utf-8").split("\n")
+            return cls(uris, data["signatures"])
+
+    def candidates(self, row: int) -> np.ndarray:
+        query_keys = band_keys(self.signatures[row:row + 1])[0]
+        found = []
+        for band in range(BANDS):
+            column = self._sorted_keys[band]
+            lo = np.searchsorted(column, query_keys[band], side="left")
+            hi = min(np.searchsorted(column, query_keys[band], side="right"), lo + SIMILARITY_MAX_CANDIDATES)
+            found.append(self._order[band, lo:hi])
+        result = np.unique(np.concatenate(found))
+        return result[result != row]
+
+    def top_k(self, uri: str, k: int) -> Optional[List[tuple]]:
+        row = self._rows.get(uri)
+        if row is None:
+            return None
+
+        rows = self.candidates(row)
+        if rows.size == 0:
+            return []
+
+        # Fraction of agreeing MinHash values estimates the Jaccard similarity
+        scores = (self.signatures[rows] == self.signatures[row]).mean(axis=1)
+        k = min(k, rows.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.uris[rows[i]], float(scores[i])) for i in best]
+
+
+_indexes: Dict[str, Optional[SimilarityIndex]] = {}
+_lock = threading.Lock()
+
+
+def _reset() -> None:
+    with _lock:
+        _indexes.clear()
+
+
+register_reload_hook(_reset)
+
+
+def _get_index(class_uri: str) -> Optional[SimilarityIndex]:
+    if class_uri not in _indexes:
+        with _lock:
+            if class_uri not in _indexes:
+                path = similarity_index_path(class_uri)
+                _indexes[class_uri] = SimilarityIndex.load(path) if os.path.exists(path) else None
+                if _indexes[class_uri] is not None:
+                    logger.info("Loaded similarity index for %s (%d resources)", class_uri, len(_indexes[class_uri].uris))
+    return _indexes[class_uri]
+
+
+def find_similar_resources(resource_uri: str, view_id: str, k: int = 10) -> SimilarityResponse:
+    if not is_safe_uri(resource_uri) or not is_safe_uri(view_id):
+        raise HTTPException(status_code=400, detail="Invalid URI")
+
+    target_class = _get_target_class(view_id)
+    if not target_class:
+        raise HTTPException(status_code=404, detail="View not found")
+
+    index = _get_index(target_class)
+    if index is None:
+        raise HTTPException(status_code=404, detail="No similarity index for this view")
+
+    neighbours = index.top_k(resource_uri, k)
+    if neighbours is None:
+        raise HTTPException(status_code=404, detail="Resource is not part of the similarity index")
+
+    labels = resolve_labels(uri for uri, _ in neighbours)
+
+    return SimilarityResponse(
+        resource_uri=resource_uri,
+        view_id=view_id,
+        items=[
+            SimilarItem(uri=uri, label=labels.get(uri, uri.split("#")[-1].split("/")[-1]), score=score)
+            for uri, score in neighbours
+        ]
+    )
@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.cache import register_reload_hook
+from app.core.config import STATISTICS_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetStatistics:
+    """
+    Per-predicate and per-class counts of the loaded data, as written by
+    `app.jobs.predicate_statistics` or, at ingestion time, by `prep/scripts/void_stats.py`.
+
+    Layout: {"predicates": {uri: {"triples", "distinct_subjects", "distinct_objects", ["min", "max"]}},
+             "classes": {uri: {"instances"}},
+             "datasets": {identifier: {"triples", "files", "bytes", "graphs"}}}
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.predicates: Dict[str, Dict[str, Any]] = data.get("predicates", {})
+        self.classes: Dict[str, Dict[str, Any]] = data.get("classes", {})
+        self.datasets: Dict[str, Dict[str, Any]] = data.get("datasets", {})
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetStatistics":
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def predicate(self, uri: str) -> Optional[Dict[str, Any]]:
+        return self.predicates.get(uri)
+
+    def class_size(self, uri: str) -> Optional[int]:
+        return self.classes.get(uri, {}).get("instances")
+
+    def dataset(self, identifier: str) -> Optional[Dict[str, Any]]:
+        return self.datasets.get(identifier)
+
+
+_statistics: Optional[DatasetStatistics] = None
+_lock = threading.Lock()
+
+
+def _reset() -> None:
+    global _statistics
+    with _lock:
+        _statistics = None
+
+
+register_reload_hook(_reset)
+
+
+def get_statistics() -> DatasetStatistics:
+    global _statistics
+    if _statistics is None:
+        with _lock:
+            if _statistics is None:
+                if os.path.exists(STATISTICS_PATH):
+                    _statistics = DatasetStatistics.load(STATISTICS_PATH)
+                    logger.info("Loaded statistics for %d predicates", len(_statistics.predicates))
+                else:
+                    logger.warning("No statistics at %s, query planning uses default estimates", STATISTICS_PATH)
+                    _statistics = DatasetStatistics({})
+    return _statistics
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 
 from app.core.sparql import run_sparql
 from app.models.schemas import TrendPoint, GranularityEnum, AggregationType
+from app.services.label_service import resolve_labels
 from app.utils.sparql_queries import build_distribution_query, build_custom_analytics_query, \
     build_view_target_class_query
 from app.utils.helpers import unpack_sparql_row, is_safe_uri
@@ -34,12 +35,13 @@ def get_distribution_query(
     query = build_distribution_query(target_property, target_class, granularity, limit)
 
     results = run_sparql(query)
+    labels = resolve_labels(unpack_sparql_row(row, "groupKey") for row in results)
 
     trend_data = []
     for row in results:
-        label = unpack_sparql_row(row, "groupKey")
+        key = unpack_sparql_row(row, "groupKey")
         count_val = unpack_sparql_row(row, "count", 0, int)
-        trend_data.append(TrendPoint(label=label, value=count_val))
+        trend_data.append(TrendPoint(label=labels.get(key, key), value=count_val))
 
     return trend_data
 
@@ -60,9 +62,12 @@ def get_custom_analytics_query(
 
     try:
         results = run_sparql(query)
+        labels = resolve_labels(unpack_sparql_row(row, "groupKey") for row in results)
+
         data = []
         for row in results:
-            label = unpack_sparql_row(row, "groupKey")
+            key = unpack_sparql_row(row, "groupKey")
+            label = labels.get(key, key)
             if label and "http" in label and "/" in label:
                 label = label.split("/")[-1].split("#")[-1]
 
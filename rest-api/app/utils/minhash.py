@@ -0,0 +1,39 @@
+import hashlib
+from typing import Iterable
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+# Largest prime below 2**32: every (a * x + b) fits in uint64 and signatures fit in uint32
+_PRIME = np.uint64(4294967291)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.randint(1, 2 ** 63 - 1, size=ROWS_PER_BAND, dtype=np.uint64) | np.uint64(1)
+
+EMPTY_SIGNATURE = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def hash_token(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def signature(tokens: Iterable[str]) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a set of string tokens."""
+    hashed = np.fromiter({hash_token(t) for t in tokens}, dtype=np.uint64)
+    if hashed.size == 0:
+        return EMPTY_SIGNATURE.copy()
+    hashed %= _PRIME
+    permuted = (np.outer(hashed, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One uint64 LSH bucket key per (signature, band); shape (n, BANDS)."""
+    bands = signatures.astype(np.uint64).reshape(-1, BANDS, ROWS_PER_BAND)
+    # Wrapping multiply-add mixes the rows of each band into one key
+    with np.errstate(over="ignore"):
+        return (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64)
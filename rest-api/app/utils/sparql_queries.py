@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from app.models.schemas import GranularityEnum, AggregationType
 
@@ -177,7 +177,7 @@ def build_view_visualizations_query(view_uri: str) -> str:
 
 def build_neighborhood_query(resource_uri: str, target_class: Optional[str], limit: int) -> str:
     return f"""
-    SELECT ?s ?p ?o ?sLabel ?oLabel ?sType ?oType
+    SELECT ?s ?p ?o ?sType ?oType
     WHERE {{
         BIND(<{resource_uri}> AS ?center)
         {{
@@ -190,9 +190,6 @@ def build_neighborhood_query(resource_uri: str, target_class: Optional[str], lim
             BIND(?center AS ?o)
         }}
 
-        OPTIONAL {{ ?s rdfs:label | schema:name | skos:prefLabel ?sLabel }}
-        OPTIONAL {{ ?o rdfs:label | schema:name | skos:prefLabel ?oLabel }}
-
         OPTIONAL {{ ?s a ?sType }}
         OPTIONAL {{ ?o a ?oType }}
     }}
@@ -221,12 +218,10 @@ def build_hierarchy_query(child_property: str, root_node: Optional[str], target_
         """
 
     return f"""
-    SELECT DISTINCT ?parent ?child ?parentLabel ?childLabel ?parentType ?childType
+    SELECT DISTINCT ?parent ?child ?parentType ?childType
     WHERE {{
         {where_logic}
-        OPTIONAL {{ ?parent rdfs:label | schema:name | skos:prefLabel ?parentLabel }}
         OPTIONAL {{ ?parent a ?parentType }}
-        OPTIONAL {{ ?child rdfs:label | schema:name | skos:prefLabel ?childLabel }}
         OPTIONAL {{ ?child a ?childType }}
     }}
     LIMIT {limit}
@@ -258,13 +253,11 @@ def build_distribution_query(
     is_inverse = target_property.strip().startswith("^")
 
     if is_inverse:
-        group_var = "?s"
         count_var = "?rawVal"
-        label_target = "?s"  
+        label_target = "?s"
     else:
-        group_var = "?rawVal"
         count_var = "?s"
-        label_target = "?rawVal"  
+        label_target = "?rawVal"
 
     if granularity == GranularityEnum.YEAR:
         bind_logic = "BIND(STR(YEAR(?rawVal)) as ?groupKey)"
@@ -273,10 +266,8 @@ def build_distribution_query(
     elif granularity == GranularityEnum.DAY:
         bind_logic = "BIND(SUBSTR(STR(?rawVal), 1, 10) as ?groupKey)"
     else:
-        bind_logic = f"""
-        OPTIONAL {{ {label_target} rdfs:label | schema:name | skos:prefLabel ?lbl }}
-        BIND(COALESCE(STR(?lbl), STR({label_target})) as ?groupKey)
-        """
+        # Labels are resolved afterwards by the label service
+        bind_logic = f"BIND(STR({label_target}) as ?groupKey)"
 
     return f"""
     SELECT ?groupKey (COUNT({count_var}) as ?count)
@@ -333,9 +324,8 @@ def build_custom_analytics_query(
         {class_filter}
         ?s {dim_pred} ?dimVal .
 
-        # Dynamic Label Resolution for the Group Key
-        OPTIONAL {{ {group_node} rdfs:label | schema:name | skos:prefLabel ?lbl }}
-        BIND(COALESCE(STR(?lbl), STR({group_node})) as ?groupKey)
+        # Labels for the Group Key are resolved afterwards by the label service
+        BIND(STR({group_node}) as ?groupKey)
 
         {metric_pattern}
         {"FILTER(BOUND(?metricRaw))" if metric else ""}
@@ -346,32 +336,265 @@ def build_custom_analytics_query(
     """
 
 
-def build_comparison_query(uri_a: str, uri_b: str, limit: int = 500) -> str:
+def build_comparison_query(uris: List[str]) -> str:
+    """
+    Every property/value pair of all compared resources, in one round-trip and without truncation.
+    """
     return f"""
-    SELECT ?source ?p ?o ?pLabel ?oLabel
+    SELECT ?s ?p ?o
     WHERE {{
+        {_values_block("?s", uris)}
+        ?s ?p ?o .
+    }}
+    """
+
+
+def _values_block(var: str, uris: List[str]) -> str:
+    return f"VALUES {var} {{ {' '.join(f'<{u}>' for u in uris)} }}"
+
+
+def build_path_expansion_query(frontier: List[str], predicates: Optional[List[str]], limit: int) -> str:
+    """
+    Expands a whole BFS frontier in one round-trip, following edges in both directions.
+    rdf:type is skipped unless explicitly allowed, since every instance would meet through its class.
+    """
+    predicate_filter = _values_block("?p", predicates) if predicates else "FILTER(?p != rdf:type)"
+
+    return f"""
+    SELECT ?n ?p ?m ?dir
+    WHERE {{
+        {_values_block("?n", frontier)}
         {{
-            <{uri_a}> ?p ?o .
-            BIND("A" AS ?source)
+            ?n ?p ?m .
+            BIND("out" AS ?dir)
         }}
         UNION
         {{
-            <{uri_b}> ?p ?o .
-            BIND("B" AS ?source)
+            ?m ?p ?n .
+            BIND("in" AS ?dir)
         }}
+        {predicate_filter}
+        FILTER(isIRI(?m))
+    }}
+    LIMIT {limit}
+    """
+
+
+def build_nodes_info_query(uris: List[str]) -> str:
+    return f"""
+    SELECT ?n ?type
+    WHERE {{
+        {_values_block("?n", uris)}
+        OPTIONAL {{ ?n a ?type }}
+    }}
+    """
+
+
+LABEL_PREDICATES = "skos:prefLabel rdfs:label schema:name"
 
-        OPTIONAL {{ ?p rdfs:label ?pLabel }}
-        OPTIONAL {{ ?p schema:name ?pLabel }}
-        OPTIONAL {{ ?p skos:prefLabel ?pLabel }}
 
-        OPTIONAL {{ 
-            FILTER(isURI(?o))
-            ?o rdfs:label ?oLabel 
+def build_label_lookup_query(uris: List[str]) -> str:
+    return f"""
+    SELECT ?n ?lp ?label
+    WHERE {{
+        {_values_block("?n", uris)}
+        VALUES ?lp {{ {LABEL_PREDICATES} }}
+        ?n ?lp ?label .
+    }}
+    """
+
+
+def build_class_labels_query(class_uri: str, limit: int, offset: int = 0) -> str:
+    return f"""
+    SELECT ?n ?lp ?label
+    WHERE {{
+        ?n a <{class_uri}> .
+        VALUES ?lp {{ {LABEL_PREDICATES} }}
+        ?n ?lp ?label .
+    }}
+    ORDER BY ?n ?lp ?label
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def build_edge_page_query(predicate: str, limit: int, offset: int) -> str:
+    return f"""
+    SELECT ?s ?o
+    WHERE {{
+        ?s <{predicate}> ?o .
+        FILTER(isIRI(?o))
+    }}
+    ORDER BY ?s ?o
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def sparql_string(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return f'"{escaped}"'
+
+
+def build_neighborhood_counts_query(resource_uri: str) -> str:
+    return f"""
+    SELECT ?p ?dir (COUNT(DISTINCT ?n) AS ?count) (SAMPLE(?nType) AS ?type)
+    WHERE {{
+        {{
+            <{resource_uri}> ?p ?n .
+            BIND("out" AS ?dir)
         }}
-        OPTIONAL {{ 
-            FILTER(isURI(?o))
-            ?o schema:name ?oLabel 
+        UNION
+        {{
+            ?n ?p <{resource_uri}> .
+            BIND("in" AS ?dir)
         }}
+        OPTIONAL {{ ?n a ?nType }}
     }}
+    GROUP BY ?p ?dir
+    ORDER BY DESC(?count)
+    """
+
+
+def _neighbor_group_pattern(resource_uri: str, predicate: str, direction: str,
+                            limit: int, after: Optional[str] = None) -> str:
+    """
+    One page of a single predicate/direction group, in a stable order so it can be resumed
+    from `after` (keyset pagination). Binds ?s ?p ?o exactly as stored.
+    """
+    edge = f"<{resource_uri}> <{predicate}> ?n ." if direction == "out" else f"?n <{predicate}> <{resource_uri}> ."
+    cursor_filter = f"FILTER(STR(?n) > {sparql_string(after)})" if after is not None else ""
+    s_var, o_var = (f"<{resource_uri}>", "?n") if direction == "out" else ("?n", f"<{resource_uri}>")
+
+    return f"""
+        {{
+            {{
+                SELECT ?n WHERE {{
+                    {edge}
+                    {cursor_filter}
+                }}
+                ORDER BY STR(?n)
+                LIMIT {limit}
+            }}
+            BIND({s_var} AS ?s)
+            BIND(<{predicate}> AS ?p)
+            BIND({o_var} AS ?o)
+        }}
+    """
+
+
+def build_neighborhood_samples_query(resource_uri: str, groups: List[tuple], limit: int) -> str:
+    """First `limit` neighbours of every (predicate, direction) group, in one round-trip."""
+    union = "UNION".join(_neighbor_group_pattern(resource_uri, p, d, limit) for p, d in groups)
+    return f"""
+    SELECT ?s ?p ?o ?sType ?oType
+    WHERE {{
+        {union}
+        OPTIONAL {{ ?s a ?sType }}
+        OPTIONAL {{ ?o a ?oType }}
+    }}
+    """
+
+
+def build_neighborhood_page_query(resource_uri: str, predicate: str, direction: str,
+                                  limit: int, after: Optional[str]) -> str:
+    return f"""
+    SELECT ?s ?p ?o ?sType ?oType ?n
+    WHERE {{
+        {_neighbor_group_pattern(resource_uri, predicate, direction, limit, after)}
+        OPTIONAL {{ ?s a ?sType }}
+        OPTIONAL {{ ?o a ?oType }}
+    }}
+    """
+
+
+def build_all_views_query() -> str:
+    return """
+    SELECT DISTINCT ?view ?targetClass
+    WHERE {
+        ?view a davi-meta:DataView ;
+              davi-meta:targetClass ?targetClass .
+    }
+    """
+
+
+def build_feature_page_query(class_uri: str, excluded_predicates: List[str], limit: int, offset: int) -> str:
+    """IRI-valued property/value pairs of every instance of `class_uri`, one page at a time."""
+    excluded = ", ".join(f"<{p}>" for p in excluded_predicates)
+    return f"""
+    SELECT ?s ?p ?o
+    WHERE {{
+        ?s a <{class_uri}> ;
+           ?p ?o .
+        FILTER(isIRI(?o))
+        FILTER(?p NOT IN ({excluded}))
+    }}
+    ORDER BY ?s ?p ?o
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def build_feature_path_page_query(class_uri: str, path: str, limit: int, offset: int) -> str:
+    return f"""
+    SELECT ?s ?o
+    WHERE {{
+        ?s a <{class_uri}> ;
+           {path} ?o .
+    }}
+    ORDER BY ?s ?o
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def build_predicate_statistics_query() -> str:
+    return """
+    SELECT ?p (COUNT(*) AS ?triples) (COUNT(DISTINCT ?s) AS ?subjects) (COUNT(DISTINCT ?o) AS ?objects)
+    WHERE {
+        ?s ?p ?o .
+    }
+    GROUP BY ?p
+    """
+
+
+def build_class_statistics_query() -> str:
+    return """
+    SELECT ?c (COUNT(DISTINCT ?s) AS ?instances)
+    WHERE {
+        ?s a ?c .
+    }
+    GROUP BY ?c
+    """
+
+
+def build_literal_page_query(predicate: str, limit: int, offset: int) -> str:
+    return f"""
+    SELECT ?s ?o
+    WHERE {{
+        ?s <{predicate}> ?o .
+        FILTER(isLiteral(?o))
+    }}
+    ORDER BY ?s ?o
+    LIMIT {limit}
+    OFFSET {offset}
+    """
+
+
+def build_facet_values_query(dimension: str, target_class: str, limit: int) -> str:
+    """Distinct values of a view dimension with the number of target-class resources having each."""
+    if (dimension.startswith("http://") or dimension.startswith("https://")) and "/http" not in dimension:
+        dim_pred = f"<{dimension}>"
+    else:
+        dim_pred = dimension
+
+    return f"""
+    SELECT ?value (COUNT(DISTINCT ?s) AS ?count)
+    WHERE {{
+        ?s a <{target_class}> ;
+           {dim_pred} ?value .
+    }}
+    GROUP BY ?value
+    ORDER BY DESC(?count)
     LIMIT {limit}
     """
@@ -1,8 +1,11 @@
+import logging
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import FRONTEND_URL
 from app.core.security import get_api_key
-from app.routers import filter, trends, compare, layers, graph, datasets
+from app.routers import filter, trends, compare, layers, graph, datasets, similar, autocomplete, admin, facets
+from app.services.label_service import preload_vocabularies
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 app = FastAPI(
@@ -11,6 +14,8 @@ app = FastAPI(
     version="3.0.0"
 )
 
+logger = logging.getLogger(__name__)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[FRONTEND_URL],
@@ -25,6 +30,17 @@ app.include_router(compare.router, prefix="/api/v1/compare", tags=["Compare"], d
 app.include_router(layers.router, prefix="/api/v1/layers", tags=["Layers"], dependencies=[Depends(get_api_key)])
 app.include_router(graph.router, prefix="/api/v1/graph", tags=["Graph"], dependencies=[Depends(get_api_key)])
 app.include_router(datasets.router, prefix="/api/v1/datasets", tags=["Datasets"], dependencies=[Depends(get_api_key)])
+app.include_router(similar.router, prefix="/api/v1/similar", tags=["Similarity"], dependencies=[Depends(get_api_key)])
+app.include_router(autocomplete.router, prefix="/api/v1/autocomplete", tags=["Autocomplete"], dependencies=[Depends(get_api_key)])
+app.include_router(facets.router, prefix="/api/v1/facets", tags=["Facets"], dependencies=[Depends(get_api_key)])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"], dependencies=[Depends(get_api_key)])
+
+@app.on_event("startup")
+def warm_label_cache():
+    try:
+        preload_vocabularies()
+    except Exception as e:
+        logger.warning("Label preloading failed: %s", e)
 
 @app.get("/health")
 def health():